@@ -0,0 +1,291 @@
+"""
+Cache de resultados das listagens do catálogo.
+
+As chaves incluem a "geração" do catálogo (tabela catalog_meta), que o ingest
+incrementa ao fazer commit: depois de um ingest, todas as entradas antigas deixam
+de ser encontradas (e o backend em memória é esvaziado).
+
+GenerationTracked é a base das estruturas em memória montadas a partir do banco
+(índices de similaridade e de nomes, motor colunar): cada uma guarda a geração em que
+foi montada e é refeita numa thread quando ela muda.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Protocol, TypeVar
+
+from sqlmodel import Session
+from sqlalchemy import update
+
+from db import engine
+from models import CatalogMeta
+
+CACHE_ENABLED = os.getenv("CATALOG_CACHE", "1").lower() not in {"0", "false", "off", "no"}
+CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+# backend compartilhado opcional, ex.: redis://redis:6379/0 (precisa do pacote 'redis')
+CACHE_URL = os.getenv("CATALOG_CACHE_URL", "")
+# de quantos em quantos segundos relê a geração no banco
+GENERATION_POLL = float(os.getenv("CATALOG_CACHE_GEN_POLL", "1"))
+
+GENERATION_KEY = "generation"
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+    def set(self, key: str, value: bytes) -> None: ...
+    def clear(self) -> None: ...
+    def stats(self) -> Dict[str, Any]: ...
+
+
+class MemoryLRU:
+    """
+    LRU em processo com TTL por entrada e contadores de hit/miss/eviction.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class RedisBackend:
+    """
+    Backend compartilhado entre réplicas da API; o TTL fica a cargo do Redis (SETEX).
+    """
+
+    def __init__(self, url: str, ttl: float = CACHE_TTL, prefix: str = "exoseeker:catalog:"):
+        import redis  # dependência opcional
+
+        self._r = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._r.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self._r.setex(self.prefix + key, max(1, int(self.ttl)), value)
+
+    def clear(self) -> None:
+        # as chaves já embutem a geração; entradas antigas expiram sozinhas pelo TTL
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def read_generation(sess: Session) -> int:
+    row = sess.get(CatalogMeta, GENERATION_KEY)
+    return row.value if row else 0
+
+
+def current_generation(sess: Session) -> int:
+    """
+    read_generation tolerante a banco novo: 0 enquanto catalog_meta não existe.
+    """
+    try:
+        return read_generation(sess)
+    except Exception:
+        sess.rollback()
+        return 0
+
+
+class HasGeneration(Protocol):
+    generation: int
+
+
+T = TypeVar("T", bound=HasGeneration)
+
+
+class GenerationTracked(Generic[T]):
+    """
+    Valor imutável montado a partir do banco (com atributo `generation`) + reconstrução em
+    segundo plano quando a geração do catálogo muda. Subclasses implementam _load(sess).
+    """
+
+    name = "index"  # prefixo dos logs e nome da thread
+
+    def __init__(self):
+        self.value: Optional[T] = None
+        self.built_at = 0.0
+        self.build_seconds = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def _load(self, sess: Session) -> T:
+        raise NotImplementedError
+
+    def build(self) -> T:
+        started = time.perf_counter()
+        with Session(engine) as sess:
+            value = self._load(sess)
+        self.value = value  # troca atômica: consultas em andamento ficam com o valor anterior
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        return value
+
+    def _rebuild(self) -> None:
+        try:
+            self.build()
+        except Exception as e:
+            print(f"[{self.name}] falha ao reconstruir: {e}")
+        finally:
+            self._rebuilding = False
+
+    def refresh(self, generation: int) -> Optional[T]:
+        """
+        Valor atual (None se ainda não montado); dispara a reconstrução em background quando
+        ele falta ou é de outra geração.
+        """
+        value = self.value
+        if value is None or value.generation != generation:
+            with self._lock:
+                if not self._rebuilding:
+                    self._rebuilding = True
+                    threading.Thread(target=self._rebuild, name=f"{self.name}-rebuild", daemon=True).start()
+        return value
+
+    def current(self, generation: int) -> T:
+        """
+        Valor para a geração `generation`: o primeiro é montado na hora; depois, uma geração
+        nova dispara a reconstrução em background e o valor atual continua servindo.
+        """
+        if self.value is None:
+            with self._lock:
+                if self.value is None:
+                    self.build()
+        return self.refresh(generation)
+
+    def stats(self) -> Dict[str, Any]:
+        value = self.value
+        return {
+            "generation": value.generation if value is not None else None,
+            "build_seconds": self.build_seconds,
+            "rebuilding": self._rebuilding,
+        }
+
+
+def bump_generation(sess: Session) -> int:
+    """
+    Incrementa a geração do catálogo (chamado pelo ingest antes do commit final).
+    """
+    CatalogMeta.__table__.create(sess.get_bind(), checkfirst=True)
+    res = sess.exec(
+        update(CatalogMeta).where(CatalogMeta.key == GENERATION_KEY).values(value=CatalogMeta.value + 1)
+    )
+    if not res.rowcount:
+        sess.add(CatalogMeta(key=GENERATION_KEY, value=1))
+    sess.flush()
+    return read_generation(sess)
+
+
+class ResultCache:
+    """
+    Fachada usada pelas rotas: chave normalizada + geração atual -> bytes JSON da resposta.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend: CacheBackend = backend or (RedisBackend(CACHE_URL) if CACHE_URL else MemoryLRU())
+        self.enabled = CACHE_ENABLED
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def generation(self, sess: Session) -> int:
+        now = time.monotonic()
+        if self._generation is not None and now - self._checked_at < GENERATION_POLL:
+            return self._generation
+        gen = current_generation(sess)
+        with self._lock:
+            if self._generation is not None and gen != self._generation:
+                self.backend.clear()
+            self._generation = gen
+            self._checked_at = now
+        return gen
+
+    @staticmethod
+    def make_key(route: str, params: Dict[str, Any], generation: int) -> str:
+        norm = {}
+        for k, v in params.items():
+            if v is None:
+                continue
+            if isinstance(v, str):
+                v = v.strip()
+                if k in {"mission", "final_classification"}:
+                    v = v.lower()
+            norm[k] = v
+        return f"{route}:g{generation}:" + json.dumps(norm, sort_keys=True, separators=(",", ":"), default=str)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.backend.get(key) if self.enabled else None
+
+    def set(self, key: str, value: bytes) -> None:
+        if self.enabled:
+            self.backend.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "generation": self._generation, **self.backend.stats()}
+
+
+CACHE = ResultCache()
@@ -0,0 +1,229 @@
+"""
+Classificação do catálogo pelo ml_service (POST /predict/batch).
+
+Linhas sem final_classification (ou classificadas por uma versão antiga dos modelos)
+são lidas em lotes por id (keyset), enviadas ao ml_service por um cliente httpx com
+conexões keep-alive, no máximo CLASSIFY_CONCURRENCY lotes em voo, e o rótulo +
+confiança do ensemble voltam ao banco num UPDATE em lote (executemany).
+
+Linhas com rótulo vindo do CSV (ml_version nulo) nunca são sobrescritas, salvo com overwrite=True.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import bindparam, false, or_, text, true, update
+from sqlmodel import Session, select
+
+from models import ExoplanetCatalog
+
+ML_SERVICE_URL = os.getenv("ML_SERVICE_URL", "http://ml_service:8001")
+CLASSIFY_BATCH = int(os.getenv("CLASSIFY_BATCH", "1000"))
+CLASSIFY_CONCURRENCY = int(os.getenv("CLASSIFY_CONCURRENCY", "4"))
+CLASSIFY_RETRIES = int(os.getenv("CLASSIFY_RETRIES", "3"))
+CLASSIFY_TIMEOUT = float(os.getenv("CLASSIFY_TIMEOUT", "60"))
+
+ML_MISSIONS = ["kepler", "k2", "tess"]
+# feature do ml_service -> coluna do catálogo (mesma ordem do treino)
+ML_FEATURES: Dict[str, str] = {
+    "longitude": "longitude",
+    "latitude": "latitude",
+    "stellar_temperature": "stellar_temperature",
+    "stellar_radius": "stellar_radius",
+    "planet_radius": "planet_radius",
+    "eq_temperature": "eq_temperature",
+    "distance": "distance",
+    "stellar_sur_gravity": "surface_gravity",
+}
+# rótulos do ensemble -> vocabulário do catálogo
+LABEL_MAP = {"planet": "planet", "non_planet": "not_planet", "candidate": "candidate"}
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class ClassifyError(RuntimeError):
+    pass
+
+
+def ensure_ml_version(sess: Session) -> None:
+    """
+    Tabelas criadas antes da coluna ml_version: adiciona coluna + índice (só Postgres).
+    """
+    if sess.get_bind().dialect.name != "postgresql":
+        return
+    sess.exec(text("ALTER TABLE exoplanet_catalog ADD COLUMN IF NOT EXISTS ml_version VARCHAR"))
+    sess.exec(text(
+        "CREATE INDEX IF NOT EXISTS ix_exoplanet_catalog_ml_version ON exoplanet_catalog (ml_version)"
+    ))
+    sess.commit()
+
+
+def pending_filter(ml_version: Optional[str], overwrite: bool = False):
+    """
+    Sem rótulo, ou rotulado pelo ml_service com outra versão de modelos.
+    overwrite=True inclui também os rótulos vindos do CSV.
+    """
+    col = ExoplanetCatalog.ml_version
+    if overwrite:
+        return or_(col.is_(None), col != ml_version) if ml_version else true()
+    stale = (col.is_not(None) & (col != ml_version)) if ml_version else false()
+    return or_(ExoplanetCatalog.final_classification.is_(None), stale)
+
+
+def iter_pending(
+    sess: Session,
+    mission: str,
+    ml_version: Optional[str],
+    batch: int = CLASSIFY_BATCH,
+    overwrite: bool = False,
+):
+    """
+    Lotes (ids, colunas) de linhas pendentes de uma missão, por id crescente.
+    O UPDATE das linhas já enviadas não desloca a paginação (keyset em id).
+    """
+    cols = [getattr(ExoplanetCatalog, c) for c in ML_FEATURES.values()]
+    last_id = 0
+    while True:
+        stmt = (
+            select(ExoplanetCatalog.id, *cols)
+            .where(ExoplanetCatalog.mission == mission, ExoplanetCatalog.id > last_id)
+            .where(pending_filter(ml_version, overwrite))
+            .order_by(ExoplanetCatalog.id)
+            .limit(batch)
+        )
+        rows = sess.exec(stmt).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        ids = [r[0] for r in rows]
+        features = {f: [r[j + 1] for r in rows] for j, f in enumerate(ML_FEATURES)}
+        yield ids, features
+
+
+def write_back(sess: Session, ids: List[int], result: Dict[str, Any], ml_version: Optional[str]) -> int:
+    ensemble = result["ensemble"]
+    params = [
+        {"_id": i, "fc": LABEL_MAP.get(label, label), "conf": float(conf), "ver": ml_version}
+        for i, label, conf in zip(ids, ensemble["label"], ensemble["confidence"])
+    ]
+    if not params:
+        return 0
+    table = ExoplanetCatalog.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values(final_classification=bindparam("fc"), final_confidence=bindparam("conf"), ml_version=bindparam("ver"))
+    )
+    sess.connection().execute(stmt, params)
+    return len(params)
+
+
+async def _post_batch(client: httpx.AsyncClient, payload: Dict[str, Any], retries: int) -> Dict[str, Any]:
+    """
+    POST /predict/batch com retry (backoff exponencial + jitter) para erros de rede e 429/5xx transitórios.
+    Erros 4xx são definitivos.
+    """
+    for attempt in range(retries + 1):
+        try:
+            r = await client.post("/predict/batch", json=payload)
+            if r.status_code not in RETRY_STATUS:
+                if r.status_code >= 400:
+                    raise ClassifyError(f"ml_service respondeu {r.status_code}: {r.text[:200]}")
+                return r.json()
+            err: Exception = ClassifyError(f"ml_service respondeu {r.status_code}")
+        except httpx.TransportError as e:
+            err = e
+        if attempt == retries:
+            raise ClassifyError(f"lote falhou após {retries + 1} tentativas: {err}")
+        await asyncio.sleep(min(10.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+    raise AssertionError("unreachable")
+
+
+async def ml_version(client: httpx.AsyncClient) -> Optional[str]:
+    r = await client.get("/health")
+    r.raise_for_status()
+    body = r.json()
+    return body.get("version")
+
+
+async def _classify(
+    sess: Session,
+    client: httpx.AsyncClient,
+    missions: List[str],
+    batch: int,
+    concurrency: int,
+    retries: int,
+    overwrite: bool,
+) -> Dict[str, Any]:
+    version = await ml_version(client)
+    sem = asyncio.Semaphore(concurrency)
+    in_flight: set = set()
+    stats = {"ml_version": version, "sent": 0, "updated": 0, "batches": 0}
+
+    async def score(mission: str, ids: List[int], features: Dict[str, list]) -> Tuple[List[int], Dict[str, Any]]:
+        try:
+            result = await _post_batch(client, {"mission": mission, "features": features}, retries)
+            return ids, result
+        finally:
+            sem.release()
+
+    def drain(done) -> None:
+        for task in done:
+            ids, result = task.result()
+            stats["updated"] += write_back(sess, ids, result, version)
+            stats["batches"] += 1
+        sess.commit()
+
+    try:
+        for mission in missions:
+            for ids, features in iter_pending(sess, mission, version, batch, overwrite):
+                await sem.acquire()
+                in_flight.add(asyncio.create_task(score(mission, ids, features)))
+                stats["sent"] += len(ids)
+                done = {t for t in in_flight if t.done()}
+                if done:
+                    drain(done)
+                    in_flight -= done
+                # a sessão é síncrona: o próximo SELECT só sai depois de gravar o que já voltou
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                drain(done)
+                in_flight -= done
+    finally:
+        # um lote falhou: cancela o resto e recolhe as exceções (inclusive dos que já terminaram)
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    return stats
+
+
+def classify_catalog(
+    sess: Session,
+    missions: Optional[List[str]] = None,
+    base_url: str = ML_SERVICE_URL,
+    batch: int = CLASSIFY_BATCH,
+    concurrency: int = CLASSIFY_CONCURRENCY,
+    retries: int = CLASSIFY_RETRIES,
+    overwrite: bool = False,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    """
+    Classifica as linhas pendentes e grava o resultado (commit a cada lote devolvido).
+    `transport` permite apontar para um ml_service em processo (httpx.ASGITransport).
+    """
+    missions = missions or ML_MISSIONS
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    ensure_ml_version(sess)
+
+    async def run():
+        async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=CLASSIFY_TIMEOUT, transport=transport
+        ) as client:
+            return await _classify(sess, client, missions, batch, max(1, concurrency), retries, overwrite)
+
+    started = time.perf_counter()
+    stats = asyncio.run(run())
+    stats["seconds"] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,230 @@
+"""
+Motor de leitura colunar em memória para a listagem do catálogo (opcional, CATALOG_ENGINE=memory).
+
+O catálogo cabe folgado em RAM (dezenas de milhares de linhas). Cada processo da API lê
+`exoplanet_catalog` uma vez para arrays numpy: numéricas como float64/int64 com máscara de
+nulos, texto como categórico (códigos + categorias). A listagem responde com a mesma
+semântica do SQL, que é a referência:
+
+- filtros de igualdade (mission, final_classification, object_id) e ranges min_/max_
+  viram máscaras vetorizadas;
+- ORDER BY ... NULLS LAST com o id de desempate vira uma permutação np.lexsort, calculada
+  uma vez por ordenação e reaproveitada até a próxima recarga;
+- OFFSET/LIMIT e o cursor (keyset) são o mesmo corte sobre essa permutação filtrada.
+
+Ordenação por coluna de texto e projeções com 'extra' continuam no SQL, porque a ordem de
+strings depende da collation do banco e 'extra' não é carregada. count=estimate devolve o
+total exato.
+
+O snapshot guarda a geração do catálogo. Uma geração nova dispara a recarga numa thread,
+e até a troca atômica as listagens vão para o SQL.
+"""
+import os
+import threading
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select
+
+from cache import GenerationTracked, current_generation
+from filters import CatalogFilters
+from models import INTERNAL_COLUMNS, ExoplanetCatalog
+
+CATALOG_ENGINE = os.getenv("CATALOG_ENGINE", "sql").lower()  # sql | memory
+
+# (nome da coluna, desc)
+Key = Tuple[str, bool]
+
+
+class Column:
+    """
+    Uma coluna: kind 'float' | 'int' (valores + máscara de nulos) ou 'cat' (códigos, -1 = nulo).
+    """
+
+    def __init__(self, kind: str, values: np.ndarray, null: np.ndarray, categories: Optional[List[str]] = None):
+        self.kind = kind
+        self.values = values
+        self.null = null
+        self.categories = categories
+
+    @classmethod
+    def build(cls, python_type: type, data: Sequence[Any]) -> "Column":
+        null = np.fromiter((v is None for v in data), dtype=bool, count=len(data))
+        if python_type is float:
+            return cls("float", np.array([0.0 if v is None else v for v in data], dtype=np.float64), null)
+        if python_type is int:
+            return cls("int", np.array([0 if v is None else v for v in data], dtype=np.int64), null)
+        codes, uniques = pd.factorize(pd.Series(data, dtype=object), use_na_sentinel=True)
+        return cls("cat", codes.astype(np.int32), null, [str(u) for u in uniques])
+
+    def equals(self, value: Any) -> np.ndarray:
+        if self.kind == "cat":
+            try:
+                code = self.categories.index(value)
+            except ValueError:
+                return np.zeros(self.values.shape[0], dtype=bool)
+            return self.values == code
+        return ~self.null & (self.values == value)
+
+    def pylist(self, positions: np.ndarray) -> List[Any]:
+        """
+        Valores Python (None para nulos) nas posições pedidas, como o driver devolveria.
+        """
+        null = self.null[positions]
+        if self.kind == "cat":
+            cats = self.categories
+            return [None if n else cats[c] for c, n in zip(self.values[positions].tolist(), null.tolist())]
+        return [None if n else v for v, n in zip(self.values[positions].tolist(), null.tolist())]
+
+
+class ColumnarSnapshot:
+    """
+    Colunas de uma geração do catálogo (imutáveis) mais as permutações de ordenação já calculadas.
+    """
+
+    def __init__(self, generation: int, columns: Dict[str, Column], n: int):
+        self.generation = generation
+        self.columns = columns
+        self.n = n
+        self._orders: Dict[Tuple[Key, ...], np.ndarray] = {}
+        self._row_types: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, sess: Session) -> "ColumnarSnapshot":
+        generation = current_generation(sess)
+        table_cols = [c for c in ExoplanetCatalog.__table__.columns if c.name != "extra" and c.name not in INTERNAL_COLUMNS]
+        rows = sess.exec(select(*[getattr(ExoplanetCatalog, c.name) for c in table_cols])).all()
+        data = list(zip(*rows)) if rows else [()] * len(table_cols)
+        columns = {c.name: Column.build(c.type.python_type, d) for c, d in zip(table_cols, data)}
+        return cls(generation, columns, len(rows))
+
+    def supports(self, keys: Sequence[Key], fields: Sequence[str]) -> bool:
+        return (all(f in self.columns for f in fields)
+                and all(self.columns[name].kind != "cat" for name, _ in keys))
+
+    def mask(self, filters: CatalogFilters) -> np.ndarray:
+        m = np.ones(self.n, dtype=bool)
+        if filters.mission:
+            m &= self.columns["mission"].equals(filters.mission)
+        if filters.final_classification:
+            m &= self.columns["final_classification"].equals(filters.final_classification)
+        if filters.object_id:
+            m &= self.columns["object_id"].equals(filters.object_id)
+        for field, (lo, hi) in filters.ranges.items():
+            col = self.columns.get(field)
+            if col is None or (lo is None and hi is None):
+                continue
+            m &= ~col.null
+            if lo is not None:
+                m &= col.values >= lo
+            if hi is not None:
+                m &= col.values <= hi
+        return m
+
+    def order(self, keys: Sequence[Key]) -> np.ndarray:
+        """
+        Permutação de todas as linhas em ORDER BY keys (NULLS LAST em cada chave).
+        """
+        sig = tuple(keys)
+        perm = self._orders.get(sig)
+        if perm is None:
+            lex: List[np.ndarray] = []
+            # np.lexsort: a última chave é a principal; em cada coluna o flag de nulo pesa mais que o valor
+            for name, desc in reversed(keys):
+                col = self.columns[name]
+                lex.append(np.where(col.null, 0, -col.values if desc else col.values))
+                lex.append(col.null)
+            perm = np.lexsort(lex)
+            with self._lock:
+                self._orders[sig] = perm
+        return perm
+
+    def after(self, keys: Sequence[Key], values: Sequence[Any]) -> np.ndarray:
+        """
+        Máscara "depois do cursor": mesma expressão de pagination.seek_clause.
+        """
+        out = np.zeros(self.n, dtype=bool)
+        prefix = np.ones(self.n, dtype=bool)
+        for (name, desc), v in zip(keys, values):
+            col = self.columns[name]
+            if v is None:
+                equal = col.null
+            else:
+                beyond = (col.values < v) if desc else (col.values > v)
+                out |= prefix & ((beyond & ~col.null) | col.null)
+                equal = ~col.null & (col.values == v)
+            prefix &= equal
+        return out
+
+    def _row_type(self, names: Sequence[str]):
+        sig = tuple(names)
+        row_type = self._row_types.get(sig)
+        if row_type is None:
+            # tuplas nomeadas: fatiáveis como as Row do SQLAlchemy e com getattr para o encode_cursor
+            row_type = self._row_types[sig] = namedtuple("Row", sig)
+        return row_type
+
+    def page(
+        self,
+        filters: CatalogFilters,
+        keys: Sequence[Key],
+        names: Sequence[str],
+        offset: int,
+        limit: int,
+        cursor_values: Optional[Sequence[Any]],
+        count: str,
+    ) -> Tuple[List[Any], Optional[int], bool]:
+        """
+        (linhas com as colunas `names`, total, estimado?) — mesmo contrato de count_rows + SELECT ... LIMIT.
+        """
+        m = self.mask(filters)
+        total = None if count == "none" else int(m.sum())
+        if cursor_values is not None:
+            m &= self.after(keys, cursor_values)
+        perm = self.order(keys)
+        positions = perm[m[perm]][offset:offset + limit]
+        row_type = self._row_type(names)
+        cols = [self.columns[n].pylist(positions) for n in names]
+        return [row_type(*r) for r in zip(*cols)], total, False
+
+
+class ColumnarEngine(GenerationTracked[ColumnarSnapshot]):
+    """
+    Snapshot corrente + recarga em segundo plano quando a geração do catálogo muda.
+    """
+
+    name = "columnar"
+
+    def __init__(self, enabled: bool = CATALOG_ENGINE == "memory"):
+        super().__init__()
+        self.enabled = enabled
+
+    def _load(self, sess: Session) -> ColumnarSnapshot:
+        return ColumnarSnapshot.load(sess)
+
+    def current(self, generation: int) -> Optional[ColumnarSnapshot]:
+        """
+        Snapshot da geração `generation`, ou None (use o SQL) enquanto ele é (re)carregado.
+        """
+        if not self.enabled:
+            return None
+        snap = self.refresh(generation)
+        return snap if snap is not None and snap.generation == generation else None
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self.value
+        base = super().stats()
+        return {
+            "enabled": self.enabled,
+            "rows": snap.n if snap is not None else 0,
+            "generation": base["generation"],
+            "orders": len(snap._orders) if snap is not None else 0,
+            "load_seconds": base["build_seconds"],
+            "loading": base["rebuilding"],
+        }
+
+
+COLUMNAR = ColumnarEngine()
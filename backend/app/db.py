@@ -1,11 +1,144 @@
 import os
-from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
 from sqlmodel import create_engine, Session
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://postgres:postgres@db:5432/exoseeker")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-@contextmanager
-def get_session():
+# Caminho assíncrono (async def nas rotas de leitura do catálogo); desligado por padrão
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in {"1", "true", "on", "yes"}
+# padrão: mesmo banco com o driver asyncpg (ou aiosqlite para SQLite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+
+# Pool (ignorado para SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# cache de prepared statements por conexão (asyncpg: prepared_statement_cache_size; psycopg: prepared_max);
+# 0 desliga os prepared statements
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+def _engine_kwargs(url: str) -> Dict[str, Any]:
+    if url.startswith("sqlite"):
+        return {}
+    kwargs: Dict[str, Any] = {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if "+asyncpg" in url:
+        kwargs["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    elif "+psycopg" in url:
+        # 0 desliga os prepared statements server-side (necessário atrás de pgbouncer em modo transaction);
+        # o tamanho do cache (prepared_max) não é parâmetro de connect: vai em _statement_cache
+        kwargs["connect_args"] = {"prepare_threshold": 5 if DB_STATEMENT_CACHE_SIZE > 0 else None}
+    return kwargs
+
+
+def _statement_cache(sync_engine) -> None:
+    """
+    psycopg: aplica DB_STATEMENT_CACHE_SIZE como prepared_max de cada conexão nova.
+    """
+    if sync_engine.dialect.driver not in {"psycopg", "psycopg_async"} or DB_STATEMENT_CACHE_SIZE <= 0:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_prepared_max(dbapi_conn, _record):
+        getattr(dbapi_conn, "driver_connection", dbapi_conn).prepared_max = DB_STATEMENT_CACHE_SIZE
+
+
+def _async_url(url: str) -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return f"postgresql+asyncpg://{rest}"
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+_statement_cache(engine)
+
+async_engine = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    _url = _async_url(DATABASE_URL)
+    async_engine = create_async_engine(_url, **_engine_kwargs(_url))
+    _statement_cache(async_engine.sync_engine)
+
+
+def get_session() -> Iterator[Session]:
+    """
+    Dependência FastAPI (Depends(get_session)): uma sessão por request.
+    """
     with Session(engine) as session:
         yield session
+
+
+class SyncDB:
+    """
+    Sessão síncrona exposta com a mesma interface assíncrona de AsyncDB:
+    cada chamada roda no threadpool.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def all(self, stmt):
+        return await run_in_threadpool(lambda: self.session.exec(stmt).all())
+
+    async def one(self, stmt):
+        return await run_in_threadpool(lambda: self.session.exec(stmt).one())
+
+    async def get(self, model, ident):
+        return await run_in_threadpool(self.session.get, model, ident)
+
+    async def run_sync(self, fn: Callable[..., Any], *args, **kwargs):
+        """
+        fn(session, *args, **kwargs) com uma Session síncrona (helpers compartilhados).
+        """
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+class AsyncDB:
+    """
+    Sessão assíncrona: a espera pelo Postgres não prende nenhum worker do threadpool.
+    """
+
+    def __init__(self, session: "AsyncSession"):
+        self.session = session
+
+    async def all(self, stmt):
+        return (await self.session.exec(stmt)).all()
+
+    async def one(self, stmt):
+        return (await self.session.exec(stmt)).one()
+
+    async def get(self, model, ident):
+        return await self.session.get(model, ident)
+
+    async def run_sync(self, fn: Callable[..., Any], *args, **kwargs):
+        return await self.session.run_sync(fn, *args, **kwargs)
+
+
+async def get_db() -> AsyncIterator[Any]:
+    """
+    Dependência das rotas async: AsyncDB se DB_ASYNC=1, senão SyncDB (threadpool).
+    """
+    if async_engine is not None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield AsyncDB(session)
+    else:
+        session = Session(engine)
+        try:
+            yield SyncDB(session)
+        finally:
+            await run_in_threadpool(session.close)
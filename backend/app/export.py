@@ -0,0 +1,160 @@
+"""
+Export em streaming do catálogo (CSV / NDJSON / Parquet / Arrow IPC).
+
+Lê por cursor do lado do servidor (stream_results + partitions) em blocos de
+EXPORT_CHUNK linhas, só com tuplas de colunas — sem ORM nem pydantic por linha —
+e escreve cada bloco assim que chega: a memória fica constante no tamanho do resultado.
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, Iterator, List, Sequence
+
+from sqlmodel import Session
+
+from db import engine
+from models import INTERNAL_COLUMNS, ExoplanetCatalog
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "5000"))
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+def export_columns(include_extra: bool) -> List[Any]:
+    return [c for c in ExoplanetCatalog.__table__.columns
+            if (include_extra or c.name != "extra") and c.name not in INTERNAL_COLUMNS]
+
+
+def iter_chunks(stmt, chunk: int = EXPORT_CHUNK) -> Iterator[Sequence[Any]]:
+    # sessão própria: o streaming roda depois que as dependências da rota já foram encerradas
+    with Session(engine) as sess:
+        result = sess.connection().execution_options(stream_results=True, yield_per=chunk).execute(stmt)
+        for part in result.partitions(chunk):
+            yield part
+
+
+def _json_default(v: Any) -> Any:
+    return str(v)
+
+
+class _Drain:
+    """
+    Arquivo "de mentira" para os writers do pyarrow: acumula os bytes escritos
+    até a rota drenar e devolver ao cliente.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        b = bytes(data)
+        self._parts.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts = []
+        return out
+
+
+def stream_csv(stmt, names: List[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(names)
+    extra_idx = names.index("extra") if "extra" in names else None
+    for part in iter_chunks(stmt):
+        for row in part:
+            if extra_idx is not None:
+                row = list(row)
+                row[extra_idx] = json.dumps(row[extra_idx], default=_json_default) if row[extra_idx] is not None else ""
+            w.writerow(row)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def stream_ndjson(stmt, names: List[str]) -> Iterator[bytes]:
+    for part in iter_chunks(stmt):
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in part
+        ).encode("utf-8")
+
+
+def _arrow_schema(pa, columns):
+    fields = []
+    for c in columns:
+        if c.name == "extra":
+            t = pa.string()  # JSON serializado
+        elif c.type.python_type is int:
+            t = pa.int64()
+        elif c.type.python_type is float:
+            t = pa.float64()
+        else:
+            t = pa.string()
+        fields.append(pa.field(c.name, t))
+    return pa.schema(fields)
+
+
+def _record_batch(pa, schema, part):
+    cols = list(zip(*part)) if part else [[] for _ in schema]
+    arrays = []
+    for field, values in zip(schema, cols):
+        if field.name == "extra":
+            values = [json.dumps(v, default=_json_default) if v is not None else None for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_arrow(stmt, columns, fmt: str) -> Iterator[bytes]:
+    import pyarrow as pa  # import tardio: só quem exporta colunar paga o custo
+
+    schema = _arrow_schema(pa, columns)
+    sink = _Drain()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema)
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+    try:
+        for part in iter_chunks(stmt):
+            write(_record_batch(pa, schema, part))  # um row group / record batch por bloco
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def stream_export(stmt, columns, fmt: str) -> Iterator[bytes]:
+    names = [c.name for c in columns]
+    if fmt == "csv":
+        return stream_csv(stmt, names)
+    if fmt == "ndjson":
+        return stream_ndjson(stmt, names)
+    return stream_arrow(stmt, columns, fmt)
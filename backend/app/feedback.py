@@ -0,0 +1,156 @@
+"""
+Realimentação do ml_service com rótulos novos do catálogo (POST /train/incremental).
+
+O ingest grava em label_generation a geração do catálogo em que o rótulo do CSV de cada
+linha apareceu ou mudou (ex.: candidato confirmado como planeta). Aqui as linhas com
+rótulo do CSV (ml_version nulo) e label_generation acima da marca d'água da missão
+(catalog_meta 'ml_labels:<missão>') vão para o ml_service, que atualiza os modelos de
+forma incremental em vez de retreinar tudo. A marca só avança depois que o job termina;
+o ml_service ignora linhas já absorvidas, então reenviar um lote não muda nada.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import func, text, update
+from sqlmodel import Session, select
+
+from cache import read_generation
+from classify import ML_FEATURES, ML_MISSIONS, ML_SERVICE_URL, ClassifyError
+from models import CatalogMeta, ExoplanetCatalog
+
+# tempo máximo de espera por um job de atualização no ml_service (s)
+FEEDBACK_TIMEOUT = float(os.getenv("FEEDBACK_TIMEOUT", "900"))
+FEEDBACK_POLL = float(os.getenv("FEEDBACK_POLL", "1"))
+
+# vocabulário do catálogo -> rótulos do ml_service (inverso de classify.LABEL_MAP)
+ML_LABELS = {"planet": "planet", "not_planet": "non_planet", "candidate": "candidate"}
+WATERMARK_KEY = "ml_labels:{mission}"
+
+
+def ensure_label_generation(sess: Session) -> None:
+    """
+    Tabelas criadas antes da coluna label_generation: adiciona coluna + índice (só Postgres).
+    """
+    if sess.get_bind().dialect.name != "postgresql":
+        return
+    sess.exec(text("ALTER TABLE exoplanet_catalog ADD COLUMN IF NOT EXISTS label_generation INTEGER"))
+    sess.exec(text(
+        "CREATE INDEX IF NOT EXISTS ix_exoplanet_catalog_label_generation ON exoplanet_catalog (label_generation)"
+    ))
+    sess.commit()
+
+
+def next_label_generation(sess: Session) -> int:
+    """
+    Geração que o ingest em andamento vai publicar (bump_generation no fim).
+    """
+    CatalogMeta.__table__.create(sess.get_bind(), checkfirst=True)
+    return read_generation(sess) + 1
+
+
+def read_watermark(sess: Session, mission: str) -> int:
+    CatalogMeta.__table__.create(sess.get_bind(), checkfirst=True)
+    row = sess.get(CatalogMeta, WATERMARK_KEY.format(mission=mission))
+    return row.value if row else 0
+
+
+def set_watermark(sess: Session, mission: str, value: int) -> None:
+    key = WATERMARK_KEY.format(mission=mission)
+    res = sess.exec(update(CatalogMeta).where(CatalogMeta.key == key).values(value=value))
+    if not res.rowcount:
+        sess.add(CatalogMeta(key=key, value=value))
+    sess.flush()
+
+
+def labeled_rows(sess: Session, mission: str, since: int) -> Tuple[int, Dict[str, Any]]:
+    """
+    (maior label_generation lida, corpo do POST /train/incremental) das linhas com rótulo
+    do CSV que apareceu/mudou depois da geração `since`.
+    """
+    cols = [getattr(ExoplanetCatalog, c) for c in ML_FEATURES.values()]
+    stmt = (
+        select(ExoplanetCatalog.object_id, ExoplanetCatalog.final_classification, ExoplanetCatalog.label_generation, *cols)
+        .where(ExoplanetCatalog.mission == mission, ExoplanetCatalog.label_generation > since)
+        .where(ExoplanetCatalog.ml_version.is_(None), ExoplanetCatalog.final_classification.in_(list(ML_LABELS)))
+        .order_by(ExoplanetCatalog.id)
+    )
+    rows = sess.exec(stmt).all()
+    body = {
+        "mission": mission,
+        "object_ids": [r[0] for r in rows],
+        "labels": [ML_LABELS[r[1]] for r in rows],
+        "features": {f: [r[j + 3] for r in rows] for j, f in enumerate(ML_FEATURES)},
+    }
+    return max((r[2] for r in rows), default=since), body
+
+
+def _wait_job(client: httpx.Client, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    deadline = time.monotonic() + timeout
+    while job["status"] in ("queued", "running"):
+        if time.monotonic() > deadline:
+            raise ClassifyError(f"job {job['id']} do ml_service não terminou em {timeout:.0f}s")
+        time.sleep(FEEDBACK_POLL)
+        r = client.get(f"/train/{job['id']}")
+        r.raise_for_status()
+        job = r.json()
+    if job["status"] != "succeeded":
+        raise ClassifyError(f"job {job['id']} do ml_service falhou: {job.get('error')}")
+    return job
+
+
+def push_labels(
+    sess: Session,
+    missions: Optional[List[str]] = None,
+    base_url: str = ML_SERVICE_URL,
+    compare_full: bool = False,
+    timeout: float = FEEDBACK_TIMEOUT,
+    client: Optional[httpx.Client] = None,
+    since: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Envia os rótulos novos de cada missão e devolve {missão: relatório do ml_service}
+    (None quando não havia nada novo). A marca d'água é gravada com commit por missão.
+    `since` ignora a marca (ex.: reenviar tudo desde a linha de base depois que o
+    ml_service reiniciou e perdeu as atualizações, que ficam só em memória).
+    """
+    ensure_label_generation(sess)
+    own = client is None
+    client = client or httpx.Client(base_url=base_url, timeout=60)
+    out: Dict[str, Any] = {}
+    try:
+        for mission in missions or ML_MISSIONS:
+            start = read_watermark(sess, mission) if since is None else since
+            newest, body = labeled_rows(sess, mission, start)
+            if not body["object_ids"]:
+                out[mission] = None
+                continue
+            r = client.post("/train/incremental", json={**body, "compare_full": compare_full})
+            if r.status_code >= 400:
+                raise ClassifyError(f"ml_service respondeu {r.status_code}: {r.text[:200]}")
+            job = _wait_job(client, r.json(), timeout)
+            set_watermark(sess, mission, newest)
+            sess.commit()
+            out[mission] = {"sent": len(body["object_ids"]), "since": start, "watermark": newest, **job["report"]}
+    finally:
+        if own:
+            client.close()
+    return out
+
+
+def mark_baseline(sess: Session, missions: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Marca todos os rótulos atuais como já conhecidos pelos modelos (os datasets de treino
+    do ml_service já cobrem o catálogo carregado): só rótulos de ingests futuros serão enviados.
+    """
+    ensure_label_generation(sess)
+    out = {}
+    for mission in missions or ML_MISSIONS:
+        top = sess.exec(
+            select(func.max(ExoplanetCatalog.label_generation)).where(ExoplanetCatalog.mission == mission)
+        ).one()
+        out[mission] = int(top or 0)
+        set_watermark(sess, mission, out[mission])
+    sess.commit()
+    return out
@@ -0,0 +1,129 @@
+from typing import Optional, Dict, Any, Tuple
+
+from fastapi import Query, HTTPException
+
+from models import ExoplanetCatalog
+
+# colunas numéricas com filtros min_/max_
+RANGE_FIELDS = [
+    "stellar_temperature", "stellar_radius", "planet_radius", "eq_temperature", "distance",
+    "surface_gravity", "orbital_period", "insol_flux", "depth", "final_confidence",
+]
+
+
+def build_numeric_filters(
+    model,
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]]
+):
+    """
+    Constrói clausulas .where() a partir de um dicionário de ranges numéricos.
+    Ignora campos que não existem no modelo.
+    """
+    clauses = []
+    for field, (min_v, max_v) in ranges.items():
+        if not hasattr(model, field):
+            continue
+        column = getattr(model, field)
+        if min_v is not None:
+            clauses.append(column >= min_v)
+        if max_v is not None:
+            clauses.append(column <= max_v)
+    return clauses
+
+
+class CatalogFilters:
+    """
+    Filtros do catálogo compartilhados pelas rotas (listagem, export, estatísticas).
+    Uso: `filters: CatalogFilters = Depends()`.
+    """
+
+    def __init__(
+        self,
+        # Filtros de igualdade
+        mission: Optional[str] = Query(None, description="kepler | k2 | tess"),
+        final_classification: Optional[str] = Query(None, description="planet | not_planet | candidate"),
+        object_id: Optional[str] = Query(None),
+
+        # Ranges numéricos (min_/max_)
+        min_stellar_temperature: Optional[float] = None,
+        max_stellar_temperature: Optional[float] = None,
+
+        min_stellar_radius: Optional[float] = None,
+        max_stellar_radius: Optional[float] = None,
+
+        min_planet_radius: Optional[float] = None,
+        max_planet_radius: Optional[float] = None,
+
+        min_eq_temperature: Optional[float] = None,
+        max_eq_temperature: Optional[float] = None,
+
+        min_distance: Optional[float] = None,
+        max_distance: Optional[float] = None,
+
+        min_surface_gravity: Optional[float] = None,
+        max_surface_gravity: Optional[float] = None,
+
+        min_orbital_period: Optional[float] = None,
+        max_orbital_period: Optional[float] = None,
+
+        min_insol_flux: Optional[float] = None,
+        max_insol_flux: Optional[float] = None,
+
+        min_depth: Optional[float] = None,
+        max_depth: Optional[float] = None,
+
+        min_final_confidence: Optional[float] = None,
+        max_final_confidence: Optional[float] = None,
+    ):
+        self.mission = mission.lower().strip() if mission else None
+        self.final_classification = None
+        if final_classification:
+            fc = final_classification.lower().strip()
+            if fc not in {"planet", "not_planet", "candidate"}:
+                raise HTTPException(400, detail="final_classification inválido. Use planet|not_planet|candidate.")
+            self.final_classification = fc
+        self.object_id = object_id or None
+        args = locals()
+        self.ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+            f: (args[f"min_{f}"], args[f"max_{f}"]) for f in RANGE_FIELDS
+        }
+
+    @classmethod
+    def of(cls, **values) -> "CatalogFilters":
+        """
+        Instância fora de uma rota (ex.: no ingest), sem os defaults Query(...).
+        """
+        base = {"mission": None, "final_classification": None, "object_id": None}
+        return cls(**{**base, **values})
+
+    def apply(self, stmt):
+        # Igualdade
+        if self.mission:
+            stmt = stmt.where(ExoplanetCatalog.mission == self.mission)
+        if self.final_classification:
+            stmt = stmt.where(ExoplanetCatalog.final_classification == self.final_classification)
+        if self.object_id:
+            stmt = stmt.where(ExoplanetCatalog.object_id == self.object_id)
+
+        # Ranges numéricos (só aplica os que existem no modelo)
+        for clause in build_numeric_filters(ExoplanetCatalog, self.ranges):
+            stmt = stmt.where(clause)
+        return stmt
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Forma normalizada (sem valores vazios) — usada em chaves de cache.
+        """
+        out: Dict[str, Any] = {
+            "mission": self.mission,
+            "final_classification": self.final_classification,
+            "object_id": self.object_id,
+        }
+        for f, (lo, hi) in self.ranges.items():
+            out[f"min_{f}"] = lo
+            out[f"max_{f}"] = hi
+        return {k: v for k, v in out.items() if v is not None}
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.as_dict()
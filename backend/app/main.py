@@ -4,6 +4,9 @@ from sqlmodel import SQLModel
 from db import engine
 from routers import catalog, missions
 from models import SQLModel
+from similar import SIMILAR
+from columnar import COLUMNAR
+from search import SEARCH
 
 app = FastAPI(title="ExoSeeker API", version="1.0.0")
 
@@ -18,6 +21,10 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     SQLModel.metadata.create_all(engine)  # cria tabela do catálogo
+    SIMILAR.build()  # índice de similaridade em memória (refeito quando a geração do catálogo muda)
+    SEARCH.build()  # índice de nomes para /api/catalog/search
+    if COLUMNAR.enabled:
+        COLUMNAR.build()  # listagem em memória (CATALOG_ENGINE=memory)
 
 app.include_router(catalog.router)
 app.include_router(missions.router)
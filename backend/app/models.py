@@ -1,8 +1,10 @@
 from typing import Optional, Dict, Any
-from sqlmodel import SQLModel, Field, Column, JSON
+from sqlmodel import SQLModel, Field, Column, JSON, UniqueConstraint
 
 class ExoplanetCatalog(SQLModel, table=True):
     __tablename__ = "exoplanet_catalog"
+    # chave natural usada pelo upsert em lote (INSERT ... ON CONFLICT)
+    __table_args__ = (UniqueConstraint("mission", "object_id", name="uq_catalog_mission_object"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
@@ -12,9 +14,14 @@ class ExoplanetCatalog(SQLModel, table=True):
 
     final_classification: Optional[str] = Field(default=None, index=True)  # planet|non_planet|candidate
     final_confidence: Optional[float] = 0.0
+    # versão dos modelos do ml_service que gerou o rótulo (None = rótulo veio do CSV ou ainda não classificado)
+    ml_version: Optional[str] = Field(default=None, index=True)
+    # geração do catálogo em que o rótulo do CSV apareceu ou mudou (realimentação do ml_service, ver feedback.py)
+    label_generation: Optional[int] = Field(default=None, index=True)
 
     longitude: Optional[float] = Field(default=None, index=True)  # ex.: RA/ecl. lon
     latitude: Optional[float] = Field(default=None, index=True)   # ex.: DEC/ecl. lat
+    sky_pixel: Optional[int] = Field(default=None, index=True)    # skypix.sky_pixel(longitude, latitude), gravado no ingest
 
     stellar_temperature: Optional[float] = Field(default=None, index=True)
     stellar_radius: Optional[float] = Field(default=None, index=True)
@@ -27,3 +34,54 @@ class ExoplanetCatalog(SQLModel, table=True):
     depth: Optional[float] = Field(default=None, index=True)
 
     extra: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+
+    # sha1 do conteúdo vindo do CSV (ver scripts/ingest_catalog.py): linha com o mesmo hash não é regravada
+    content_hash: Optional[str] = Field(default=None)
+
+
+# colunas de controle do ingest: ficam fora da API, dos exports e do motor colunar
+INTERNAL_COLUMNS = {"content_hash"}
+
+
+class CatalogMeta(SQLModel, table=True):
+    """
+    Chave/valor de controle do catálogo (ex.: 'generation', incrementada a cada ingest).
+    """
+    __tablename__ = "catalog_meta"
+
+    key: str = Field(primary_key=True)
+    value: int = 0
+
+
+class CatalogSummary(SQLModel, table=True):
+    """
+    Facetas + histogramas pré-calculados no fim do ingest, por escopo ('all' ou missão).
+    """
+    __tablename__ = "catalog_summary"
+
+    scope: str = Field(primary_key=True)
+    generation: int = 0
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+
+
+class IngestManifest(SQLModel, table=True):
+    """
+    Estado do último ingest de cada arquivo: assinatura (tamanho, mtime, sha256), checkpoint
+    (linhas já gravadas, para retomar uma execução interrompida) e contagens.
+    """
+    __tablename__ = "ingest_manifest"
+
+    path: str = Field(primary_key=True)
+    size: int = 0
+    mtime: float = 0.0
+    checksum: str = ""
+    completed: bool = False
+    rows_done: int = 0                        # linhas do arquivo já processadas e com commit
+    label_generation: Optional[int] = None    # geração usada pela execução (mantida ao retomar)
+    generation: Optional[int] = None          # geração do catálogo publicada ao terminar
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
@@ -0,0 +1,107 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, false
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import Session, select, func
+
+# (coluna, desc) — todas as chaves ordenam com NULLs por último; o id fecha o desempate
+SortKey = Tuple[Any, bool]
+
+
+def order_clauses(keys: Sequence[SortKey]) -> List[Any]:
+    return [(c.desc() if desc else c.asc()).nulls_last() for c, desc in keys]
+
+
+def order_signature(keys: Sequence[SortKey]) -> str:
+    return ",".join(f"{c.key}:{'d' if desc else 'a'}" for c, desc in keys)
+
+
+def encode_cursor(keys: Sequence[SortKey], row: Any) -> str:
+    """
+    Cursor opaco com os valores das chaves de ordenação da última linha da página.
+    """
+    payload = {"o": order_signature(keys), "v": [getattr(row, c.key) for c, _ in keys]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(keys: Sequence[SortKey], cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        sig = payload["o"]
+    except Exception:
+        raise HTTPException(400, detail="cursor inválido.")
+    if sig != order_signature(keys) or len(values) != len(keys):
+        raise HTTPException(400, detail="cursor não corresponde à ordenação pedida.")
+    return values
+
+
+def seek_clause(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    Predicado "depois do cursor" para ORDER BY com NULLS LAST em cada chave:
+    OR_i (k_0 = v_0 AND ... AND k_{i-1} = v_{i-1} AND k_i depois de v_i).
+    """
+    branches = []
+    equal_prefix = []
+    for (col, desc), v in zip(keys, values):
+        if v is None:
+            # já estamos na região de NULLs desta chave: nada vem depois dela nesta coluna
+            after = None
+            equal = col.is_(None)
+        else:
+            after = or_(col < v if desc else col > v, col.is_(None))
+            equal = col == v
+        if after is not None:
+            branches.append(and_(*equal_prefix, after))
+        equal_prefix.append(equal)
+    return or_(*branches) if branches else false()
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) <stmt> como construção SQL: compilada pelo dialeto da conexão,
+    com os parâmetros no formato do driver (psycopg2 e asyncpg).
+    """
+    inherit_cache = False
+
+    def __init__(self, stmt):
+        self.stmt = stmt
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+def estimate_count(sess: Session, stmt) -> Optional[int]:
+    """
+    Estimativa barata de linhas pelo planner do Postgres (EXPLAIN). None se o dialeto não suportar.
+    """
+    bind = sess.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    plan = sess.connection().execute(Explain(stmt)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(sess: Session, stmt, mode: str) -> Tuple[Optional[int], bool]:
+    """
+    Total para paginação: 'exact' (COUNT), 'estimate' (planner) ou 'none'.
+    Retorna (total, estimado?).
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        est = estimate_count(sess, stmt)
+        if est is not None:
+            return est, True
+    total = sess.exec(select(func.count()).select_from(stmt.subquery())).one()
+    return total, False
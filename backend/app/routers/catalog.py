@@ -1,155 +1,433 @@
 # backend/app/routers/catalog.py
+import orjson
 from typing import Optional, Dict, Any, List, Tuple
-from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi import APIRouter, Query, HTTPException, Depends, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import numpy as np
+from sqlalchemy import or_
 from sqlmodel import select, func, col
 from sqlmodel import Session
 
-from db import get_session
-from models import ExoplanetCatalog
-from schemas import CatalogItem, CatalogPage
+from cache import CACHE
+from db import get_session, get_db
+from models import INTERNAL_COLUMNS, ExoplanetCatalog
+from schemas import CatalogItem, ProjectedItem, ProjectedPage, SearchItem, SearchPage, SimilarItem, SimilarPage, SkyItem, SkyPage
+from filters import CatalogFilters
+from export import FORMATS, export_columns, stream_export
+from stats import NUMERIC_COLUMNS, catalog_stats
+from pagination import SortKey, order_clauses, encode_cursor, decode_cursor, seek_clause, count_rows
+from skypix import PixelRange, cone_pixel_ranges, box_pixel_ranges, angular_distance
+from columnar import COLUMNAR
+from similar import SIMILAR, SIMILAR_COLUMNS, SIMILAR_MAX_K, SimilarityIndex
+from search import SEARCH, SEARCH_MAX_LIMIT, normalize
 
 router = APIRouter(prefix="/api/catalog", tags=["catalog"])
 
+# colunas aceitas em order_by (JSON 'extra' não é ordenável)
+SORTABLE_COLUMNS = {c.name for c in ExoplanetCatalog.__table__.columns if c.name != "extra"} - INTERNAL_COLUMNS
 
-def build_numeric_filters(
-    model,
-    ranges: Dict[str, Tuple[Optional[float], Optional[float]]]
-):
+# projeção padrão: tudo menos 'extra' (linha original do CSV, às vezes com 100+ colunas)
+ALL_FIELDS = [c.name for c in ExoplanetCatalog.__table__.columns if c.name not in INTERNAL_COLUMNS]
+DEFAULT_FIELDS = [f for f in ALL_FIELDS if f != "extra"]
+
+FIELDS_QUERY = Query(
+    None,
+    description="colunas a retornar, separadas por vírgula (ex.: object_id,planet_radius); "
+                "'*' inclui 'extra'. O id sempre vem.",
+)
+
+
+def resolve_fields(fields: Optional[str]) -> List[str]:
     """
-    Constrói clausulas .where() a partir de um dicionário de ranges numéricos.
-    Ignora campos que não existem no modelo.
+    Lista de colunas da projeção (id primeiro, ordem da tabela).
     """
-    clauses = []
-    for field, (min_v, max_v) in ranges.items():
-        if not hasattr(model, field):
-            continue
-        column = getattr(model, field)
-        if min_v is not None:
-            clauses.append(column >= min_v)
-        if max_v is not None:
-            clauses.append(column <= max_v)
-    return clauses
+    if not fields:
+        return DEFAULT_FIELDS
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    if "*" in wanted:
+        return ALL_FIELDS
+    bad = wanted - set(ALL_FIELDS)
+    if bad:
+        raise HTTPException(400, detail=f"campo(s) inválido(s) em fields: {', '.join(sorted(bad))}")
+    return [f for f in ALL_FIELDS if f in wanted or f == "id"]
+
+
+def json_response(payload: Any) -> Response:
+    return Response(content=orjson.dumps(payload), media_type="application/json")
 
 
-@router.get("", response_model=CatalogPage)
-def list_catalog(
+# rotas com projeção devolvem bytes orjson prontos (sem validação pelo response_model);
+# o schema fica só na documentação OpenAPI
+PROJECTED_DESCRIPTION = "colunas conforme `fields` (padrão: todas menos 'extra'); o id sempre vem"
+
+
+@router.get("", response_class=ORJSONResponse,
+            responses={200: {"model": ProjectedPage, "description": PROJECTED_DESCRIPTION}})
+async def list_catalog(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
 
-    # Filtros de igualdade
-    mission: Optional[str] = Query(None, description="kepler | k2 | tess"),
-    final_classification: Optional[str] = Query(None, description="planet | not_planet | candidate"),
-    object_id: Optional[str] = Query(None),
+    filters: CatalogFilters = Depends(),
 
-    # Ranges numéricos (min_/max_)
-    min_stellar_temperature: Optional[float] = None,
-    max_stellar_temperature: Optional[float] = None,
+    # Ordenação simples
+    order_by: Optional[str] = Query(None, description="campo para ordenar, ex.: planet_radius"),
+    order_dir: Optional[str] = Query("desc", pattern="^(asc|desc)$", description="asc | desc"),
 
-    min_stellar_radius: Optional[float] = None,
-    max_stellar_radius: Optional[float] = None,
+    # Projeção
+    fields: Optional[str] = FIELDS_QUERY,
 
-    min_planet_radius: Optional[float] = None,
-    max_planet_radius: Optional[float] = None,
+    # Paginação por cursor (keyset) e total
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior; ignora 'page'"),
+    count: Optional[str] = Query(
+        None, pattern="^(exact|estimate|none)$",
+        description="exact | estimate | none (padrão: exact com 'page', none com 'cursor')",
+    ),
 
-    min_eq_temperature: Optional[float] = None,
-    max_eq_temperature: Optional[float] = None,
+    db=Depends(get_db),
+):
+    """
+    Lista do catálogo com filtros, paginação e ordenação.
 
-    min_distance: Optional[float] = None,
-    max_distance: Optional[float] = None,
+    Com `cursor`, a página é buscada por seek nas chaves de ordenação + id (sem OFFSET),
+    então o custo não cresce com a profundidade. Toda resposta traz `next_cursor`
+    quando há mais linhas.
 
-    min_surface_gravity: Optional[float] = None,
-    max_surface_gravity: Optional[float] = None,
+    `fields` restringe o SELECT às colunas pedidas ('extra' só quando pedido) e a resposta
+    é serializada com orjson direto das tuplas, sem pydantic por linha.
+    """
+    out_fields = resolve_fields(fields)
 
-    min_orbital_period: Optional[float] = None,
-    max_orbital_period: Optional[float] = None,
+    # Cache de resultados: chave = parâmetros normalizados + geração do catálogo
+    params = {
+        **filters.as_dict(), "page": page, "page_size": page_size,
+        "order_by": order_by, "order_dir": order_dir, "cursor": cursor, "count": count,
+        "fields": ",".join(out_fields),
+    }
+    generation = await db.run_sync(CACHE.generation)
+    cache_key = CACHE.make_key("list", params, generation)
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
 
-    min_insol_flux: Optional[float] = None,
-    max_insol_flux: Optional[float] = None,
+    # Ordenação (o id entra como desempate para o cursor ser estável)
+    if order_by and order_by in SORTABLE_COLUMNS:
+        desc = order_dir != "asc"
+        keys: List[SortKey] = [(getattr(ExoplanetCatalog, order_by), desc), (ExoplanetCatalog.id, desc)]
+    else:
+        # Default: mais confiantes primeiro, depois maior raio planetário
+        keys = [
+            (ExoplanetCatalog.final_confidence, True),
+            (ExoplanetCatalog.planet_radius, True),
+            (ExoplanetCatalog.id, True),
+        ]
 
-    min_depth: Optional[float] = None,
-    max_depth: Optional[float] = None,
+    # SELECT só das colunas projetadas + chaves de ordenação (necessárias para o next_cursor)
+    select_names = out_fields + [c.key for c, _ in keys if c.key not in out_fields]
+    count_mode = count or ("none" if cursor else "exact")
 
-    min_final_confidence: Optional[float] = None,
-    max_final_confidence: Optional[float] = None,
+    # Motor em memória (CATALOG_ENGINE=memory): mesma resposta sem ir ao banco, quando a
+    # geração carregada é a atual e a ordenação/projeção são suportadas
+    snap = COLUMNAR.current(generation)
+    name_keys = [(c.key, desc) for c, desc in keys]
+    if snap is not None and snap.supports(name_keys, select_names):
+        rows, total, estimated = snap.page(
+            filters, name_keys, select_names,
+            offset=0 if cursor else (page - 1) * page_size,
+            limit=page_size + 1,
+            cursor_values=decode_cursor(keys, cursor) if cursor else None,
+            count=count_mode,
+        )
+    else:
+        stmt = filters.apply(select(*[getattr(ExoplanetCatalog, n) for n in select_names]))
+
+        # Total (para paginação)
+        total, estimated = await db.run_sync(count_rows, stmt, count_mode)
+
+        stmt = stmt.order_by(*order_clauses(keys))
+
+        # Paginação: seek pelo cursor ou OFFSET; busca uma linha a mais para saber se há próxima página
+        if cursor:
+            stmt = stmt.where(seek_clause(keys, decode_cursor(keys, cursor)))
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        stmt = stmt.limit(page_size + 1)
+
+        rows = await db.all(stmt)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    n = len(out_fields)
+    body = orjson.dumps({
+        "items": [dict(zip(out_fields, r[:n])) for r in rows],
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "total_estimated": estimated,
+        "next_cursor": encode_cursor(keys, rows[-1]) if has_more and rows else None,
+    })
+    CACHE.set(cache_key, body)
+    return Response(content=body, media_type="application/json")
 
-    # Ordenação simples
-    order_by: Optional[str] = Query(None, description="campo para ordenar, ex.: planet_radius"),
-    order_dir: Optional[str] = Query("desc", pattern="^(asc|desc)$", description="asc | desc"),
 
+@router.get("/cache/stats")
+def cache_stats():
+    """
+    Contadores do cache de listagens (hits, misses, evictions, ...) para dimensionamento,
+    mais o estado do motor colunar em memória.
+    """
+    return {**CACHE.stats(), "columnar": COLUMNAR.stats()}
+
+
+@router.get("/stats")
+def stats(
+    filters: CatalogFilters = Depends(),
+    column: List[str] = Query(["planet_radius"], description=f"colunas numéricas: {', '.join(NUMERIC_COLUMNS)}"),
+    bins: int = Query(30, ge=1, le=200),
+    scale: str = Query("linear", pattern="^(linear|log)$", description="linear | log"),
+    range_min: Optional[float] = Query(None, description="início do histograma (padrão: mínimo dos dados)"),
+    range_max: Optional[float] = Query(None, description="fim do histograma (padrão: máximo dos dados)"),
     sess: Session = Depends(get_session),
 ):
     """
-    Lista do catálogo com filtros, paginação e ordenação.
+    Contagens por missão/classificação e histogramas das colunas pedidas, com os mesmos filtros da listagem.
+    Sem filtros (ou só `mission`) e com bins/intervalo padrão, vem do resumo pré-calculado no ingest.
     """
-    stmt = select(ExoplanetCatalog)
+    bad = [c for c in column if c not in NUMERIC_COLUMNS]
+    if bad:
+        raise HTTPException(400, detail=f"coluna(s) inválida(s): {', '.join(bad)}")
+    if range_min is not None and range_max is not None and range_max < range_min:
+        raise HTTPException(400, detail="range_max deve ser >= range_min.")
 
-    # Igualdade
+    generation = CACHE.generation(sess)
+    params = {**filters.as_dict(), "column": column, "bins": bins, "scale": scale,
+              "range_min": range_min, "range_max": range_max}
+    cache_key = CACHE.make_key("stats", params, generation)
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    payload = catalog_stats(sess, filters, column, bins, scale, range_min, range_max, generation)
+    body = orjson.dumps(payload)
+    CACHE.set(cache_key, body)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/export")
+def export_catalog(
+    filters: CatalogFilters = Depends(),
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet|arrow)$", description="csv | ndjson | parquet | arrow"),
+    include_extra: bool = Query(False, description="inclui a linha original do CSV (coluna extra, como JSON)"),
+    order_by: Optional[str] = Query(None, description="campo para ordenar (padrão: id)"),
+    order_dir: Optional[str] = Query("asc", pattern="^(asc|desc)$"),
+):
+    """
+    Exporta todo o resultado dos filtros em streaming, com memória constante.
+    Parquet/Arrow são escritos em record batches de EXPORT_CHUNK linhas.
+    """
+    if format in {"parquet", "arrow"}:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(400, detail=f"format={format} requer pyarrow instalado na API.")
+    columns = export_columns(include_extra)
+    stmt = filters.apply(select(*columns))
+    key = getattr(ExoplanetCatalog, order_by) if order_by in SORTABLE_COLUMNS else ExoplanetCatalog.id
+    stmt = stmt.order_by(key.desc() if order_dir == "desc" else key.asc(), ExoplanetCatalog.id.asc())
+
+    media_type, ext = FORMATS[format]
+    return StreamingResponse(
+        stream_export(stmt, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="exoplanet_catalog.{ext}"'},
+    )
+
+
+def _sky_candidates(sess: Session, ranges: List[PixelRange], mission: Optional[str], final_classification: Optional[str]):
+    """
+    Poda por pixel (intervalos de sky_pixel, via índice): devolve só (id, longitude, latitude).
+    """
+    stmt = select(ExoplanetCatalog.id, ExoplanetCatalog.longitude, ExoplanetCatalog.latitude).where(
+        or_(*[ExoplanetCatalog.sky_pixel.between(a, b) for a, b in ranges])
+    )
     if mission:
         stmt = stmt.where(ExoplanetCatalog.mission == mission.lower().strip())
     if final_classification:
-        fc = final_classification.lower().strip()
-        if fc not in {"planet", "not_planet", "candidate"}:
-            raise HTTPException(400, detail="final_classification inválido. Use planet|not_planet|candidate.")
-        stmt = stmt.where(ExoplanetCatalog.final_classification == fc)
-    if object_id:
-        stmt = stmt.where(ExoplanetCatalog.object_id == object_id)
-
-    # Ranges numéricos (só aplica os que existem no modelo)
-    ranges = {
-        "stellar_temperature": (min_stellar_temperature, max_stellar_temperature),
-        "stellar_radius": (min_stellar_radius, max_stellar_radius),
-        "planet_radius": (min_planet_radius, max_planet_radius),
-        "eq_temperature": (min_eq_temperature, max_eq_temperature),
-        "distance": (min_distance, max_distance),
-        "surface_gravity": (min_surface_gravity, max_surface_gravity),
-        "orbital_period": (min_orbital_period, max_orbital_period),
-        "insol_flux": (min_insol_flux, max_insol_flux),
-        "depth": (min_depth, max_depth),
-        "final_confidence": (min_final_confidence, max_final_confidence),
-    }
-    for clause in build_numeric_filters(ExoplanetCatalog, ranges):
-        stmt = stmt.where(clause)
-
-    # Total (para paginação)
-    total = sess.exec(
-        select(func.count()).select_from(stmt.subquery())
-    ).one()
-
-    # Ordenação
-    if order_by and hasattr(ExoplanetCatalog, order_by):
-        order_col = getattr(ExoplanetCatalog, order_by)
-        stmt = stmt.order_by(order_col.asc() if order_dir == "asc" else order_col.desc())
-    else:
-        # Default: mais confiantes primeiro, depois maior raio planetário
-        stmt = stmt.order_by(
-            ExoplanetCatalog.final_confidence.desc().nulls_last(),
-            ExoplanetCatalog.planet_radius.desc().nulls_last(),
-        )
+        stmt = stmt.where(ExoplanetCatalog.final_classification == final_classification.lower().strip())
+    rows = sess.exec(stmt).all()
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    lon = np.array([r[1] for r in rows], dtype=np.float64)
+    lat = np.array([r[2] for r in rows], dtype=np.float64)
+    return ids, lon, lat
 
-    # Paginação
-    offset = (page - 1) * page_size
-    stmt = stmt.offset(offset).limit(page_size)
 
-    rows = sess.exec(stmt).all()
+def _load_by_ids(sess: Session, ids: List[int]) -> Dict[int, ExoplanetCatalog]:
+    if not ids:
+        return {}
+    rows = sess.exec(select(ExoplanetCatalog).where(col(ExoplanetCatalog.id).in_(ids))).all()
+    return {r.id: r for r in rows}
+
 
-    items: List[CatalogItem] = [
-        CatalogItem.model_validate(r) for r in rows  # Pydantic v2 + SQLModel -> OK
+@router.get("/cone", response_model=SkyPage)
+def cone_search(
+    ra: float = Query(..., ge=0, lt=360, description="centro, RA em graus"),
+    dec: float = Query(..., ge=-90, le=90, description="centro, Dec em graus"),
+    radius: float = Query(..., gt=0, le=30, description="raio em graus"),
+    mission: Optional[str] = Query(None),
+    final_classification: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    sess: Session = Depends(get_session),
+):
+    """
+    Objetos a até `radius` graus de (ra, dec), do mais próximo ao mais distante.
+    Candidatos vêm dos intervalos de sky_pixel que cobrem o cone; o corte exato é pela distância angular.
+    """
+    ids, lon, lat = _sky_candidates(sess, cone_pixel_ranges(ra, dec, radius), mission, final_classification)
+    dist = angular_distance(ra, dec, lon, lat)
+    inside = np.flatnonzero(dist <= radius)
+    order = inside[np.argsort(dist[inside], kind="stable")][:limit]
+    by_id = _load_by_ids(sess, ids[order].tolist())
+    items = [
+        SkyItem.model_validate({**CatalogItem.model_validate(by_id[int(i)]).model_dump(), "distance_deg": float(d)})
+        for i, d in zip(ids[order], dist[order]) if int(i) in by_id
     ]
+    return SkyPage(items=items, count=int(inside.size), truncated=bool(inside.size > limit))
+
+
+@router.get("/box", response_model=SkyPage)
+def box_search(
+    ra_min: float = Query(..., ge=0, le=360),
+    ra_max: float = Query(..., ge=0, le=360, description="se ra_max < ra_min a caixa cruza RA=0"),
+    dec_min: float = Query(..., ge=-90, le=90),
+    dec_max: float = Query(..., ge=-90, le=90),
+    mission: Optional[str] = Query(None),
+    final_classification: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    sess: Session = Depends(get_session),
+):
+    """
+    Objetos dentro da caixa RA/Dec (ordenados por id).
+    """
+    if dec_max < dec_min:
+        raise HTTPException(400, detail="dec_max deve ser >= dec_min.")
+    ids, lon, lat = _sky_candidates(sess, box_pixel_ranges(ra_min, ra_max, dec_min, dec_max), mission, final_classification)
+    in_ra = (lon >= ra_min) & (lon <= ra_max) if ra_min <= ra_max else (lon >= ra_min) | (lon <= ra_max)
+    inside = np.flatnonzero(in_ra & (lat >= dec_min) & (lat <= dec_max))
+    order = inside[np.argsort(ids[inside], kind="stable")][:limit]
+    by_id = _load_by_ids(sess, ids[order].tolist())
+    items = [SkyItem.model_validate(CatalogItem.model_validate(by_id[int(i)]).model_dump()) for i in ids[order] if int(i) in by_id]
+    return SkyPage(items=items, count=int(inside.size), truncated=bool(inside.size > limit))
+
+
+def _similar_columns(columns: Optional[str]) -> List[str]:
+    if not columns:
+        return SIMILAR_COLUMNS
+    wanted = [c.strip() for c in columns.split(",") if c.strip()]
+    bad = [c for c in wanted if c not in SIMILAR_COLUMNS]
+    if bad:
+        raise HTTPException(400, detail=f"coluna(s) inválida(s): {', '.join(bad)} (use {', '.join(SIMILAR_COLUMNS)})")
+    return wanted
+
 
-    return CatalogPage(
-        page=page,
-        page_size=page_size,
-        total=total,
-        items=items,
+def _similar_page(
+    sess: Session,
+    index: SimilarityIndex,
+    point: Dict[str, float],
+    k: int,
+    exclude_id: Optional[int],
+    mission: Optional[str],
+    final_classification: Optional[str],
+) -> SimilarPage:
+    mask, hits = index.query(
+        point, k, exclude_id,
+        mission.lower().strip() if mission else None,
+        final_classification.lower().strip() if final_classification else None,
     )
+    by_id = _load_by_ids(sess, [i for i, _ in hits])
+    items = [
+        SimilarItem.model_validate({**CatalogItem.model_validate(by_id[i]).model_dump(), "distance": d})
+        for i, d in hits if i in by_id
+    ]
+    return SimilarPage(items=items, columns=list(mask), count=len(items))
+
+
+@router.get("/similar", response_model=SimilarPage)
+def similar_to_vector(
+    planet_radius: Optional[float] = Query(None),
+    eq_temperature: Optional[float] = Query(None),
+    insol_flux: Optional[float] = Query(None),
+    orbital_period: Optional[float] = Query(None),
+    stellar_temperature: Optional[float] = Query(None),
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K),
+    mission: Optional[str] = Query(None),
+    final_classification: Optional[str] = Query(None),
+    sess: Session = Depends(get_session),
+):
+    """
+    Objetos mais próximos de um vetor livre de parâmetros; só as colunas informadas entram na distância.
+    """
+    values = {
+        "planet_radius": planet_radius, "eq_temperature": eq_temperature, "insol_flux": insol_flux,
+        "orbital_period": orbital_period, "stellar_temperature": stellar_temperature,
+    }
+    index = SIMILAR.current(CACHE.generation(sess))
+    point = index.standardize({c: v for c, v in values.items() if v is not None})
+    if not point:
+        raise HTTPException(400, detail=f"informe ao menos uma coluna válida: {', '.join(SIMILAR_COLUMNS)} "
+                                        "(raio, fluxo e período precisam ser > 0)")
+    return _similar_page(sess, index, point, k, None, mission, final_classification)
+
+
+@router.get("/search", response_model=SearchPage)
+def search_catalog(
+    q: str = Query(..., min_length=1, description="nome ou trecho: Kepler-22, KOI-701, TOI-700, EPIC 2011..."),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT),
+    mission: Optional[str] = Query(None),
+    sess: Session = Depends(get_session),
+):
+    """
+    Autocomplete por object_id e alt_designations: prefixo da designação (ou de uma de suas
+    palavras) e, completando o limite, nomes aproximados por trigramas. Índice em memória,
+    sem consulta ao banco além da geração do catálogo.
+    """
+    index = SEARCH.current(CACHE.generation(sess))
+    hits = index.query(q, limit, mission.lower().strip() if mission else None)
+    return SearchPage(items=[SearchItem(**h) for h in hits], query=normalize(q), count=len(hits))
 
 
-@router.get("/{id}", response_model=CatalogItem)
-def get_catalog_item(
+@router.get("/{id}/similar", response_model=SimilarPage)
+def similar_to_item(
     id: int,
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K),
+    columns: Optional[str] = Query(None, description=f"subconjunto de {', '.join(SIMILAR_COLUMNS)}, separado por vírgula"),
+    mission: Optional[str] = Query(None),
+    final_classification: Optional[str] = Query(None),
     sess: Session = Depends(get_session),
 ):
+    """
+    Os k objetos mais parecidos com o registro `id` em parâmetros físicos (KD-tree em memória
+    sobre as colunas padronizadas; nulas do registro ficam fora da distância).
+    """
     row = sess.get(ExoplanetCatalog, id)
-    if not row:
+    if row is None:
+        raise HTTPException(404, detail="Registro não encontrado.")
+    index = SIMILAR.current(CACHE.generation(sess))
+    point = index.standardize({c: getattr(row, c) for c in _similar_columns(columns) if getattr(row, c) is not None})
+    if not point:
+        raise HTTPException(422, detail="o registro não tem nenhuma das colunas de similaridade preenchida.")
+    return _similar_page(sess, index, point, k, id, mission, final_classification)
+
+
+@router.get("/{id}", response_class=ORJSONResponse,
+            responses={200: {"model": ProjectedItem, "description": PROJECTED_DESCRIPTION}})
+async def get_catalog_item(
+    id: int,
+    fields: Optional[str] = FIELDS_QUERY,
+    db=Depends(get_db),
+):
+    out_fields = resolve_fields(fields)
+    rows = await db.all(
+        select(*[getattr(ExoplanetCatalog, n) for n in out_fields]).where(ExoplanetCatalog.id == id)
+    )
+    if not rows:
         raise HTTPException(404, detail="Registro não encontrado.")
-    return CatalogItem.model_validate(row)
+    return json_response(dict(zip(out_fields, rows[0])))
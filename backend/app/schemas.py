@@ -8,8 +8,10 @@ class CatalogItem(BaseModel):
     alt_designations: Optional[str] = None
     final_classification: Optional[str] = None
     final_confidence: Optional[float] = None
+    ml_version: Optional[str] = None
     longitude: Optional[float] = None
     latitude: Optional[float] = None
+    sky_pixel: Optional[int] = None
     stellar_temperature: Optional[float] = None
     stellar_radius: Optional[float] = None
     planet_radius: Optional[float] = None
@@ -28,4 +30,52 @@ class CatalogPage(BaseModel):
     items: List[CatalogItem]
     page: int
     page_size: int
-    total: int
+    total: Optional[int] = None          # None quando count=none
+    total_estimated: bool = False        # True quando veio do planner (count=estimate)
+    next_cursor: Optional[str] = None    # passe em ?cursor= para a próxima página
+
+
+class ProjectedItem(CatalogItem):
+    # listagem/detalhe com ?fields=: só o id é garantido, as demais colunas vêm conforme a projeção
+    mission: Optional[str] = None
+    object_id: Optional[str] = None
+
+
+class ProjectedPage(CatalogPage):
+    items: List[ProjectedItem]
+
+
+class SkyItem(CatalogItem):
+    distance_deg: Optional[float] = None  # distância angular ao centro do cone
+
+
+class SkyPage(BaseModel):
+    items: List[SkyItem]
+    count: int
+    truncated: bool  # True quando havia mais de `limit` objetos na região
+
+
+class SimilarItem(CatalogItem):
+    distance: float  # distância euclidiana no espaço padronizado (0 = idêntico nas colunas usadas; menor = mais parecido)
+
+
+class SimilarPage(BaseModel):
+    items: List[SimilarItem]
+    columns: List[str]  # colunas que entraram na distância (as não nulas da consulta)
+    count: int
+
+
+class SearchItem(BaseModel):
+    id: int
+    mission: str
+    object_id: str
+    alt_designations: Optional[str] = None
+    final_classification: Optional[str] = None
+    matched: str   # designação que casou com a busca
+    score: float   # 1 = nome exato, 0.9 = prefixo, abaixo de 0.8 = aproximado (trigramas)
+
+
+class SearchPage(BaseModel):
+    items: List[SearchItem]
+    query: str  # texto normalizado usado no índice
+    count: int
@@ -1,21 +1,95 @@
 import os
 import sys
-import csv
-from typing import Any, Dict, Optional
+import time
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from contextlib import contextmanager
 
+import httpx
+import numpy as np
+import orjson
+import pandas as pd
+
 from sqlmodel import Session, select
+from sqlalchemy import case, delete, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from pydantic import BaseModel
 
 
 try:
     from db import engine  # type: ignore
-    from models import ExoplanetCatalog  # type: ignore
+    from models import ExoplanetCatalog, IngestManifest  # type: ignore
+    from skypix import sky_pixel, sky_pixels  # type: ignore
+    from cache import bump_generation  # type: ignore
+    from stats import build_summaries  # type: ignore
+    from classify import classify_catalog, ensure_ml_version, ClassifyError  # type: ignore
+    from feedback import ensure_label_generation, next_label_generation  # type: ignore
+    from search import format_designations  # type: ignore
 except Exception as e:
     print(f"[ingest] ERRO ao importar app: {e}", file=sys.stderr)
     raise
 
 CATALOG_CSV = os.getenv("CATALOG_CSV", "/data/catalog_preclassified.csv")
+# auto = lote (INSERT ... ON CONFLICT) no Postgres, linha a linha nos demais (ex.: SQLite)
+INGEST_MODE = os.getenv("INGEST_MODE", "auto").lower()  # auto | bulk | row
+# 21 colunas por linha -> 2000 linhas fica abaixo do limite de 65535 parâmetros do Postgres
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "2000"))
+# >1 converte os chunks do CSV em paralelo (pool de processos)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+# 1 = depois do upsert, classifica no ml_service as linhas sem rótulo (ver classify.py)
+INGEST_CLASSIFY = os.getenv("INGEST_CLASSIFY", "0").lower() in {"1", "true", "on", "yes"}
+# 1 = reprocessa o arquivo mesmo com a assinatura igual à do manifesto
+INGEST_FORCE = os.getenv("INGEST_FORCE", "0").lower() in {"1", "true", "on", "yes"}
+# 1 = remove do catálogo as linhas das missões do arquivo que não aparecem mais nele
+INGEST_DELETE = os.getenv("INGEST_DELETE", "0").lower() in {"1", "true", "on", "yes"}
+
+MISSIONS = {"kepler", "k2", "tess"}
+
+# coluna do modelo -> colunas do CSV, em ordem de preferência (tenta ambas as convenções)
+FLOAT_SOURCES: Dict[str, List[str]] = {
+    "longitude": ["ra", "RA"],
+    "latitude": ["dec", "DEC"],
+    "stellar_temperature": ["stellar_temperature", "koi_steff"],
+    "stellar_radius": ["stellar_radius", "koi_srad"],
+    "planet_radius": ["planet_radius", "koi_prad"],
+    "eq_temperature": ["eq_temperature", "koi_teq"],
+    "distance": ["distance", "koi_dist", "dist"],
+    "surface_gravity": ["surface_gravity", "koi_slogg"],
+    "orbital_period": ["orbital_period", "koi_period"],
+    "insol_flux": ["insol_flux", "koi_insol"],
+    "depth": ["depth", "koi_depth"],
+    "final_confidence": ["final_confidence", "koi_score"],
+}
+CLASSIFICATION_SOURCES = ["final_classification", "classification", "koi_disposition", "disposition", "label"]
+OBJECT_ID_CANDIDATES = ["object_id", "id", "kepid", "kic", "epic", "tic", "loc_rowid", "rowid", "pl_name"]
+
+# Mapeamentos comuns em Kepler (CONFIRMED / FALSE POSITIVE / CANDIDATE)
+CLASSIFICATION_MAP = {
+    "confirmed": "planet",
+    "planet": "planet",
+    "false positive": "not_planet",
+    "not_planet": "not_planet",
+    "non_planet": "not_planet",
+    "candidate": "candidate",
+    "cand": "candidate",
+    "candidato": "candidate",
+}
+
+# colunas gravadas pelo ingest (todas exceto o id)
+UPSERT_COLUMNS = [
+    "mission", "object_id", "alt_designations",
+    "longitude", "latitude", "sky_pixel",
+    "stellar_temperature", "stellar_radius", "planet_radius", "eq_temperature",
+    "distance", "surface_gravity", "orbital_period", "insol_flux", "depth",
+    "final_classification", "final_confidence", "ml_version",
+    "extra", "label_generation", "content_hash",
+]
+# conteúdo derivado do CSV que entra no content_hash (o rótulo do ml_service e as gerações não)
+HASH_COLUMNS = [c for c in UPSERT_COLUMNS if c not in {"ml_version", "label_generation", "content_hash"}]
+
+Key = Tuple[str, str]  # (mission, object_id)
 
 
 class RowMap(BaseModel):
@@ -25,6 +99,7 @@ class RowMap(BaseModel):
     """
     mission: str
     object_id: str
+    alt_designations: Optional[str] = None
     ra: Optional[float] = None
     dec: Optional[float] = None
 
@@ -67,10 +142,14 @@ def guess_mission(row: Dict[str, Any]) -> str:
     Tenta inferir a missão a partir de campos comuns; se não houver, usa 'kepler' como default.
     """
     mission = (row.get("mission") or row.get("Mission") or "").strip().lower()
-    if mission in {"kepler", "k2", "tess"}:
+    if mission in MISSIONS:
         return mission
+    return mission_from_header(row.keys())
+
+
+def mission_from_header(header) -> str:
     # Heurísticas simples (pelo nome de colunas):
-    headers = {h.lower() for h in row.keys()}
+    headers = {h.lower() for h in header}
     if any(h.startswith("koi_") or h == "kepid" for h in headers):
         return "kepler"
     if "epic" in headers:
@@ -84,10 +163,7 @@ def guess_object_id(row: Dict[str, Any]) -> str:
     """
     Captura um identificador único da linha.
     """
-    candidates = [
-        "object_id", "id", "kepid", "kic", "epic", "tic", "loc_rowid", "rowid", "pl_name"
-    ]
-    for key in candidates:
+    for key in OBJECT_ID_CANDIDATES:
         if key in row and str(row[key]).strip():
             return str(row[key]).strip()
         # também tenta variações de caixa
@@ -95,7 +171,7 @@ def guess_object_id(row: Dict[str, Any]) -> str:
             if k.lower() == key and str(row[k]).strip():
                 return str(row[k]).strip()
     # fallback: hash do conteúdo (evita duplicidade inconsistente)
-    return str(abs(hash(tuple(sorted(row.items())))))
+    return _stable_row_hash(row)
 
 
 def map_classification(row: Dict[str, Any]) -> Optional[str]:
@@ -103,100 +179,381 @@ def map_classification(row: Dict[str, Any]) -> Optional[str]:
     Normaliza rótulos para 'planet' | 'not_planet' | 'candidate'
     a partir de colunas típicas (koi_disposition, disposition, final_classification, etc.)
     """
-    raw = (
-        row.get("final_classification")
-        or row.get("classification")
-        or row.get("koi_disposition")
-        or row.get("disposition")
-        or row.get("label")
-        or ""
-    )
+    raw = next((row.get(c) for c in CLASSIFICATION_SOURCES if row.get(c)), "")
     s = str(raw).strip().lower()
-
-    # Mapeamentos comuns em Kepler (CONFIRMED / FALSE POSITIVE / CANDIDATE)
-    mapping = {
-        "confirmed": "planet",
-        "planet": "planet",
-        "false positive": "not_planet",
-        "not_planet": "not_planet",
-        "non_planet": "not_planet",
-        "candidate": "candidate",
-        "cand": "candidate",
-        "candidato": "candidate",
-    }
-    return mapping.get(s) or (s if s in {"planet", "not_planet", "candidate"} else None)
+    return CLASSIFICATION_MAP.get(s)
 
 
 def row_to_model(row: Dict[str, Any]) -> RowMap:
     # Campos “astronômicos” (tenta ambas as convenções)
+    def pick(field: str) -> Optional[float]:
+        return _to_float(next((row.get(c) for c in FLOAT_SOURCES[field] if row.get(c)), None))
+
+    object_id = guess_object_id(row)
     rm = RowMap(
         mission=guess_mission(row),
-        object_id=guess_object_id(row),
-        ra=_to_float(row.get("ra") or row.get("RA")),
-        dec=_to_float(row.get("dec") or row.get("DEC")),
-
-        stellar_temperature=_to_float(row.get("stellar_temperature") or row.get("koi_steff")),
-        stellar_radius=_to_float(row.get("stellar_radius") or row.get("koi_srad")),
-        planet_radius=_to_float(row.get("planet_radius") or row.get("koi_prad")),
-        eq_temperature=_to_float(row.get("eq_temperature") or row.get("koi_teq")),
-        distance=_to_float(row.get("distance") or row.get("koi_dist") or row.get("dist")),
-        surface_gravity=_to_float(row.get("surface_gravity") or row.get("koi_slogg")),
-        orbital_period=_to_float(row.get("orbital_period") or row.get("koi_period")),
-        insol_flux=_to_float(row.get("insol_flux") or row.get("koi_insol")),
-        depth=_to_float(row.get("depth") or row.get("koi_depth")),
+        object_id=object_id,
+        alt_designations=format_designations(row, object_id),
+        ra=pick("longitude"),
+        dec=pick("latitude"),
+
+        stellar_temperature=pick("stellar_temperature"),
+        stellar_radius=pick("stellar_radius"),
+        planet_radius=pick("planet_radius"),
+        eq_temperature=pick("eq_temperature"),
+        distance=pick("distance"),
+        surface_gravity=pick("surface_gravity"),
+        orbital_period=pick("orbital_period"),
+        insol_flux=pick("insol_flux"),
+        depth=pick("depth"),
 
         final_classification=map_classification(row),
-        final_confidence=_to_float(row.get("final_confidence") or row.get("koi_score")),
+        final_confidence=pick("final_confidence"),
         extra=row,  # guarda linha original para auditoria
     )
     return rm
 
 
+# ---------------------------------------------------------------------------
+# Caminho vetorizado: o mapeamento de colunas é resolvido uma vez por arquivo
+# (pelo cabeçalho) e cada chunk é convertido de uma vez com pandas/numpy.
+# ---------------------------------------------------------------------------
+
+class ColumnPlan(BaseModel):
+    """
+    Mapeamento CSV -> ExoplanetCatalog resolvido a partir do cabeçalho.
+    """
+    mission_cols: List[str]
+    default_mission: str
+    object_id_cols: List[str]
+    float_cols: Dict[str, List[str]]
+    classification_cols: List[str]
+
+
+def plan_columns(header: List[str]) -> ColumnPlan:
+    present = set(header)
+    object_id_cols: List[str] = []
+    for key in OBJECT_ID_CANDIDATES:
+        # mesma ordem de guess_object_id: nome exato e depois variações de caixa
+        for h in ([key] if key in present else []) + [h for h in header if h.lower() == key and h != key]:
+            if h not in object_id_cols:
+                object_id_cols.append(h)
+    return ColumnPlan(
+        mission_cols=[c for c in ("mission", "Mission") if c in present],
+        default_mission=mission_from_header(header),
+        object_id_cols=object_id_cols,
+        float_cols={f: [c for c in cols if c in present] for f, cols in FLOAT_SOURCES.items()},
+        classification_cols=[c for c in CLASSIFICATION_SOURCES if c in present],
+    )
+
+
+def _coalesce(df: pd.DataFrame, cols: List[str]) -> pd.Series:
+    """
+    Primeiro valor não vazio entre as colunas (equivalente vetorizado de `a or b or c`).
+    """
+    out = pd.Series("", index=df.index, dtype=object)
+    for c in reversed(cols):
+        v = df[c].str.strip()
+        out = v.where(v != "", out)
+    return out
+
+
+def _stable_row_hash(row: Dict[str, Any]) -> str:
+    # hash() do Python muda a cada processo; sha1 mantém o id igual entre execuções e workers
+    digest = hashlib.sha1(repr(tuple(sorted(row.items()))).encode("utf-8")).hexdigest()
+    return str(int(digest[:15], 16))
+
+
+def content_hash(rec: Dict[str, Any]) -> str:
+    """
+    sha1 das colunas de HASH_COLUMNS do registro (chaves ordenadas, 'extra' incluída).
+    """
+    payload = orjson.dumps({c: rec.get(c) for c in HASH_COLUMNS}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(payload).hexdigest()
+
+
+def chunk_keys(chunk: pd.DataFrame, plan: ColumnPlan) -> Tuple[pd.Series, pd.Series]:
+    """
+    (mission, object_id) de cada linha do chunk; sem id no CSV, o id é o hash da linha.
+    """
+    mission = _coalesce(chunk, plan.mission_cols).str.lower()
+    mission = mission.where(mission.isin(MISSIONS), plan.default_mission)
+    object_id = _coalesce(chunk, plan.object_id_cols)
+    missing = (object_id == "").to_numpy()
+    if missing.any():
+        object_id[missing] = [_stable_row_hash(r) for r in chunk[missing].to_dict("records")]
+    return mission, object_id
+
+
+def convert_chunk(chunk: pd.DataFrame, plan: ColumnPlan) -> List[Dict[str, Any]]:
+    """
+    Converte um chunk do CSV (todas as colunas como str) em registros prontos para o upsert.
+    """
+    raw_rows = chunk.to_dict("records")
+    out = pd.DataFrame(index=chunk.index)
+    out["mission"], out["object_id"] = chunk_keys(chunk, plan)
+
+    for field, cols in plan.float_cols.items():
+        out[field] = pd.to_numeric(_coalesce(chunk, cols), errors="coerce")
+
+    out["final_classification"] = _coalesce(chunk, plan.classification_cols).str.lower().map(CLASSIFICATION_MAP)
+    out["sky_pixel"] = pd.array(sky_pixels(out["longitude"], out["latitude"]), dtype="Int64")
+    out["ml_version"] = None  # o rótulo do CSV substitui o do ml_service
+
+    # NaN -> None para o banco
+    out = out.astype(object).where(out.notna(), None)
+    records = out.to_dict("records")
+    for rec, raw in zip(records, raw_rows):
+        rec["alt_designations"] = format_designations(raw, rec["object_id"])
+        rec["extra"] = raw  # guarda linha original para auditoria
+        rec["content_hash"] = content_hash(rec)
+    return records
+
+
+def iter_records(path: str, workers: int = INGEST_WORKERS, skip: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lê o CSV em chunks de INGEST_BATCH linhas e devolve lotes de registros convertidos.
+    Com workers > 1, os chunks são convertidos num pool de processos (no máximo 2 por worker em voo).
+    `skip` pula as primeiras linhas de dados (retomada a partir do checkpoint do manifesto).
+    """
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=INGEST_BATCH, encoding="utf-8",
+                         skiprows=range(1, skip + 1) if skip else None)
+    plan: Optional[ColumnPlan] = None
+    if workers <= 1:
+        for chunk in reader:
+            plan = plan or plan_columns(list(chunk.columns))
+            yield convert_chunk(chunk, plan)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending: deque = deque()
+        for chunk in reader:
+            plan = plan or plan_columns(list(chunk.columns))
+            pending.append(ex.submit(convert_chunk, chunk, plan))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_keys(path: str, nrows: int) -> Set[Key]:
+    """
+    Chaves (mission, object_id) das primeiras `nrows` linhas, sem converter o resto da linha:
+    na retomada, as linhas antes do checkpoint também contam como presentes no arquivo.
+    """
+    keys: Set[Key] = set()
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=INGEST_BATCH, encoding="utf-8", nrows=nrows)
+    plan: Optional[ColumnPlan] = None
+    for chunk in reader:
+        plan = plan or plan_columns(list(chunk.columns))
+        keys.update(zip(*chunk_keys(chunk, plan)))
+    return keys
+
+
+def rowmap_to_record(rm: RowMap) -> Dict[str, Any]:
+    """
+    Converte o RowMap para um dicionário com as colunas de ExoplanetCatalog (ra/dec -> longitude/latitude).
+    """
+    rec = {
+        "mission": rm.mission,
+        "object_id": rm.object_id,
+        "alt_designations": rm.alt_designations,
+        "longitude": rm.ra,
+        "latitude": rm.dec,
+        "sky_pixel": sky_pixel(rm.ra, rm.dec),
+        "stellar_temperature": rm.stellar_temperature,
+        "stellar_radius": rm.stellar_radius,
+        "planet_radius": rm.planet_radius,
+        "eq_temperature": rm.eq_temperature,
+        "distance": rm.distance,
+        "surface_gravity": rm.surface_gravity,
+        "orbital_period": rm.orbital_period,
+        "insol_flux": rm.insol_flux,
+        "depth": rm.depth,
+        "final_classification": rm.final_classification,
+        "final_confidence": rm.final_confidence,
+        "ml_version": None,
+        "extra": rm.extra,
+    }
+    rec["content_hash"] = content_hash(rec)
+    return rec
+
+
 def upsert_row(sess: Session, rm: RowMap) -> None:
+    upsert_record(sess, rowmap_to_record(rm))
+
+
+def _with_label_generation(values: Dict[str, Any], label_generation: Optional[int]) -> Dict[str, Any]:
+    return {**values, "label_generation": label_generation if values.get("final_classification") else None}
+
+
+def upsert_record(sess: Session, values: Dict[str, Any], label_generation: Optional[int] = None) -> None:
     # Verifica se já existe (mission + object_id)
     existing = sess.exec(
         select(ExoplanetCatalog).where(
-            ExoplanetCatalog.mission == rm.mission,
-            ExoplanetCatalog.object_id == rm.object_id,
+            ExoplanetCatalog.mission == values["mission"],
+            ExoplanetCatalog.object_id == values["object_id"],
         )
     ).first()
 
+    values = _with_label_generation(values, label_generation)
     if existing:
+        if existing.final_classification == values["final_classification"] and existing.ml_version is None:
+            # mesmo rótulo do CSV: mantém a geração em que ele apareceu
+            values["label_generation"] = existing.label_generation
         # Atualiza campos principais
-        existing.ra = rm.ra
-        existing.dec = rm.dec
-        existing.stellar_temperature = rm.stellar_temperature
-        existing.stellar_radius = rm.stellar_radius
-        existing.planet_radius = rm.planet_radius
-        existing.eq_temperature = rm.eq_temperature
-        existing.distance = rm.distance
-        existing.surface_gravity = rm.surface_gravity
-        existing.orbital_period = rm.orbital_period
-        existing.insol_flux = rm.insol_flux
-        existing.depth = rm.depth
-        existing.final_classification = rm.final_classification
-        existing.final_confidence = rm.final_confidence
-        existing.extra = rm.extra
+        for field, value in values.items():
+            setattr(existing, field, value)
     else:
-        rec = ExoplanetCatalog(
-            mission=rm.mission,
-            object_id=rm.object_id,
-            ra=rm.ra,
-            dec=rm.dec,
-            stellar_temperature=rm.stellar_temperature,
-            stellar_radius=rm.stellar_radius,
-            planet_radius=rm.planet_radius,
-            eq_temperature=rm.eq_temperature,
-            distance=rm.distance,
-            surface_gravity=rm.surface_gravity,
-            orbital_period=rm.orbital_period,
-            insol_flux=rm.insol_flux,
-            depth=rm.depth,
-            final_classification=rm.final_classification,
-            final_confidence=rm.final_confidence,
-            extra=rm.extra,
-        )
-        sess.add(rec)
+        sess.add(ExoplanetCatalog(**values))
+
+
+def ensure_unique_key(sess: Session) -> None:
+    """
+    Garante o índice único (mission, object_id) exigido pelo ON CONFLICT.
+    create_all não altera tabelas já existentes, então cria o índice se faltar.
+    """
+    sess.exec(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_catalog_mission_object "
+        "ON exoplanet_catalog (mission, object_id)"
+    ))
+    sess.commit()
+
+
+def ensure_sky_pixel(sess: Session) -> None:
+    """
+    Tabelas criadas antes da coluna sky_pixel: adiciona coluna + índice (só Postgres).
+    """
+    if sess.get_bind().dialect.name != "postgresql":
+        return
+    sess.exec(text("ALTER TABLE exoplanet_catalog ADD COLUMN IF NOT EXISTS sky_pixel INTEGER"))
+    sess.exec(text(
+        "CREATE INDEX IF NOT EXISTS ix_exoplanet_catalog_sky_pixel ON exoplanet_catalog (sky_pixel)"
+    ))
+    sess.commit()
+
+
+def ensure_content_hash(sess: Session) -> None:
+    """
+    Tabelas criadas antes da coluna content_hash: adiciona a coluna (só Postgres).
+    """
+    if sess.get_bind().dialect.name != "postgresql":
+        return
+    sess.exec(text("ALTER TABLE exoplanet_catalog ADD COLUMN IF NOT EXISTS content_hash VARCHAR"))
+    sess.commit()
+
+
+def bulk_upsert(sess: Session, records: List[Dict[str, Any]], label_generation: Optional[int] = None) -> int:
+    """
+    Upsert set-based: um único INSERT ... ON CONFLICT (mission, object_id) DO UPDATE por lote.
+    """
+    if not records:
+        return 0
+    # o mesmo par não pode aparecer duas vezes no mesmo comando; vale a última ocorrência (como no modo linha a linha)
+    dedup = {(r["mission"], r["object_id"]): _with_label_generation(r, label_generation) for r in records}
+    table = ExoplanetCatalog.__table__
+    stmt = pg_insert(table).values(list(dedup.values()))
+    set_ = {c: stmt.excluded[c] for c in UPSERT_COLUMNS if c not in {"mission", "object_id"}}
+    # label_generation só muda quando o rótulo do CSV é novo (diferente, ou antes vinha do ml_service)
+    set_["label_generation"] = case(
+        (or_(table.c.final_classification.is_distinct_from(stmt.excluded.final_classification),
+             table.c.ml_version.is_not(None)), stmt.excluded.label_generation),
+        else_=table.c.label_generation,
+    )
+    stmt = stmt.on_conflict_do_update(index_elements=["mission", "object_id"], set_=set_)
+    sess.exec(stmt)
+    return len(dedup)
+
+
+def resolve_mode(sess: Session) -> str:
+    dialect = sess.get_bind().dialect.name
+    if INGEST_MODE == "row" or (INGEST_MODE == "auto" and dialect != "postgresql"):
+        return "row"
+    if dialect != "postgresql":
+        print(f"[ingest] modo bulk requer Postgres (dialeto: {dialect}); usando linha a linha.", file=sys.stderr)
+        return "row"
+    try:
+        ensure_unique_key(sess)
+    except Exception as e:
+        sess.rollback()
+        print(f"[ingest] não foi possível criar o índice único (mission, object_id): {e}; usando linha a linha.", file=sys.stderr)
+        return "row"
+    return "bulk"
+
+
+def classify_stage(sess: Session) -> int:
+    """
+    Etapa opcional: rótulo + confiança do ensemble para as linhas sem classificação.
+    Falha no ml_service não derruba o ingest (as linhas seguem sem rótulo; rode scripts.reclassify depois).
+    """
+    try:
+        res = classify_catalog(sess)
+    except (ClassifyError, httpx.HTTPError) as e:
+        sess.rollback()
+        print(f"[ingest] classificação pelo ml_service falhou: {e}", file=sys.stderr)
+        return 0
+    print(f"[ingest] Classificadas {res['updated']} linhas pelo ml_service (modelos {res['ml_version']}) "
+          f"em {res['seconds']:.1f}s.")
+    return res["updated"]
+
+
+def file_checksum(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(sess: Session, path: str) -> Optional[IngestManifest]:
+    IngestManifest.__table__.create(sess.get_bind(), checkfirst=True)
+    return sess.get(IngestManifest, path)
+
+
+def load_hashes(sess: Session) -> Dict[Key, Tuple[int, Optional[str]]]:
+    """
+    (mission, object_id) -> (id, content_hash) de todo o catálogo (uma leitura só, sem 'extra').
+    """
+    rows = sess.exec(select(
+        ExoplanetCatalog.mission, ExoplanetCatalog.object_id, ExoplanetCatalog.id, ExoplanetCatalog.content_hash,
+    )).all()
+    return {(r[0], r[1]): (r[2], r[3]) for r in rows}
+
+
+def split_changed(
+    records: List[Dict[str, Any]],
+    existing: Dict[Key, Tuple[Optional[int], Optional[str]]],
+    seen: Set[Key],
+    counts: Dict[str, int],
+) -> List[Dict[str, Any]]:
+    """
+    Registros novos ou com content_hash diferente do gravado; os iguais só entram na contagem.
+    `existing` é atualizado (uma chave repetida mais adiante no arquivo compara com a última versão).
+    """
+    changed = []
+    for rec in records:
+        key = (rec["mission"], rec["object_id"])
+        seen.add(key)
+        prev = existing.get(key)
+        if prev is not None and prev[1] == rec["content_hash"]:
+            counts["unchanged"] += 1
+            continue
+        counts["inserted" if prev is None else "updated"] += 1
+        existing[key] = (prev[0] if prev else None, rec["content_hash"])
+        changed.append(rec)
+    return changed
+
+
+def delete_missing(sess: Session, existing: Dict[Key, Tuple[Optional[int], Optional[str]]], seen: Set[Key]) -> int:
+    """
+    Remove as linhas das missões presentes no arquivo que não estão mais nele.
+    Missões ausentes do arquivo não são tocadas (ex.: um CSV só da K2 não apaga a Kepler).
+    """
+    missions = {m for m, _ in seen}
+    ids = [v[0] for k, v in existing.items() if k[0] in missions and k not in seen and v[0] is not None]
+    for i in range(0, len(ids), INGEST_BATCH):
+        sess.exec(delete(ExoplanetCatalog).where(ExoplanetCatalog.id.in_(ids[i:i + INGEST_BATCH])))
+    return len(ids)
 
 
 def main() -> int:
@@ -205,19 +562,94 @@ def main() -> int:
         return 1
 
     total = 0
-    inserted_or_updated = 0
-
-    with open(CATALOG_CSV, "r", encoding="utf-8") as f, session_scope() as sess:
-        reader = csv.DictReader(f)
-        for row in reader:
-            total += 1
-            rm = row_to_model(row)
-            upsert_row(sess, rm)
-            if total % 1000 == 0:
-                sess.commit()
+    started = time.perf_counter()
+    path = os.path.abspath(CATALOG_CSV)
+    stat = os.stat(path)
+
+    with session_scope() as sess:
+        ensure_sky_pixel(sess)
+        ensure_ml_version(sess)
+        ensure_label_generation(sess)
+        ensure_content_hash(sess)
+
+        # Manifesto: arquivo igual ao último ingest completo não é relido
+        manifest = load_manifest(sess, path)
+        if (manifest and manifest.completed and not INGEST_FORCE
+                and manifest.size == stat.st_size and manifest.mtime == stat.st_mtime):
+            print(f"[ingest] {CATALOG_CSV} inalterado desde o último ingest (tamanho e mtime); nada a fazer.")
+            return 0
+        checksum = file_checksum(path)
+        if manifest and manifest.completed and not INGEST_FORCE and manifest.checksum == checksum:
+            manifest.mtime = stat.st_mtime
+            sess.add(manifest)
+            sess.commit()
+            print(f"[ingest] {CATALOG_CSV} com o mesmo conteúdo do último ingest (sha256); nada a fazer.")
+            return 0
+
+        # Checkpoint: execução interrompida sobre o mesmo arquivo continua de onde parou
+        resume = manifest is not None and not manifest.completed and manifest.checksum == checksum and not INGEST_FORCE
+        if resume:
+            skip = manifest.rows_done
+            label_generation = manifest.label_generation
+            counts = {k: getattr(manifest, k) for k in ("inserted", "updated", "unchanged")}
+            print(f"[ingest] retomando {CATALOG_CSV} a partir da linha {skip} (checkpoint do manifesto).")
+        else:
+            skip = 0
+            label_generation = next_label_generation(sess)
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+            manifest = manifest or IngestManifest(path=path)
+            manifest.started_at = time.time()
+        manifest.size, manifest.mtime, manifest.checksum = stat.st_size, stat.st_mtime, checksum
+        manifest.completed, manifest.rows_done, manifest.label_generation = False, skip, label_generation
+        manifest.finished_at = None
+        sess.add(manifest)
+        sess.commit()
+
+        mode = resolve_mode(sess)
+        existing = load_hashes(sess)
+        seen: Set[Key] = iter_keys(path, skip) if skip and INGEST_DELETE else set()
+        for records in iter_records(path, skip=skip):
+            total += len(records)
+            changed = split_changed(records, existing, seen, counts)
+            if mode == "bulk":
+                bulk_upsert(sess, changed, label_generation)
+            else:
+                for rec in changed:
+                    upsert_record(sess, rec, label_generation)
+            # o checkpoint vai no mesmo commit das linhas do lote
+            manifest.rows_done += len(records)
+            for k, v in counts.items():
+                setattr(manifest, k, v)
+            sess.add(manifest)
+            sess.commit()
+
+        deleted = delete_missing(sess, existing, seen) if INGEST_DELETE else 0
+        classified = classify_stage(sess) if INGEST_CLASSIFY else 0
+        manifest.deleted = deleted
+        changes = counts["inserted"] + counts["updated"] + deleted + classified
+        if changes:
+            # invalida os caches de listagem da API e refaz os resumos do dashboard
+            generation = bump_generation(sess)
+            build_summaries(sess, generation)
+            manifest.generation = generation
+        else:
+            generation = manifest.generation
+        manifest.completed = True
+        manifest.finished_at = time.time()
+        sess.add(manifest)
         sess.commit()
 
-    print(f"[ingest] Processadas {total} linhas de {CATALOG_CSV}.")
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"[ingest] Processadas {total} linhas de {CATALOG_CSV} em {elapsed:.1f}s ({rate:,.0f} linhas/s, modo {mode}): "
+          f"{counts['inserted']} inseridas, {counts['updated']} atualizadas, {counts['unchanged']} inalteradas, "
+          f"{deleted} removidas.")
+    if not INGEST_DELETE and not skip:
+        missions = {m for m, _ in seen}
+        stale = sum(1 for k in existing if k[0] in missions and k not in seen)
+        if stale:
+            print(f"[ingest] {stale} linhas das mesmas missões não estão mais no arquivo (INGEST_DELETE=1 remove).")
+    print(f"[ingest] geração do catálogo: {generation}" + ("" if changes else " (sem mudanças, não incrementada)") + ".")
     return 0
 
 
@@ -0,0 +1,109 @@
+"""
+Teste de carga simples para comparar o caminho síncrono e o assíncrono do catálogo.
+
+Suba duas instâncias da API (DB_ASYNC=0 e DB_ASYNC=1) e rode, por exemplo:
+
+    python -m scripts.loadtest --target sync=http://localhost:8000 --target async=http://localhost:8001 \
+        --concurrency 200 --requests 5000
+
+Cada alvo recebe a mesma mistura de requests (páginas da listagem + itens por id);
+o relatório traz throughput e latências p50/p95/p99 por alvo.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+PATHS = [
+    "/api/catalog?page_size=50",
+    "/api/catalog?mission=kepler&page_size=50",
+    "/api/catalog?final_classification=planet&order_by=planet_radius&page_size=50&count=none",
+    "/api/catalog?min_planet_radius=1&max_planet_radius=4&page=3&page_size=20",
+]
+
+
+def _percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+async def run_target(base_url: str, concurrency: int, total: int, max_id: int, seed: int) -> Dict[str, float]:
+    rnd = random.Random(seed)
+    paths = [rnd.choice(PATHS) if rnd.random() < 0.7 else f"/api/catalog/{rnd.randint(1, max_id)}" for _ in range(total)]
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for p in paths:
+        queue.put_nowait(p)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    if r.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+
+def _parse_target(s: str) -> Tuple[str, str]:
+    name, _, url = s.partition("=")
+    return (name, url) if url else (s, s)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compara latência (p99) entre instâncias da API.")
+    ap.add_argument("--target", action="append", required=True, help="nome=url (repita para comparar)")
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--max-id", type=int, default=5000, help="maior id usado em /api/catalog/{id}")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rows = []
+    for target in args.target:
+        name, url = _parse_target(target)
+        res = asyncio.run(run_target(url, args.concurrency, args.requests, args.max_id, args.seed))
+        rows.append((name, res))
+        print(f"[loadtest] {name}: {res['rps']:.0f} req/s, p50={res['p50_ms']:.1f}ms "
+              f"p95={res['p95_ms']:.1f}ms p99={res['p99_ms']:.1f}ms erros={res['errors']}")
+    if len(rows) > 1:
+        base_name, base = rows[0]
+        for name, res in rows[1:]:
+            ratio = res["p99_ms"] / base["p99_ms"] if base["p99_ms"] else float("nan")
+            print(f"[loadtest] p99 {name}/{base_name}: {ratio:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+"""
+Reclassifica o catálogo pelo ml_service sem reler o CSV.
+
+Por padrão só envia linhas sem rótulo ou rotuladas por uma versão antiga dos modelos;
+--overwrite inclui também as que têm rótulo do CSV. Exemplo:
+
+    python -m scripts.reclassify --mission kepler --concurrency 8
+"""
+import argparse
+import sys
+
+import httpx
+from sqlmodel import Session
+
+try:
+    from db import engine  # type: ignore
+    from cache import bump_generation  # type: ignore
+    from stats import build_summaries  # type: ignore
+    from classify import (  # type: ignore
+        CLASSIFY_BATCH, CLASSIFY_CONCURRENCY, CLASSIFY_RETRIES, ML_MISSIONS, ML_SERVICE_URL,
+        ClassifyError, classify_catalog,
+    )
+except Exception as e:
+    print(f"[reclassify] ERRO ao importar app: {e}", file=sys.stderr)
+    raise
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Classifica linhas do catálogo pelo ml_service (/predict/batch).")
+    ap.add_argument("--mission", action="append", choices=ML_MISSIONS, help="repita para várias (padrão: todas)")
+    ap.add_argument("--url", default=ML_SERVICE_URL)
+    ap.add_argument("--batch", type=int, default=CLASSIFY_BATCH)
+    ap.add_argument("--concurrency", type=int, default=CLASSIFY_CONCURRENCY)
+    ap.add_argument("--retries", type=int, default=CLASSIFY_RETRIES)
+    ap.add_argument("--overwrite", action="store_true", help="substitui também os rótulos vindos do CSV")
+    args = ap.parse_args(argv)
+
+    with Session(engine) as sess:
+        try:
+            res = classify_catalog(
+                sess, missions=args.mission, base_url=args.url, batch=args.batch,
+                concurrency=args.concurrency, retries=args.retries, overwrite=args.overwrite,
+            )
+        except (ClassifyError, httpx.HTTPError) as e:
+            print(f"[reclassify] falhou: {e}", file=sys.stderr)
+            return 1
+        generation = None
+        if res["updated"]:
+            # rótulos mudaram: invalida os caches de listagem e refaz os resumos
+            generation = bump_generation(sess)
+            build_summaries(sess, generation)
+            sess.commit()
+
+    rate = res["updated"] / res["seconds"] if res["seconds"] > 0 else 0.0
+    print(f"[reclassify] {res['updated']} linhas em {res['batches']} lotes (modelos {res['ml_version']}) "
+          f"em {res['seconds']:.1f}s ({rate:,.0f} linhas/s); geração do catálogo: {generation}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""
+Atualiza os modelos do ml_service com os rótulos novos do catálogo (sem retreino completo).
+
+Envia as linhas cujo rótulo do CSV apareceu ou mudou desde a última execução, espera o
+ml_service absorvê-las e mostra o custo de cada modelo em relação a um treino completo.
+Na primeira vez, marque o catálogo atual como já coberto pelos datasets de treino:
+
+    python -m scripts.update_models --baseline
+    python -m scripts.update_models --mission kepler --compare-full --reclassify
+"""
+import argparse
+import sys
+
+import httpx
+from sqlmodel import Session
+
+try:
+    from db import engine  # type: ignore
+    from cache import bump_generation  # type: ignore
+    from stats import build_summaries  # type: ignore
+    from classify import ML_MISSIONS, ML_SERVICE_URL, ClassifyError, classify_catalog  # type: ignore
+    from feedback import FEEDBACK_TIMEOUT, mark_baseline, push_labels  # type: ignore
+except Exception as e:
+    print(f"[update_models] ERRO ao importar app: {e}", file=sys.stderr)
+    raise
+
+
+def _fmt(seconds) -> str:
+    return "?" if seconds is None else f"{seconds:.2f}s"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Atualização incremental dos modelos do ml_service (/train/incremental).")
+    ap.add_argument("--mission", action="append", choices=ML_MISSIONS, help="repita para várias (padrão: todas)")
+    ap.add_argument("--url", default=ML_SERVICE_URL)
+    ap.add_argument("--timeout", type=float, default=FEEDBACK_TIMEOUT, help="espera máxima por missão (s)")
+    ap.add_argument("--compare-full", action="store_true", help="mede também um treino completo nos mesmos dados")
+    ap.add_argument("--baseline", action="store_true", help="só marca os rótulos atuais como conhecidos, sem enviar")
+    ap.add_argument("--since", type=int, help="reenvia desde esta geração do catálogo (ignora a marca d'água)")
+    ap.add_argument("--reclassify", action="store_true", help="reclassifica as linhas rotuladas pelo ml_service depois")
+    args = ap.parse_args(argv)
+
+    with Session(engine) as sess:
+        if args.baseline:
+            marks = mark_baseline(sess, args.mission)
+            print(f"[update_models] marca d'água por missão: {marks}")
+            return 0
+        try:
+            res = push_labels(sess, args.mission, base_url=args.url, compare_full=args.compare_full,
+                              timeout=args.timeout, since=args.since)
+        except (ClassifyError, httpx.HTTPError) as e:
+            print(f"[update_models] falhou: {e}", file=sys.stderr)
+            return 1
+
+        updated = False
+        for mission, rep in res.items():
+            if rep is None:
+                print(f"[update_models] {mission}: nenhum rótulo novo.")
+                continue
+            print(f"[update_models] {mission}: {rep['sent']} linhas enviadas, {rep['new_or_changed']} novas/alteradas "
+                  f"({rep['rows']} acumuladas, {rep['holdout']} no conjunto de teste); modelos {rep['version']}")
+            for key, m in rep["models"].items():
+                print(f"[update_models]   {key:22s} {m['method']:11s} {_fmt(m['seconds'])} (treino completo "
+                      f"{_fmt(m['full_fit_seconds'])}); f1_weighted {m['before']['f1_weighted']:.4f} -> "
+                      f"{m['after']['f1_weighted']:.4f}")
+            if rep.get("speedup"):
+                print(f"[update_models]   total {_fmt(rep['update_seconds'])} vs {_fmt(rep['full_fit_seconds'])} "
+                      f"num treino completo ({rep['speedup']:.1f}x)")
+            updated = updated or bool(rep["models"])
+
+        if updated and args.reclassify:
+            # versão nova dos modelos: as linhas rotuladas pelo ml_service ficaram desatualizadas
+            try:
+                cls = classify_catalog(sess, missions=args.mission, base_url=args.url)
+            except (ClassifyError, httpx.HTTPError) as e:
+                print(f"[update_models] reclassificação falhou: {e}", file=sys.stderr)
+                return 1
+            if cls["updated"]:
+                build_summaries(sess, bump_generation(sess))
+                sess.commit()
+            print(f"[update_models] {cls['updated']} linhas reclassificadas (modelos {cls['ml_version']}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+"""
+Confere classify_catalog contra um ml_service simulado em processo (httpx.MockTransport).
+
+Não precisa de Postgres nem do ml_service: cria um SQLite temporário com linhas sem rótulo
+e linhas rotuladas pelo CSV, e responde /health e /predict/batch com rótulos determinísticos,
+injetando 503 e erros de rede na primeira tentativa de alguns lotes. Exemplo:
+
+    python -m scripts.verify_classify --rows 300 --batch 40 --concurrency 4
+
+Verifica lotes, tentativas repetidas, a gravação em lote (rótulo, confiança, ml_version),
+que os rótulos do CSV ficam intactos, que uma segunda rodada não envia nada, que uma nova
+versão de modelos reenvia só o que o ml_service rotulou e que erros 4xx / retries esgotados
+viram ClassifyError. Sai com 1 na primeira divergência.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+import httpx
+from sqlmodel import Session, SQLModel, create_engine, select
+
+try:
+    from models import ExoplanetCatalog  # type: ignore
+    from classify import LABEL_MAP, ML_FEATURES, ML_MISSIONS, ClassifyError, classify_catalog  # type: ignore
+except Exception as e:
+    print(f"[verify_classify] ERRO ao importar app: {e}", file=sys.stderr)
+    raise
+
+LABELS = ["planet", "non_planet", "candidate"]
+
+
+def expected(longitude: float) -> Dict[str, Any]:
+    # rótulo e confiança derivados da própria linha: dá para conferir sem guardar o que foi enviado
+    k = int(longitude)
+    return {"label": LABELS[k % 3], "confidence": round(0.5 + (k % 50) / 100, 2)}
+
+
+class StandIn:
+    """
+    ml_service falso: conta requisições, concorrência e falhas injetadas por lote.
+    """
+
+    def __init__(self, version: str, fail_every: int = 3, delay: float = 0.01):
+        self.version = version
+        self.fail_every = fail_every
+        self.delay = delay
+        self.status: Optional[int] = None  # força um status em todas as chamadas de /predict/batch
+        self.calls = 0
+        self.attempts: Dict[float, int] = {}
+        self.injected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"status": "ok", "version": self.version})
+        assert request.url.path == "/predict/batch", request.url.path
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.status is not None:
+                return httpx.Response(self.status, json={"detail": "simulado"})
+            body = json.loads(request.content)
+            lon = body["features"]["longitude"]
+            key = lon[0]
+            n = self.attempts.get(key, 0)
+            self.attempts[key] = n + 1
+            # primeira tentativa de um lote a cada fail_every: alterna 503 e erro de rede
+            if n == 0 and self.fail_every and len(self.attempts) % self.fail_every == 0:
+                self.injected += 1
+                if (len(self.attempts) // self.fail_every) % 2:
+                    return httpx.Response(503, json={"detail": "ocupado"})
+                raise httpx.ConnectError("conexão recusada (simulado)", request=request)
+            preds = [expected(x) for x in lon]
+            return httpx.Response(200, json={
+                "mission": body["mission"],
+                "ensemble": {"label": [p["label"] for p in preds], "confidence": [p["confidence"] for p in preds]},
+            })
+        finally:
+            self.in_flight -= 1
+
+
+def seed_catalog(engine, rows: int, csv_every: int) -> Dict[str, Any]:
+    """
+    `rows` linhas por missão; uma a cada `csv_every` já vem rotulada pelo CSV (ml_version NULL).
+    """
+    SQLModel.metadata.create_all(engine, tables=[ExoplanetCatalog.__table__])
+    pending: Dict[str, int] = {m: 0 for m in ML_MISSIONS}
+    with Session(engine) as sess:
+        for mi, mission in enumerate(ML_MISSIONS):
+            for i in range(rows):
+                lon = float(mi * 100_000 + i)  # único no banco: identifica o lote no simulador
+                row = ExoplanetCatalog(mission=mission, object_id=f"{mission}-{i}", longitude=lon)
+                for col in ML_FEATURES.values():
+                    if col != "longitude":
+                        setattr(row, col, 1.0 + i % 7)
+                if csv_every and i % csv_every == 0:
+                    row.final_classification = "candidate"
+                    row.final_confidence = 1.0
+                else:
+                    pending[mission] += 1
+                sess.add(row)
+        sess.commit()
+    return pending
+
+
+def check(ok: bool, msg: str) -> None:
+    if not ok:
+        raise AssertionError(msg)
+
+
+def check_rows(engine, version: str) -> None:
+    with Session(engine) as sess:
+        for r in sess.exec(select(ExoplanetCatalog)).all():
+            if r.ml_version is None:
+                check(r.final_classification == "candidate" and r.final_confidence == 1.0,
+                      f"rótulo do CSV alterado em {r.object_id}: {r.final_classification}/{r.final_confidence}")
+                continue
+            exp = expected(r.longitude)
+            check(r.ml_version == version, f"{r.object_id}: ml_version {r.ml_version} != {version}")
+            check(r.final_classification == LABEL_MAP[exp["label"]],
+                  f"{r.object_id}: rótulo {r.final_classification} != {LABEL_MAP[exp['label']]}")
+            check(abs(r.final_confidence - exp["confidence"]) < 1e-9,
+                  f"{r.object_id}: confiança {r.final_confidence} != {exp['confidence']}")
+
+
+def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'classify.db')}")
+        pending = seed_catalog(engine, args.rows, args.csv_every)
+        total = sum(pending.values())
+        batches = sum(math.ceil(n / args.batch) for n in pending.values())
+
+        def classify(stand_in: StandIn, retries: int = 2, overwrite: bool = False) -> Dict[str, Any]:
+            with Session(engine) as sess:
+                return classify_catalog(
+                    sess, base_url="http://ml-stand-in", batch=args.batch, concurrency=args.concurrency,
+                    retries=retries, overwrite=overwrite, transport=httpx.MockTransport(stand_in),
+                )
+
+        # 1) primeira rodada: tudo que está pendente, com falhas transitórias no meio
+        ml = StandIn("v1")
+        res = classify(ml)
+        print(f"[verify_classify] v1: {res['batches']} lotes, {res['sent']} enviadas, {res['updated']} gravadas, "
+              f"{ml.injected} falhas injetadas, concorrência máx. {ml.max_in_flight} em {res['seconds']:.2f}s")
+        check(res["ml_version"] == "v1", f"ml_version {res['ml_version']}")
+        check(res["sent"] == total and res["updated"] == total, f"esperava {total} linhas, veio {res}")
+        check(res["batches"] == batches, f"esperava {batches} lotes, veio {res['batches']}")
+        check(ml.injected > 0, "nenhuma falha injetada: aumente --rows ou reduza --batch")
+        check(ml.calls == batches + ml.injected, f"{ml.calls} chamadas != {batches} lotes + {ml.injected} retries")
+        check(ml.max_in_flight <= args.concurrency, f"concorrência {ml.max_in_flight} > {args.concurrency}")
+        check_rows(engine, "v1")
+
+        # 2) mesma versão: nada pendente
+        again = classify(StandIn("v1"))
+        check(again["sent"] == 0 and again["batches"] == 0, f"segunda rodada reenviou: {again}")
+        print("[verify_classify] segunda rodada com v1: nada a enviar")
+
+        # 3) modelos novos: reenvia só o que o ml_service rotulou (CSV fica de fora sem --overwrite)
+        v2 = classify(StandIn("v2", fail_every=0))
+        check(v2["sent"] == total and v2["updated"] == total, f"v2 deveria reenviar {total}: {v2}")
+        check_rows(engine, "v2")
+        print(f"[verify_classify] v2: {v2['sent']} reenviadas, rótulos do CSV intactos")
+
+        # 4) erros definitivos: 4xx na hora, 5xx depois de esgotar as tentativas
+        for status, retries in ((422, 2), (503, 1)):
+            bad = StandIn("v3", fail_every=0)
+            bad.status = status
+            try:
+                classify(bad, retries=retries)
+            except ClassifyError as e:
+                per_batch = 1 if status < 500 else retries + 1
+                check(bad.calls >= per_batch, f"{status}: {bad.calls} chamadas")
+                print(f"[verify_classify] {status} -> ClassifyError após {bad.calls} chamada(s): {e}")
+            else:
+                raise AssertionError(f"{status} não levantou ClassifyError")
+        check_rows(engine, "v2")
+        engine.dispose()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Verifica classify_catalog contra um ml_service simulado.")
+    ap.add_argument("--rows", type=int, default=300, help="linhas por missão")
+    ap.add_argument("--batch", type=int, default=40)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--csv-every", type=int, default=4, help="uma linha a cada N já vem rotulada pelo CSV")
+    args = ap.parse_args(argv)
+    try:
+        run(args)
+    except AssertionError as e:
+        print(f"[verify_classify] DIVERGÊNCIA: {e}", file=sys.stderr)
+        return 1
+    print("[verify_classify] ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
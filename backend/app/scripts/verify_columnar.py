@@ -0,0 +1,120 @@
+"""
+Confere o motor colunar em memória contra o SQL, resposta por resposta.
+
+Suba duas instâncias da API sobre o mesmo banco (CATALOG_ENGINE=sql e CATALOG_ENGINE=memory,
+ambas com CATALOG_CACHE=0) e rode, por exemplo:
+
+    python -m scripts.verify_columnar --sql http://localhost:8000 --memory http://localhost:8001 --queries 500
+
+Cada consulta sorteia filtros, ordenação, projeção e página; as cadeias de cursor são
+seguidas até o fim (ou --max-pages) nos dois alvos. Sai com 1 na primeira divergência.
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+SORTS = [None, "planet_radius", "orbital_period", "final_confidence", "eq_temperature", "insol_flux", "id", "sky_pixel"]
+RANGES = {
+    "planet_radius": (0.5, 20.0),
+    "orbital_period": (0.5, 400.0),
+    "eq_temperature": (200.0, 2500.0),
+    "stellar_temperature": (3000.0, 7500.0),
+    "final_confidence": (0.0, 1.0),
+}
+FIELDS = [None, "id,object_id,planet_radius", "object_id,mission,final_classification,orbital_period"]
+
+
+def random_query(rnd: random.Random) -> Dict[str, Any]:
+    q: Dict[str, Any] = {"page_size": rnd.choice([1, 7, 20, 50, 200])}
+    if rnd.random() < 0.4:
+        q["mission"] = rnd.choice(["kepler", "k2", "tess"])
+    if rnd.random() < 0.3:
+        q["final_classification"] = rnd.choice(["planet", "not_planet", "candidate"])
+    for field, (lo, hi) in RANGES.items():
+        if rnd.random() < 0.2:
+            a, b = sorted(rnd.uniform(lo, hi) for _ in range(2))
+            if rnd.random() < 0.7:
+                q[f"min_{field}"] = round(a, 3)
+            if rnd.random() < 0.7:
+                q[f"max_{field}"] = round(b, 3)
+    sort = rnd.choice(SORTS)
+    if sort:
+        q["order_by"] = sort
+        q["order_dir"] = rnd.choice(["asc", "desc"])
+    fields = rnd.choice(FIELDS)
+    if fields:
+        q["fields"] = fields
+    if rnd.random() < 0.5:
+        q["count"] = rnd.choice(["exact", "none"])
+    if rnd.random() < 0.3:
+        q["page"] = rnd.randint(1, 20)
+    return q
+
+
+def fetch(client: httpx.Client, params: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    t0 = time.perf_counter()
+    r = client.get("/api/catalog", params=params)
+    elapsed = time.perf_counter() - t0
+    r.raise_for_status()
+    return r.json(), elapsed
+
+
+def compare(sql: httpx.Client, mem: httpx.Client, q: Dict[str, Any], max_pages: int,
+            timings: Dict[str, List[float]]) -> Optional[str]:
+    """
+    Percorre a consulta (e a cadeia de cursor, se houver) nos dois alvos; devolve a divergência ou None.
+    """
+    params = dict(q)
+    for depth in range(max_pages):
+        a, ta = fetch(sql, params)
+        b, tb = fetch(mem, params)
+        timings["sql"].append(ta)
+        timings["memory"].append(tb)
+        if a != b:
+            return f"{params} (página {depth + 1} da cadeia)"
+        if not a["next_cursor"]:
+            return None
+        params = {k: v for k, v in q.items() if k != "page"}
+        params["cursor"] = a["next_cursor"]
+    return None
+
+
+def _p(vals: List[float], pct: float) -> float:
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(round(pct / 100 * (len(vals) - 1))))] * 1000 if vals else 0.0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Equivalência da listagem: CATALOG_ENGINE=memory vs sql.")
+    ap.add_argument("--sql", required=True, help="URL da instância com CATALOG_ENGINE=sql")
+    ap.add_argument("--memory", required=True, help="URL da instância com CATALOG_ENGINE=memory")
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--max-pages", type=int, default=5, help="páginas seguidas por cadeia de cursor")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    timings: Dict[str, List[float]] = {"sql": [], "memory": []}
+    with httpx.Client(base_url=args.sql, timeout=60) as sql, httpx.Client(base_url=args.memory, timeout=60) as mem:
+        state = mem.get("/api/catalog/cache/stats").json().get("columnar", {})
+        if not state.get("enabled") or not state.get("rows"):
+            print(f"[verify_columnar] a instância --memory não está com o motor carregado: {state}", file=sys.stderr)
+            return 1
+        for i in range(args.queries):
+            diff = compare(sql, mem, random_query(rnd), args.max_pages, timings)
+            if diff:
+                print(f"[verify_columnar] DIVERGÊNCIA na consulta {i + 1}: {diff}", file=sys.stderr)
+                return 1
+
+    print(f"[verify_columnar] {args.queries} consultas, {len(timings['sql'])} páginas: respostas idênticas")
+    for name, vals in timings.items():
+        print(f"[verify_columnar] {name:6s} p50={_p(vals, 50):.1f}ms p95={_p(vals, 95):.1f}ms p99={_p(vals, 99):.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
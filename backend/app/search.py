@@ -0,0 +1,258 @@
+"""
+Busca por nome (autocomplete) sobre object_id e alt_designations.
+
+Designações são normalizadas antes de indexar e de consultar: minúsculas, só letras,
+dígitos e o ponto decimal ("Kepler-22 b" -> "kepler22b", "EPIC 2011..." -> "epic2011...",
+"KOI-7.01" -> "koi7.01", que não pode colidir com "koi701") e o nome KOI do arquivo da
+NASA vira a forma digitada ("K00701.01" -> "koi701.01"). O ingest grava em
+alt_designations as designações legíveis montadas a partir das colunas do CSV
+(format_designations).
+
+O índice fica em memória e é montado a partir do banco:
+
+- prefixo: lista ordenada das chaves normalizadas (designação inteira e também a partir
+  de cada palavra, para "227" achar "Kepler-227 b"); a faixa do prefixo sai por bisect e
+  as melhores entradas por np.argpartition (chave inteira antes de palavra, mais curta
+  antes de mais longa);
+- aproximada: postings de trigramas das designações inteiras, usada quando o prefixo não
+  completa o limite (erros de digitação, trechos do meio do nome); pontua por Jaccard.
+
+Como o índice de similaridade, ele guarda a geração do catálogo e é refeito numa thread
+quando ela muda; as consultas seguem no índice anterior até a troca.
+"""
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from cache import GenerationTracked, current_generation
+from models import ExoplanetCatalog
+
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "50"))
+# pontuação mínima (Jaccard de trigramas) para um resultado aproximado
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.3"))
+
+# separador de alt_designations no banco
+SEPARATOR = "; "
+
+_STRIP = re.compile(r"[^a-z0-9.]+")
+_KOI_FILE_NAME = re.compile(r"^k0+(?=\d)")  # K00701.01 (arquivo KOI) -> koi701.01
+_WORD = re.compile(r"[A-Za-z0-9.]+")
+
+
+def normalize(name: str) -> str:
+    s = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii").lower().strip()
+    s = _KOI_FILE_NAME.sub("koi", s)
+    return _STRIP.sub("", s)
+
+
+def _prefixed(prefix: str, value: str) -> str:
+    v = value.strip()
+    return f"{prefix}{v}" if v.isdigit() else v
+
+
+def _koi(value: str) -> str:
+    m = re.match(r"^K0*(\d+(?:\.\d+)?)$", value.strip(), re.IGNORECASE)
+    return f"KOI-{m.group(1)}" if m else value.strip()
+
+
+def _toi(value: str) -> str:
+    v = value.strip()
+    return f"TOI-{v}" if re.match(r"^\d+(\.\d+)?$", v) else v
+
+
+# coluna do CSV -> forma legível da designação (arquivos KOI, K2 e TOI da NASA)
+DESIGNATION_SOURCES = {
+    "kepler_name": str.strip,
+    "kepoi_name": _koi,
+    "kepid": lambda v: _prefixed("KIC ", v),
+    "kic": lambda v: _prefixed("KIC ", v),
+    "pl_name": str.strip,
+    "k2_name": str.strip,
+    "epic_candname": str.strip,
+    "epic_hostname": lambda v: _prefixed("EPIC ", v),
+    "epic": lambda v: _prefixed("EPIC ", v),
+    "hostname": str.strip,
+    "toi": _toi,
+    "tid": lambda v: _prefixed("TIC ", v),
+    "tic": lambda v: _prefixed("TIC ", v),
+}
+
+
+def format_designations(row: Dict[str, Any], object_id: str) -> Optional[str]:
+    """
+    alt_designations de uma linha do CSV: designações legíveis sem repetição (nem do object_id).
+    """
+    seen = {normalize(object_id)}
+    out = []
+    for col, fmt in DESIGNATION_SOURCES.items():
+        raw = row.get(col)
+        if raw is None or not str(raw).strip() or str(raw).strip().lower() in {"nan", "none", "null"}:
+            continue
+        name = fmt(str(raw))
+        key = normalize(name)
+        if key and key not in seen:
+            seen.add(key)
+            out.append(name)
+    return SEPARATOR.join(out) or None
+
+
+def _trigrams(key: str) -> List[str]:
+    return sorted({key[i:i + 3] for i in range(len(key) - 2)}) if len(key) >= 3 else [key]
+
+
+class SearchIndex:
+    """
+    Snapshot imutável: linhas (id, missão, object_id, designações, classificação) e as
+    estruturas de prefixo e de trigramas sobre as designações normalizadas.
+    """
+
+    def __init__(self, rows: List[Tuple[Any, ...]], generation: int):
+        self.generation = generation
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.mission = np.array([r[1] for r in rows], dtype=object)
+        self.object_id = [r[2] for r in rows]
+        self.alt_designations = [r[3] for r in rows]
+        self.final_classification = [r[4] for r in rows]
+
+        # designações inteiras: (chave, linha, texto)
+        names: List[Tuple[str, int, str]] = []
+        for i, r in enumerate(rows):
+            for name in [r[2]] + (r[3].split(SEPARATOR) if r[3] else []):
+                key = normalize(name)
+                if key:
+                    names.append((key, i, name))
+        self.name_row = np.array([n[1] for n in names], dtype=np.int64)
+        self.name_text = [n[2] for n in names]
+
+        # prefixo: chave inteira (word=0) e a partir de cada palavra seguinte (word=1)
+        entries: List[Tuple[str, int, int]] = []
+        for j, (key, _, name) in enumerate(names):
+            entries.append((key, j, 0))
+            for m in list(_WORD.finditer(name))[1:]:
+                tail = normalize(name[m.start():])
+                if tail and tail != key:
+                    entries.append((tail, j, 1))
+        entries.sort()
+        self.keys = [e[0] for e in entries]
+        self.key_name = np.array([e[1] for e in entries], dtype=np.int64)
+        # rank: palavra depois de nome inteiro, depois comprimento da chave
+        self.key_rank = np.array([e[2] * 1000 + len(e[0]) for e in entries], dtype=np.int64)
+
+        # trigramas -> índices em `names`
+        postings: Dict[str, List[int]] = {}
+        self.name_trigrams = np.empty(len(names), dtype=np.int64)
+        for j, (key, _, _) in enumerate(names):
+            grams = _trigrams(key)
+            self.name_trigrams[j] = len(grams)
+            for g in grams:
+                postings.setdefault(g, []).append(j)
+        self.postings = {g: np.array(v, dtype=np.int64) for g, v in postings.items()}
+
+    @classmethod
+    def load(cls, sess: Session) -> "SearchIndex":
+        generation = current_generation(sess)
+        stmt = select(
+            ExoplanetCatalog.id, ExoplanetCatalog.mission, ExoplanetCatalog.object_id,
+            ExoplanetCatalog.alt_designations, ExoplanetCatalog.final_classification,
+        ).order_by(ExoplanetCatalog.id)
+        return cls(sess.exec(stmt).all(), generation)
+
+    def _prefix(self, q: str, mission: Optional[str], limit: int) -> List[Tuple[int, int, float]]:
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + "\x7f", lo)
+        if lo == hi:
+            return []
+        names = self.key_name[lo:hi]
+        rank = self.key_rank[lo:hi]
+        if mission:
+            keep = self.mission[self.name_row[names]] == mission
+            names, rank = names[keep], rank[keep]
+        # folga para linhas repetidas (várias designações da mesma linha casando)
+        take = min(rank.size, limit * 4)
+        if take == 0:
+            return []
+        if take < rank.size:
+            # as `take` menores; no empate do corte ficam as primeiras da faixa (ordem alfabética)
+            cut = np.partition(rank, take - 1)[take - 1]
+            below = np.flatnonzero(rank < cut)
+            best = np.concatenate([below, np.flatnonzero(rank == cut)[:take - below.size]])
+        else:
+            best = np.arange(rank.size)
+        best = best[np.lexsort((best, rank[best]))]
+        return [(int(self.name_row[names[b]]), int(names[b]), 1.0 if rank[b] == len(q) else 0.9) for b in best]
+
+    def _fuzzy(self, q: str, mission: Optional[str], limit: int) -> List[Tuple[int, int, float]]:
+        grams = [g for g in _trigrams(q) if g in self.postings]
+        if not grams:
+            return []
+        hits = np.bincount(np.concatenate([self.postings[g] for g in grams]), minlength=len(self.name_text))
+        cand = np.flatnonzero(hits)
+        score = hits[cand] / (len(_trigrams(q)) + self.name_trigrams[cand] - hits[cand])
+        keep = score >= SEARCH_MIN_SIMILARITY
+        if mission:
+            keep &= self.mission[self.name_row[cand]] == mission
+        cand, score = cand[keep], score[keep]
+        take = min(cand.size, limit * 4)
+        if take == 0:
+            return []
+        best = np.argpartition(-score, take - 1)[:take] if take < cand.size else np.arange(cand.size)
+        best = best[np.argsort(-score[best], kind="stable")]
+        # aproximados sempre abaixo dos de prefixo (0.9)
+        return [(int(self.name_row[cand[b]]), int(cand[b]), round(0.8 * float(score[b]), 4)) for b in best]
+
+    def query(self, text: str, limit: int, mission: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Até `limit` linhas para o texto digitado: prefixo primeiro, aproximados completando.
+        """
+        q = normalize(text)
+        if not q:
+            return []
+        hits = self._prefix(q, mission, limit)
+        if len({r for r, _, _ in hits}) < limit and len(q) >= 3:
+            hits += self._fuzzy(q, mission, limit)
+        out: List[Dict[str, Any]] = []
+        seen = set()
+        for row, name, score in hits:
+            if row in seen:
+                continue
+            seen.add(row)
+            out.append({
+                "id": int(self.ids[row]),
+                "mission": self.mission[row],
+                "object_id": self.object_id[row],
+                "alt_designations": self.alt_designations[row],
+                "final_classification": self.final_classification[row],
+                "matched": self.name_text[name],
+                "score": score,
+            })
+            if len(out) >= limit:
+                break
+        return out
+
+
+class SearchService(GenerationTracked[SearchIndex]):
+    """
+    Índice corrente + reconstrução em segundo plano quando a geração do catálogo muda.
+    """
+
+    name = "search"
+
+    def _load(self, sess: Session) -> SearchIndex:
+        return SearchIndex.load(sess)
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.value
+        return {
+            "rows": int(index.ids.size) if index is not None else 0,
+            "names": len(index.name_text) if index is not None else 0,
+            "keys": len(index.keys) if index is not None else 0,
+            **super().stats(),
+        }
+
+
+SEARCH = SearchService()
@@ -0,0 +1,166 @@
+"""
+Busca por similaridade no espaço de parâmetros físicos ("planetas parecidos com este").
+
+As colunas de SIMILAR_COLUMNS são lidas uma vez do banco para arrays numpy, transformadas
+(log10 nas de cauda longa) e padronizadas (z-score). As consultas vão a uma KD-tree
+(scipy cKDTree) em memória, sem varrer a tabela.
+
+Nulos: a distância usa só as colunas presentes na consulta. Existe uma árvore por
+conjunto de colunas, criada no primeiro uso, com as linhas que têm todas elas
+preenchidas. Linhas sem alguma dessas colunas ficam de fora daquela consulta; elas não
+entram com um valor inventado.
+
+O índice guarda a geração do catálogo. Quando um ingest ou uma reclassificação a
+incrementa, o índice é refeito numa thread, e as consultas seguem no índice anterior
+até a troca.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sqlmodel import Session, select
+
+from cache import GenerationTracked, current_generation
+from models import ExoplanetCatalog
+
+SIMILAR_COLUMNS = ["planet_radius", "eq_temperature", "insol_flux", "orbital_period", "stellar_temperature"]
+# cauda longa (várias ordens de grandeza): distância em log10; valores <= 0 contam como nulos
+LOG_COLUMNS = {"planet_radius", "insol_flux", "orbital_period"}
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", "100"))
+
+Mask = Tuple[str, ...]
+
+
+def transform(column: str, values) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.float64)
+    if column in LOG_COLUMNS:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            arr = np.where(arr > 0, np.log10(arr), np.nan)
+    return np.where(np.isfinite(arr), arr, np.nan)
+
+
+class SimilarityIndex:
+    """
+    Snapshot imutável do catálogo (ids, missão, classificação e colunas padronizadas)
+    mais as KD-trees por conjunto de colunas.
+    """
+
+    def __init__(self, ids: np.ndarray, mission: np.ndarray, fc: np.ndarray, raw: Dict[str, np.ndarray], generation: int):
+        self.ids = ids
+        self.mission = mission
+        self.final_classification = fc
+        self.generation = generation
+        self.mean: Dict[str, float] = {}
+        self.std: Dict[str, float] = {}
+        cols = []
+        for c in SIMILAR_COLUMNS:
+            t = transform(c, raw[c])
+            valid = t[np.isfinite(t)]
+            self.mean[c] = float(valid.mean()) if valid.size else 0.0
+            self.std[c] = float(valid.std()) if valid.size > 1 and valid.std() > 0 else 1.0
+            cols.append((t - self.mean[c]) / self.std[c])
+        self.Z = np.column_stack(cols)
+        self._trees: Dict[Mask, Tuple[cKDTree, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, sess: Session) -> "SimilarityIndex":
+        generation = current_generation(sess)
+        stmt = select(
+            ExoplanetCatalog.id, ExoplanetCatalog.mission, ExoplanetCatalog.final_classification,
+            *[getattr(ExoplanetCatalog, c) for c in SIMILAR_COLUMNS],
+        ).order_by(ExoplanetCatalog.id)
+        rows = sess.exec(stmt).all()
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        mission = np.array([r[1] for r in rows], dtype=object)
+        fc = np.array([r[2] for r in rows], dtype=object)
+        raw = {c: np.array([r[j + 3] for r in rows], dtype=np.float64) for j, c in enumerate(SIMILAR_COLUMNS)}
+        return cls(ids, mission, fc, raw, generation)
+
+    def standardize(self, values: Dict[str, float]) -> Dict[str, float]:
+        out = {}
+        for c, v in values.items():
+            t = transform(c, [v])[0]
+            if np.isfinite(t):
+                out[c] = float((t - self.mean[c]) / self.std[c])
+        return out
+
+    def tree(self, mask: Mask) -> Tuple[cKDTree, np.ndarray]:
+        """
+        (árvore, posições das linhas) para as colunas `mask`, só com linhas completas nelas.
+        """
+        entry = self._trees.get(mask)
+        if entry is None:
+            with self._lock:
+                entry = self._trees.get(mask)
+                if entry is None:
+                    cols = [SIMILAR_COLUMNS.index(c) for c in mask]
+                    sub = self.Z[:, cols]
+                    rows = np.flatnonzero(np.isfinite(sub).all(axis=1))
+                    entry = (cKDTree(sub[rows]), rows)
+                    self._trees[mask] = entry
+        return entry
+
+    def query(
+        self,
+        point: Dict[str, float],
+        k: int,
+        exclude_id: Optional[int] = None,
+        mission: Optional[str] = None,
+        final_classification: Optional[str] = None,
+    ) -> Tuple[Mask, List[Tuple[int, float]]]:
+        """
+        Até k vizinhos (id, distância euclidiana no espaço padronizado) do ponto padronizado
+        `point`, usando só as colunas presentes nele. Filtros são aplicados sobre os vizinhos
+        mais próximos, pedindo mais à árvore até completar k ou esgotar as linhas.
+        """
+        mask: Mask = tuple(c for c in SIMILAR_COLUMNS if c in point)
+        if not mask:
+            return mask, []
+        tree, rows = self.tree(mask)
+        if not rows.size:
+            return mask, []
+        x = np.array([point[c] for c in mask])
+        want = k + (exclude_id is not None)
+        ask = want
+        while True:
+            ask = min(ask, rows.size)
+            dist, idx = tree.query(x, k=ask)
+            dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+            pos = rows[idx]
+            keep = np.ones(pos.size, dtype=bool)
+            if exclude_id is not None:
+                keep &= self.ids[pos] != exclude_id
+            if mission:
+                keep &= self.mission[pos] == mission
+            if final_classification:
+                keep &= self.final_classification[pos] == final_classification
+            if keep.sum() >= k or ask == rows.size:
+                break
+            ask *= 4
+        hits = [(int(self.ids[p]), float(d)) for p, d in zip(pos[keep], dist[keep])][:k]
+        return mask, hits
+
+
+class SimilarityService(GenerationTracked[SimilarityIndex]):
+    """
+    Índice corrente + reconstrução em segundo plano quando a geração do catálogo muda.
+    """
+
+    name = "similar"
+
+    def _load(self, sess: Session) -> SimilarityIndex:
+        return SimilarityIndex.load(sess)
+
+    def stats(self) -> Dict[str, object]:
+        index = self.value
+        return {
+            "rows": int(index.ids.size) if index is not None else 0,
+            "trees": sorted(",".join(m) for m in index._trees) if index is not None else [],
+            **super().stats(),
+        }
+
+
+SIMILAR = SimilarityService()
@@ -0,0 +1,104 @@
+"""
+Pixelização do céu em zonas de declinação (estilo "zones"/igloo, área ~igual).
+
+O céu é cortado em faixas de ZONE_DEG graus de declinação; cada faixa é dividida
+em ~360/ZONE_DEG * cos(dec) fatias de RA. Os pixels são numerados faixa a faixa,
+então uma região (cone ou caixa) vira poucos intervalos contíguos de `sky_pixel`
+— ótimos para um índice B-tree — e o corte exato é feito depois sobre os candidatos.
+"""
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+ZONE_DEG = 0.5
+N_ZONES = int(round(180 / ZONE_DEG))
+
+_centers = -90.0 + (np.arange(N_ZONES) + 0.5) * ZONE_DEG
+ZONE_BINS = np.maximum(1, np.round(360.0 / ZONE_DEG * np.cos(np.radians(_centers)))).astype(np.int64)
+ZONE_OFFSET = np.concatenate([[0], np.cumsum(ZONE_BINS)[:-1]]).astype(np.int64)
+N_PIXELS = int(ZONE_BINS.sum())
+
+PixelRange = Tuple[int, int]
+
+
+def _zone(dec):
+    return np.clip(np.floor((np.asarray(dec, dtype=np.float64) + 90.0) / ZONE_DEG), 0, N_ZONES - 1).astype(np.int64)
+
+
+def sky_pixels(ra, dec) -> np.ndarray:
+    """
+    Pixel de cada (ra, dec) em graus (vetorizado). Retorna float com NaN onde faltar coordenada.
+    """
+    ra = np.asarray(ra, dtype=np.float64)
+    dec = np.asarray(dec, dtype=np.float64)
+    valid = np.isfinite(ra) & np.isfinite(dec)
+    z = _zone(np.where(valid, dec, 0.0))
+    n = ZONE_BINS[z]
+    b = np.minimum(np.floor(np.mod(np.where(valid, ra, 0.0), 360.0) / 360.0 * n), n - 1).astype(np.int64)
+    return np.where(valid, ZONE_OFFSET[z] + b, np.nan)
+
+
+def sky_pixel(ra, dec):
+    if ra is None or dec is None:
+        return None
+    pix = sky_pixels([ra], [dec])[0]
+    return None if np.isnan(pix) else int(pix)
+
+
+def _zone_ranges(z: int, ra_lo: float, ra_hi: float) -> List[PixelRange]:
+    n = int(ZONE_BINS[z])
+    off = int(ZONE_OFFSET[z])
+    if ra_hi - ra_lo >= 360.0:
+        return [(off, off + n - 1)]
+    lo = ra_lo % 360.0
+    hi = ra_hi % 360.0
+    b0 = min(int(lo / 360.0 * n), n - 1)
+    b1 = min(int(hi / 360.0 * n), n - 1)
+    if lo <= hi:
+        return [(off + b0, off + b1)]
+    return [(off + b0, off + n - 1), (off, off + b1)]  # cruza RA=0
+
+
+def _merge(ranges: List[PixelRange]) -> List[PixelRange]:
+    out: List[PixelRange] = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1] + 1:
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+def box_pixel_ranges(ra_min: float, ra_max: float, dec_min: float, dec_max: float) -> List[PixelRange]:
+    """
+    Intervalos de pixels que cobrem a caixa; ra_min > ra_max indica que a caixa cruza RA=0.
+    """
+    if ra_max < ra_min:
+        ra_max += 360.0
+    ranges: List[PixelRange] = []
+    for z in range(int(_zone(dec_min)), int(_zone(dec_max)) + 1):
+        ranges += _zone_ranges(z, ra_min, ra_max)
+    return _merge(ranges)
+
+
+def cone_pixel_ranges(ra: float, dec: float, radius: float) -> List[PixelRange]:
+    """
+    Intervalos de pixels que cobrem o cone (conservador: pode incluir pixels fora do cone).
+    """
+    dec_min = max(-90.0, dec - radius)
+    dec_max = min(90.0, dec + radius)
+    if abs(dec) + radius >= 90.0:
+        return box_pixel_ranges(0.0, 360.0, dec_min, dec_max)  # toca o polo: a faixa inteira de RA
+    # meia-largura máxima em RA de um círculo de raio r centrado em dec
+    alpha = math.degrees(math.asin(math.sin(math.radians(radius)) / math.cos(math.radians(dec))))
+    return box_pixel_ranges(ra - alpha, ra + alpha, dec_min, dec_max)
+
+
+def angular_distance(ra1, dec1, ra2, dec2) -> np.ndarray:
+    """
+    Distância angular em graus (haversine), vetorizada.
+    """
+    ra1, dec1, ra2, dec2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (ra1, dec1, ra2, dec2))
+    s = np.sin((dec2 - dec1) / 2) ** 2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(s, 0.0, 1.0))))
@@ -0,0 +1,147 @@
+"""
+Contagens por faceta e histogramas do catálogo.
+
+Tudo é agregado no banco (GROUP BY no índice do bin), nunca linha a linha em Python.
+Os resumos sem filtro por missão são pré-calculados no fim do ingest (tabela
+catalog_summary) e servidos direto enquanto a geração do catálogo não mudar.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, case, cast
+from sqlmodel import Session, select, func
+
+from filters import RANGE_FIELDS, CatalogFilters
+from models import CatalogSummary, ExoplanetCatalog
+
+NUMERIC_COLUMNS = ["longitude", "latitude"] + RANGE_FIELDS
+SCALES = {"linear", "log"}
+SUMMARY_BINS = 30
+SUMMARY_SCOPES = ["all", "kepler", "k2", "tess"]
+
+
+def facet_counts(sess: Session, filters: Optional[CatalogFilters] = None) -> Dict[str, Any]:
+    stmt = select(ExoplanetCatalog.mission, ExoplanetCatalog.final_classification, func.count()).group_by(
+        ExoplanetCatalog.mission, ExoplanetCatalog.final_classification
+    )
+    if filters is not None:
+        stmt = filters.apply(stmt)
+    by_mission: Dict[str, int] = {}
+    by_class: Dict[str, int] = {}
+    cross: Dict[str, Dict[str, int]] = {}
+    total = 0
+    for mission, fc, n in sess.exec(stmt).all():
+        fc = fc or "unknown"
+        by_mission[mission] = by_mission.get(mission, 0) + n
+        by_class[fc] = by_class.get(fc, 0) + n
+        cross.setdefault(mission, {})[fc] = n
+        total += n
+    return {"total": total, "mission": by_mission, "final_classification": by_class, "mission_classification": cross}
+
+
+def histogram(
+    sess: Session,
+    column: str,
+    filters: Optional[CatalogFilters] = None,
+    bins: int = SUMMARY_BINS,
+    scale: str = "linear",
+    lo: Optional[float] = None,
+    hi: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Histograma de `column` com `bins` bins fixos (linear) ou logarítmicos (log: só valores > 0).
+    Sem lo/hi, o intervalo vem de MIN/MAX sob os mesmos filtros.
+    """
+    col = getattr(ExoplanetCatalog, column)
+
+    def scoped(stmt):
+        stmt = filters.apply(stmt) if filters is not None else stmt
+        return stmt.where(col > 0) if scale == "log" else stmt
+
+    nulls_stmt = select(func.count()).select_from(ExoplanetCatalog).where(col.is_(None))
+    nulls = sess.exec(filters.apply(nulls_stmt) if filters is not None else nulls_stmt).one()
+
+    if lo is None or hi is None:
+        mn, mx = sess.exec(scoped(select(func.min(col), func.max(col)).select_from(ExoplanetCatalog))).one()
+        lo = mn if lo is None else lo
+        hi = mx if hi is None else hi
+    out: Dict[str, Any] = {"column": column, "scale": scale, "bins": bins, "nulls": int(nulls)}
+    if lo is None or hi is None or (scale == "log" and (lo <= 0 or hi <= 0)):
+        return {**out, "edges": [], "counts": [], "count": 0}
+
+    t_lo, t_hi = (math.log(lo), math.log(hi)) if scale == "log" else (float(lo), float(hi))
+    width = (t_hi - t_lo) / bins if t_hi > t_lo else 1.0
+    expr = func.ln(col) if scale == "log" else col
+    # floor explícito: CAST de float para inteiro trunca no SQLite mas arredonda no Postgres
+    raw_idx = cast(func.floor((expr - t_lo) / width), Integer)
+    idx = case((raw_idx >= bins, bins - 1), else_=raw_idx)  # o máximo cai no último bin
+
+    stmt = scoped(select(idx.label("b"), func.count()).select_from(ExoplanetCatalog).where(col >= lo, col <= hi))
+    counts = [0] * bins
+    for b, n in sess.exec(stmt.group_by("b")).all():
+        if b is not None and 0 <= b < bins:
+            counts[int(b)] += n
+
+    edges = [t_lo + i * width for i in range(bins + 1)]
+    if scale == "log":
+        edges = [math.exp(e) for e in edges]
+    return {**out, "edges": edges, "counts": counts, "count": sum(counts), "min": lo, "max": hi}
+
+
+def build_summaries(sess: Session, generation: int) -> int:
+    """
+    Pré-calcula facetas + histogramas (linear e log, SUMMARY_BINS) por missão e geral.
+    Chamado no fim do ingest; substitui os resumos anteriores.
+    """
+    CatalogSummary.__table__.create(sess.get_bind(), checkfirst=True)
+    for row in sess.exec(select(CatalogSummary)).all():
+        sess.delete(row)
+    for scope in SUMMARY_SCOPES:
+        filters = None if scope == "all" else CatalogFilters.of(mission=scope)
+        payload = {
+            "facets": facet_counts(sess, filters),
+            "histograms": {
+                c: {s: histogram(sess, c, filters, SUMMARY_BINS, s) for s in sorted(SCALES)} for c in NUMERIC_COLUMNS
+            },
+        }
+        sess.add(CatalogSummary(scope=scope, generation=generation, payload=payload))
+    sess.flush()
+    return len(SUMMARY_SCOPES)
+
+
+def load_summary(sess: Session, scope: str, generation: int) -> Optional[Dict[str, Any]]:
+    try:
+        row = sess.get(CatalogSummary, scope)
+    except Exception:
+        sess.rollback()
+        return None  # tabela ainda não existe
+    if row is None or row.generation != generation:
+        return None
+    return row.payload
+
+
+def catalog_stats(
+    sess: Session,
+    filters: CatalogFilters,
+    columns: List[str],
+    bins: int,
+    scale: str,
+    lo: Optional[float],
+    hi: Optional[float],
+    generation: int,
+) -> Dict[str, Any]:
+    # sem filtros além da missão e com bins/intervalo padrão: resposta vem do resumo pré-calculado
+    only_mission = {k for k in filters.as_dict()} <= {"mission"}
+    if only_mission and bins == SUMMARY_BINS and lo is None and hi is None:
+        summary = load_summary(sess, filters.mission or "all", generation)
+        if summary is not None and all(c in summary["histograms"] for c in columns):
+            return {
+                "source": "summary",
+                "facets": summary["facets"],
+                "histograms": {c: summary["histograms"][c][scale] for c in columns},
+            }
+    return {
+        "source": "live",
+        "facets": facet_counts(sess, filters),
+        "histograms": {c: histogram(sess, c, filters, bins, scale, lo, hi) for c in columns},
+    }
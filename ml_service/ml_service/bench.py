@@ -0,0 +1,69 @@
+"""Latency of the ensemble with sklearn vs compiled (numpy) inference.
+
+    python -m ml_service.bench --mission kepler --repeat 300 --batch 10000
+"""
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .store import ModelStore
+from .features import FEATURE_STORE
+from .training import ENSEMBLE_MODELS, FEATURES, MISSIONS, ModelRegistry
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm up (lazy unpickle / compile)
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return sorted(out)
+
+
+def _summary(ms: List[float]) -> Dict[str, float]:
+    return {"p50": ms[len(ms) // 2], "p99": ms[min(len(ms) - 1, int(len(ms) * 0.99))]}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--mission", choices=MISSIONS, default="kepler")
+    ap.add_argument("--repeat", type=int, default=300, help="single-row predictions per engine")
+    ap.add_argument("--batch", type=int, default=10000, help="rows for the batch timing")
+    args = ap.parse_args()
+
+    reg = ModelRegistry()
+    reg.load_or_fit(ModelStore())
+    X = np.nan_to_num(FEATURE_STORE.get(args.mission).matrix(FEATURES))
+    rng = np.random.default_rng(0)
+    rows = X[rng.integers(0, len(X), args.repeat)]
+    batch = X[rng.integers(0, len(X), args.batch)]
+    one = [dict(zip(FEATURES, r)) for r in rows]
+
+    # agreement over the whole dataset, per model (compiled engine called directly, no row cap)
+    for name in ENSEMBLE_MODELS:
+        key = (args.mission, name, True)
+        ref = reg.models[key].predict_proba(X)
+        got = reg.compiled_model(key).predict_proba(X)
+        same = (ref.argmax(axis=1) == got.argmax(axis=1)).mean()
+        print(f"[bench] {name:14s} max |Δproba| = {np.abs(ref - got).max():.2e}  labels equal = {same:.4%}")
+
+    for compiled in (False, True):
+        reg.compiled_inference = compiled
+        engine = "compiled" if compiled else "sklearn"
+        it = iter(one * 2)
+        single = _summary(_timed(lambda: reg.predict(args.mission, next(it)), args.repeat))
+        per_model = {}
+        for name in ENSEMBLE_MODELS:
+            key = (args.mission, name, True)
+            per_model[name] = _summary(_timed(lambda: reg.predict_proba(key, rows[:1]), min(args.repeat, 100)))["p50"]
+        bulk = _summary(_timed(lambda: reg.predict_batch(args.mission, batch), 3))["p50"]
+        print(f"[bench] {engine:8s} /predict p50={single['p50']:.2f}ms p99={single['p99']:.2f}ms  "
+              f"batch {args.batch} rows={bulk:.0f}ms ({args.batch / bulk * 1000:,.0f} rows/s)")
+        print("         per model p50 (ms): " + ", ".join(f"{n}={v:.2f}" for n, v in per_model.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .training import FEATURES
+
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "4096"))
+# seconds; 0 disables expiry (entries still go away on eviction or model reload)
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "3600"))
+
+
+def canonical_features(features: Dict[str, float]) -> Tuple[float, ...]:
+    # only the model inputs matter, in training order, with predict()'s 0.0 default
+    return tuple(float(features.get(name, 0.0)) for name in FEATURES)
+
+
+class PredictionCache:
+    """Bounded LRU (+ optional TTL) in front of ModelRegistry.predict.
+
+    Keys carry the registry's model version, so a reload/retrain never serves stale
+    predictions; clear() drops the old entries right away."""
+
+    def __init__(self, maxsize: int = PREDICT_CACHE_SIZE, ttl: float = PREDICT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @staticmethod
+    def key(mission: str, model_version: Any, features: Dict[str, float]) -> Hashable:
+        return (mission, model_version, canonical_features(features))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,188 @@
+"""Compiled (numpy-only) inference for the fitted ensemble pipelines.
+
+Each supported Pipeline from training._models() is flattened into plain arrays once,
+so predict_proba skips sklearn's per-call validation/dispatch (and the joblib fan-out
+of the 200-tree forest). Probabilities match sklearn's to float rounding."""
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+# 0 = always go through sklearn's predict_proba
+COMPILED_INFERENCE = os.getenv("COMPILED_INFERENCE", "1").lower() in {"1", "true", "on", "yes"}
+# above this many rows, trees/knn go back to sklearn (its Cython loops win on wide batches)
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", "32"))
+# the 200-tree forest visits every node array once per level; 4 MB blocks of (trees x rows) stay cache friendly
+TREE_BLOCK = 1 << 19
+# rows per distance block for knn (rows x n_train doubles)
+KNN_BLOCK = 256
+
+
+class CompiledModel(ABC):
+    """predict_proba(X) -> (n, n_classes) for an (n, len(FEATURES)) float64 matrix."""
+    classes_: np.ndarray
+    # largest batch this engine should take (None = any)
+    max_rows: Optional[int] = None
+
+    @abstractmethod
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        ...
+
+
+def _affine(scaler: Optional[StandardScaler], n_features: int):
+    """StandardScaler as z = x * a + b (identity without a scaler)."""
+    a = np.ones(n_features)
+    b = np.zeros(n_features)
+    if scaler is not None:
+        if scaler.scale_ is not None:
+            a = 1.0 / scaler.scale_
+        if scaler.mean_ is not None:
+            b = -scaler.mean_ * a
+    return a, b
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=1, keepdims=True)
+    return z
+
+
+class CompiledTrees(CompiledModel):
+    """One or more trees flattened into shared node arrays (leaves point to themselves),
+    evaluated level by level for all trees and rows at once."""
+    max_rows = COMPILED_MAX_ROWS
+
+    def __init__(self, trees: List, classes: np.ndarray):
+        self.classes_ = np.asarray(classes)
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for est in trees:
+            t = est.tree_
+            n = t.node_count
+            leaf = t.children_left < 0
+            idx = np.arange(n)
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(np.where(leaf, np.inf, t.threshold))
+            left.append(np.where(leaf, idx, t.children_left) + offset)
+            right.append(np.where(leaf, idx, t.children_right) + offset)
+            v = t.value[:, 0, :]
+            value.append(v / v.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += n
+            depth = max(depth, t.max_depth)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        node = np.repeat(self.roots[:, None], n, axis=1)
+        flat = X.ravel()
+        base = np.arange(n, dtype=np.intp)[None, :] * X.shape[1]
+        for _ in range(self.depth):
+            go_left = flat[base + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        step = max(1, TREE_BLOCK // len(self.roots))
+        out = np.empty((X.shape[0], len(self.classes_)))
+        for s in range(0, X.shape[0], step):
+            out[s:s + step] = self.value[self._leaves(X[s:s + step])].mean(axis=0)
+        return out
+
+
+class CompiledLinear(CompiledModel):
+    """StandardScaler folded into LogisticRegression's coefficients."""
+
+    def __init__(self, scaler: Optional[StandardScaler], clf: LogisticRegression):
+        self.classes_ = np.asarray(clf.classes_)
+        a, b = _affine(scaler, clf.coef_.shape[1])
+        self.coef = (clf.coef_ * a).T
+        self.intercept = clf.intercept_ + clf.coef_ @ b
+        n_classes = len(self.classes_)
+        self.multinomial = n_classes > 2 and clf.multi_class != "ovr" and clf.solver != "liblinear"
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        z = X @ self.coef + self.intercept
+        if self.multinomial:
+            return _softmax(z)
+        p = 1.0 / (1.0 + np.exp(-z))
+        if p.shape[1] == 1:
+            return np.hstack([1.0 - p, p])
+        return p / p.sum(axis=1, keepdims=True)
+
+
+class CompiledNB(CompiledModel):
+    def __init__(self, clf: GaussianNB):
+        self.classes_ = np.asarray(clf.classes_)
+        self.theta = clf.theta_
+        self.inv_var = 1.0 / clf.var_
+        self.const = np.log(clf.class_prior_) - 0.5 * np.log(2.0 * np.pi * clf.var_).sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        d = X[:, None, :] - self.theta[None, :, :]
+        jll = self.const - 0.5 * (d * d * self.inv_var).sum(axis=2)
+        return _softmax(jll)
+
+
+class CompiledKNN(CompiledModel):
+    """Brute-force uniform-weight kNN on the scaled training set (scaler as an affine map)."""
+    max_rows = COMPILED_MAX_ROWS
+
+    def __init__(self, scaler: Optional[StandardScaler], clf: KNeighborsClassifier):
+        self.classes_ = np.asarray(clf.classes_)
+        self.a, self.b = _affine(scaler, clf._fit_X.shape[1])
+        self.fit_X = np.ascontiguousarray(clf._fit_X, dtype=np.float64)
+        self.fit_sq = (self.fit_X ** 2).sum(axis=1)
+        self.y = np.asarray(clf._y).reshape(-1)
+        self.k = clf.n_neighbors
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        Z = X * self.a + self.b
+        out = np.zeros((Z.shape[0], len(self.classes_)))
+        for s in range(0, Z.shape[0], KNN_BLOCK):
+            z = Z[s:s + KNN_BLOCK]
+            d = self.fit_sq[None, :] - 2.0 * (z @ self.fit_X.T)  # + |z|^2, constant per row
+            nn = np.argpartition(d, self.k - 1, axis=1)[:, :self.k]
+            labels = self.y[nn]
+            for c in range(len(self.classes_)):
+                out[s:s + KNN_BLOCK, c] = (labels == c).sum(axis=1)
+        return out / self.k
+
+
+def compile_pipeline(pipe: Pipeline) -> Optional[CompiledModel]:
+    """Compiled twin of a fitted pipeline, or None if a step is not supported (sklearn path is kept)."""
+    steps = [s for _, s in pipe.steps]
+    *pre, clf = steps
+    if len(pre) > 1 or (pre and not isinstance(pre[0], StandardScaler)):
+        return None
+    scaler = pre[0] if pre else None
+    if isinstance(clf, RandomForestClassifier) and scaler is None:
+        return CompiledTrees(clf.estimators_, clf.classes_)
+    if isinstance(clf, DecisionTreeClassifier) and scaler is None:
+        return CompiledTrees([clf], clf.classes_)
+    if isinstance(clf, LogisticRegression):
+        return CompiledLinear(scaler, clf)
+    if isinstance(clf, GaussianNB) and scaler is None:
+        return CompiledNB(clf)
+    if isinstance(clf, KNeighborsClassifier) and clf.weights == "uniform" and clf.effective_metric_ == "euclidean":
+        return CompiledKNN(scaler, clf)
+    return None
+
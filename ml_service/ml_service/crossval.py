@@ -0,0 +1,116 @@
+"""k-fold cross-validated evaluation (`evaluation=cv` on /tests, /final and /compare).
+
+The served models are still fit on the 80/20 split; cross-validation only measures
+them. Each (mission, balanced) dataset gets one stratified fold assignment
+(CV_FOLDS folds, split seed), cached by the registry and shared by every model, so
+the per-model numbers are paired fold by fold. The folds x models x missions fits
+run in the training process pool. The per-fold metrics are persisted next to the
+models in the artifact store (`cv-<k>.json`), so a restart serves the aggregates
+without refitting anything.
+
+Aggregates per pipeline and metric: mean, sample std and a 95% confidence interval
+of the mean (Student t with k-1 degrees of freedom)."""
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import stats
+from sklearn.model_selection import StratifiedKFold
+
+CV_FOLDS = int(os.getenv("CV_FOLDS", "5"))
+# default `evaluation` of /tests, /final and /compare: holdout (80/20 split) | cv
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "holdout").lower()
+if EVALUATION_MODE not in ("holdout", "cv"):
+    raise ValueError(f"unknown EVALUATION_MODE '{EVALUATION_MODE}' (use holdout or cv)")
+# run the k-fold evaluation at startup when the store has none for the current key
+CV_ON_STARTUP = os.getenv("CV_ON_STARTUP", "1" if EVALUATION_MODE == "cv" else "0").lower() in {"1", "true", "on", "yes"}
+
+Key = Tuple[str, str, bool]
+
+
+def fold_assignment(y, folds: int, seed: int) -> np.ndarray:
+    """Fold id (0..folds-1) of every row; stratified on the label."""
+    out = np.empty(len(y), dtype=np.int8)
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for f, (_, test) in enumerate(skf.split(np.zeros(len(y)), y)):
+        out[test] = f
+    return out
+
+
+def summarize(per_fold: List[Dict[str, float]]) -> Dict[str, Dict[str, Any]]:
+    """{metric: {mean, std, ci95: [lo, hi]}} over the folds."""
+    out = {}
+    k = len(per_fold)
+    for metric in per_fold[0]:
+        vals = np.array([m[metric] for m in per_fold], dtype=np.float64)
+        mean = float(vals.mean())
+        std = float(vals.std(ddof=1)) if k > 1 else 0.0
+        half = float(stats.t.ppf(0.975, k - 1)) * std / math.sqrt(k) if k > 1 else 0.0
+        out[metric] = {"mean": mean, "std": std, "ci95": [mean - half, mean + half]}
+    return out
+
+
+def mean_report(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold-average of classification_report dicts (numeric leaves; keys missing in a fold are skipped)."""
+    out: Dict[str, Any] = {}
+    for key in reports[0]:
+        vals = [r[key] for r in reports if key in r]
+        if isinstance(vals[0], dict):
+            out[key] = mean_report(vals)
+        else:
+            out[key] = float(np.mean(vals))
+    return out
+
+
+def _key_str(key: Key) -> str:
+    mission, name, balanced = key
+    return f"{mission}/{name}/{'bal' if balanced else 'raw'}"
+
+
+def _key_parse(s: str) -> Key:
+    mission, name, bal = s.split("/")
+    return mission, name, bal == "bal"
+
+
+@dataclass
+class CrossValidation:
+    folds: int
+    seed: int
+    # artifact store key of the data/hyperparameters the folds were run on (None = not persisted)
+    version: Optional[str]
+    # per pipeline: metrics of each fold, in fold order
+    per_fold: Dict[Key, List[Dict[str, float]]]
+    # per pipeline: fold-averaged classification_report
+    reports: Dict[Key, Dict[str, Any]]
+    # per pipeline: mean fit time of one fold
+    fit_seconds: Dict[Key, float]
+    # wall time of the whole run
+    seconds: float = 0.0
+    summary: Dict[Key, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.summary:
+            self.summary = {k: summarize(v) for k, v in self.per_fold.items()}
+
+    def block(self, key: Key) -> Dict[str, Any]:
+        """The `cv` entry of a /tests row."""
+        s = self.summary[key]
+        return {"folds": self.folds, "seed": self.seed,
+                "std": {m: v["std"] for m, v in s.items()},
+                "ci95": {m: v["ci95"] for m, v in s.items()},
+                "per_fold": self.per_fold[key]}
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"folds": self.folds, "seed": self.seed, "version": self.version, "seconds": self.seconds,
+                "results": [{"key": _key_str(k), "per_fold": v, "report": self.reports[k],
+                             "fit_seconds": self.fit_seconds[k]} for k, v in self.per_fold.items()]}
+
+    @classmethod
+    def from_json(cls, d: Dict[str, Any]) -> "CrossValidation":
+        rows = {_key_parse(r["key"]): r for r in d["results"]}
+        return cls(folds=d["folds"], seed=d["seed"], version=d.get("version"), seconds=d.get("seconds", 0.0),
+                   per_fold={k: r["per_fold"] for k, r in rows.items()},
+                   reports={k: r["report"] for k, r in rows.items()},
+                   fit_seconds={k: r["fit_seconds"] for k, r in rows.items()})
@@ -0,0 +1,139 @@
+"""Ensemble voting over per-model probabilities.
+
+Every member's predict_proba is computed once (ModelRegistry.predict_proba) and the
+strategy derives labels and a confidence from those arrays:
+
+- majority: planet/non_planet vote with candidate neutral (the original rule, default)
+- hard:     plurality of the members' argmax labels
+- soft:     argmax of the mean probability
+- weighted: soft vote weighted by each member's `/tests` metric (ENSEMBLE_WEIGHT_METRIC)
+- stacking: logistic regression over the members' probabilities, fit on the held-out split
+
+With early_exit the members run cheapest first and stop once no remaining member
+can change any row's label (not available for stacking, which needs every input)."""
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+Strategy = Literal["majority", "hard", "soft", "weighted", "stacking"]
+STRATEGIES: Tuple[str, ...] = ("majority", "hard", "soft", "weighted", "stacking")
+# class order of every aligned probability matrix
+CLASSES: Tuple[str, ...] = ("candidate", "non_planet", "planet")
+RULES = {
+    "majority": "majority_vote_candidate_neutral",
+    "hard": "plurality_vote",
+    "soft": "mean_proba",
+    "weighted": "metric_weighted_proba",
+    "stacking": "stacked_log_reg",
+}
+# evaluation order for early exit: cheapest members first
+COST_ORDER: List[str] = ["log_reg", "gaussian_nb", "decision_tree", "knn", "random_forest"]
+ENSEMBLE_WEIGHT_METRIC = os.getenv("ENSEMBLE_WEIGHT_METRIC", "f1_weighted")
+
+
+def parse_strategies(value: str) -> Dict[str, str]:
+    """ENSEMBLE_STRATEGY: "soft" for every mission, or "majority,kepler=weighted,tess=soft"."""
+    out: Dict[str, str] = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        mission, _, strategy = part.rpartition("=")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown ensemble strategy '{strategy}' (use one of {', '.join(STRATEGIES)})")
+        out[mission or "*"] = strategy
+    return out
+
+
+DEFAULT_STRATEGIES = parse_strategies(os.getenv("ENSEMBLE_STRATEGY", "majority"))
+
+
+@dataclass(frozen=True)
+class EnsembleSpec:
+    strategy: str
+    models: Tuple[str, ...]
+    early_exit: bool = False
+
+    @property
+    def order(self) -> List[str]:
+        if self.early_exit and self.strategy != "stacking":
+            return sorted(self.models, key=lambda m: COST_ORDER.index(m) if m in COST_ORDER else len(COST_ORDER))
+        return list(self.models)
+
+
+def resolve_spec(
+    mission: str,
+    members: Sequence[str],
+    strategy: Optional[str] = None,
+    models: Optional[Sequence[str]] = None,
+    early_exit: bool = False,
+) -> EnsembleSpec:
+    strategy = strategy or DEFAULT_STRATEGIES.get(mission) or DEFAULT_STRATEGIES.get("*", "majority")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown ensemble strategy '{strategy}'")
+    if models:
+        unknown = [m for m in models if m not in members]
+        if unknown:
+            raise ValueError(f"unknown model(s) {', '.join(unknown)} (ensemble members: {', '.join(members)})")
+        # keep the canonical member order so equal subsets share cache keys and stackers
+        chosen = tuple(m for m in members if m in set(models))
+    else:
+        chosen = tuple(members)
+    return EnsembleSpec(strategy=strategy, models=chosen, early_exit=early_exit)
+
+
+def align(classes: Sequence, proba: np.ndarray) -> np.ndarray:
+    """(n, len(CLASSES)) view of a model's predict_proba, zero for classes it never saw."""
+    if tuple(str(c) for c in classes) == CLASSES:
+        return proba
+    out = np.zeros((proba.shape[0], len(CLASSES)))
+    for j, c in enumerate(classes):
+        out[:, CLASSES.index(str(c))] = proba[:, j]
+    return out
+
+
+class Vote:
+    """Running vote over the members evaluated so far (one row per input)."""
+
+    def __init__(self, spec: EnsembleSpec, n: int, weights: Optional[Dict[str, float]] = None):
+        self.spec = spec
+        self.weights = weights or {}
+        self.remaining = {m: self._weight(m) for m in spec.models}
+        self.total = np.zeros((n, len(CLASSES)))
+        self.top_sum = np.zeros(n)  # majority: sum of each member's max proba
+        self.seen = 0
+
+    def _weight(self, model: str) -> float:
+        return self.weights.get(model, 1.0) if self.spec.strategy == "weighted" else 1.0
+
+    def add(self, model: str, P: np.ndarray) -> None:
+        s = self.spec.strategy
+        w = self.remaining.pop(model)
+        self.seen += 1
+        if s in ("majority", "hard"):
+            self.total[np.arange(P.shape[0]), P.argmax(axis=1)] += 1.0
+            self.top_sum += P.max(axis=1)
+        else:
+            self.total += w * P
+
+    def decided(self) -> bool:
+        """True once the remaining members cannot flip any row's label."""
+        left = sum(self.remaining.values())
+        if not left:
+            return True
+        if self.spec.strategy == "majority":
+            v = self.total[:, CLASSES.index("planet")] - self.total[:, CLASSES.index("non_planet")]
+            return bool(np.all((v - left >= 1) | (v + left < 1)))
+        # each remaining member moves the top-vs-runner-up margin by at most its weight
+        part = np.sort(self.total, axis=1)
+        return bool(np.all(part[:, -1] - part[:, -2] > left))
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        s = self.spec.strategy
+        if s == "majority":
+            v = self.total[:, CLASSES.index("planet")] - self.total[:, CLASSES.index("non_planet")]
+            return np.where(v >= 1, "planet", "non_planet"), self.top_sum / self.seen
+        idx = self.total.argmax(axis=1)
+        labels = np.asarray(CLASSES)[idx]
+        if s == "hard":
+            return labels, self.total.max(axis=1) / self.seen
+        return labels, self.total.max(axis=1) / self.total.sum(axis=1)
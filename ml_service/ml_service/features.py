@@ -0,0 +1,180 @@
+"""Columnar feature store for the mission datasets.
+
+Each `data/<mission>/<mission>_data_treated.pkl` is converted once into one .npy file
+per column (labels already normalized, string columns as the smallest unsigned codes
+that fit their vocabulary) plus a meta.json with row count, class counts and column stats.
+Columns are opened with mmap_mode="r", so every process reads the same page-cache pages
+and `/datasets` never touches the data."""
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+
+Mission = Literal["kepler", "k2", "tess"]
+
+DATA_DIR = Path(__file__).parent / "data"
+FEATURE_STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR", str(Path(__file__).parent / "feature_store")))
+# bump when the on-disk layout or the label normalization changes
+FEATURE_STORE_FORMAT = 2
+LABELS = ["planet", "non_planet", "candidate"]
+
+
+def dataset_path(mission: Mission) -> Path:
+    return DATA_DIR / mission / f"{mission}_data_treated.pkl"
+
+
+def _map_labels(series: pd.Series) -> pd.Series:
+    # Normalize labels found in the provided datasets
+    mapping = {
+        "not planet": "non_planet",
+        "NOT PLANET": "non_planet",
+        "non_planet": "non_planet",
+        "planet": "planet",
+        "candidate": "candidate",
+        "CANDIDATE": "candidate",
+        "CONFIRMED": "planet",
+        "FALSE POSITIVE": "non_planet",
+        "REFUTED": "non_planet",
+    }
+    return series.map(lambda v: mapping.get(str(v).strip(), "candidate"))
+
+
+def read_pickle_dataset(mission: Mission) -> pd.DataFrame:
+    """The original loader: unpickle, normalize labels, keep known classes."""
+    df = pd.read_pickle(dataset_path(mission))
+    df = df.copy()
+    df["classification"] = _map_labels(df["classification"])
+    # Keep only known classes
+    df = df[df["classification"].isin(LABELS)]
+    return df
+
+
+def _source_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+def _column_stats(arr: np.ndarray) -> Dict[str, Any]:
+    valid = arr[~np.isnan(arr)]
+    if not len(valid):
+        return {"nulls": int(len(arr))}
+    return {
+        "min": float(valid.min()), "max": float(valid.max()),
+        "mean": float(valid.mean()), "std": float(valid.std()),
+        "nulls": int(len(arr) - len(valid)),
+    }
+
+
+class MissionData:
+    """Read-only columns of one mission (np.memmap views) plus its cached metadata."""
+
+    def __init__(self, root: Path, meta: Dict[str, Any]):
+        self.root = root
+        self.meta = meta
+        self.rows: int = meta["rows"]
+        self.columns: Dict[str, np.ndarray] = {
+            c["name"]: np.load(root / f"{c['name']}.npy", mmap_mode="r") for c in meta["columns"]
+        }
+        self.vocab: Dict[str, List[str]] = {c["name"]: c["vocab"] for c in meta["columns"] if "vocab" in c}
+        self.index = np.load(root / "_index.npy", mmap_mode="r")
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view; string columns come back decoded (a new object array)."""
+        arr = self.columns[name]
+        if name in self.vocab:
+            return np.asarray(self.vocab[name], dtype=object)[arr]
+        return arr
+
+    def matrix(self, names: List[str]) -> np.ndarray:
+        return np.column_stack([self.columns[n] for n in names]).astype(np.float64, copy=False)
+
+    def frame(self) -> pd.DataFrame:
+        """Same frame the pickle loader returned (columns, dtypes and index)."""
+        return pd.DataFrame({c["name"]: self.column(c["name"]) for c in self.meta["columns"]},
+                            index=pd.Index(np.asarray(self.index)))
+
+
+class FeatureStore:
+    def __init__(self, root: Path = FEATURE_STORE_DIR):
+        self.root = Path(root)
+        self._open: Dict[str, MissionData] = {}
+        self._lock = threading.Lock()
+
+    def path(self, mission: Mission) -> Path:
+        return self.root / mission
+
+    def _meta(self, mission: Mission) -> Optional[Dict[str, Any]]:
+        try:
+            meta = orjson.loads((self.path(mission) / "meta.json").read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        if meta.get("format") != FEATURE_STORE_FORMAT or meta.get("source") != _source_digest(dataset_path(mission)):
+            return None
+        return meta
+
+    def build(self, mission: Mission) -> Dict[str, Any]:
+        df = read_pickle_dataset(mission)
+        final = self.path(mission)
+        tmp = self.root / f".{mission}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        columns = []
+        for name in df.columns:
+            s = df[name]
+            if s.dtype == object:
+                vocab = sorted(s.astype(str).unique().tolist())
+                # every value is in vocab, so codes are never -1; uint8 up to 255 categories
+                codes = pd.Categorical(s.astype(str), categories=vocab).codes.astype(np.min_scalar_type(len(vocab)))
+                np.save(tmp / f"{name}.npy", codes)
+                columns.append({"name": name, "dtype": "str", "vocab": vocab})
+            else:
+                arr = s.to_numpy()
+                np.save(tmp / f"{name}.npy", arr)
+                entry = {"name": name, "dtype": str(arr.dtype)}
+                if np.issubdtype(arr.dtype, np.floating):
+                    entry["stats"] = _column_stats(arr)
+                columns.append(entry)
+        np.save(tmp / "_index.npy", df.index.to_numpy())
+        meta = {
+            "format": FEATURE_STORE_FORMAT,
+            "mission": mission,
+            "source": _source_digest(dataset_path(mission)),
+            "rows": int(len(df)),
+            "by_class": {str(k): int(v) for k, v in df["classification"].value_counts().items()},
+            "columns": columns,
+        }
+        # meta.json is written last: its presence marks a complete entry
+        (tmp / "meta.json").write_bytes(orjson.dumps(meta))
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return meta
+
+    def get(self, mission: Mission) -> MissionData:
+        data = self._open.get(mission)
+        if data is not None:
+            return data
+        with self._lock:
+            if mission not in self._open:
+                meta = self._meta(mission) or self.build(mission)
+                self._open[mission] = MissionData(self.path(mission), meta)
+            return self._open[mission]
+
+    def summary(self, missions) -> Dict[str, Any]:
+        """`/datasets` payload, straight from the cached metadata."""
+        out = {}
+        for mission in missions:
+            meta = self.get(mission).meta
+            out[mission] = {
+                "rows": meta["rows"],
+                "by_class": meta["by_class"],
+                "columns": {c["name"]: c["stats"] for c in meta["columns"] if "stats" in c},
+            }
+        return out
+
+
+FEATURE_STORE = FeatureStore()
@@ -0,0 +1,101 @@
+"""Incremental updates of the fitted pipelines from newly labeled rows.
+
+Instead of a full fit_all, each pipeline absorbs the new rows the cheapest way its
+estimator allows:
+
+- gaussian_nb:   partial_fit on the new rows only (running class means/variances)
+- log_reg:       StandardScaler.partial_fit on the new rows, then a warm-started refit
+                 (starts from the current coefficients, converges in a few iterations)
+- random_forest: warm_start adds INCREMENTAL_TREES trees grown on the extended data,
+                 the oldest trees are retired past INCREMENTAL_MAX_TREES
+- knn, decision_tree: refit on the extended data (already cheap)
+
+A pipeline whose classes would change (a label it never saw) is refit from scratch.
+Running statistics cannot forget a row, so when the batch revises rows absorbed by an
+earlier update (new label or features), gaussian_nb is refit and the log_reg scaler is
+re-estimated on the extended data instead."""
+import copy
+import os
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+
+# trees added to the forest per update
+INCREMENTAL_TREES = int(os.getenv("INCREMENTAL_TREES", "20"))
+# forest size cap; the oldest trees are dropped beyond it (keeps predict latency flat)
+INCREMENTAL_MAX_TREES = int(os.getenv("INCREMENTAL_MAX_TREES", "300"))
+# share of the new rows held out for evaluation (picked by a hash of the object id, so stable across updates)
+INCREMENTAL_HOLDOUT = float(os.getenv("INCREMENTAL_HOLDOUT", "0.2"))
+
+
+def holdout_mask(ids) -> np.ndarray:
+    """True for the rows kept out of training; the same id always lands on the same side."""
+    cut = int(INCREMENTAL_HOLDOUT * 1000)
+    return np.fromiter((zlib.crc32(str(i).encode()) % 1000 < cut for i in ids), dtype=bool, count=len(ids))
+
+
+def merge_rows(prev: Optional[pd.DataFrame], new: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(all rows, delta): rows are indexed by object id, the last label of an id wins.
+    delta holds the rows that are new or changed (features or label), so replaying a
+    batch that was already absorbed is a no-op."""
+    new = new[~new.index.duplicated(keep="last")]
+    if prev is None or prev.empty:
+        return new, new
+    seen = new.index.isin(prev.index)
+    old = prev.reindex(new.index[seen])
+    same = (old.to_numpy() == new[seen].to_numpy()) | (old.isna().to_numpy() & new[seen].isna().to_numpy())
+    changed = np.zeros(len(new), dtype=bool)
+    changed[~seen] = True
+    changed[seen] = ~same.all(axis=1)
+    merged = pd.concat([prev[~prev.index.isin(new.index)], new])
+    return merged, new[changed]
+
+
+def update_pipeline(pipe: Pipeline, fresh: Pipeline, X_all: pd.DataFrame, y_all: pd.Series,
+                    X_new: pd.DataFrame, y_new: pd.Series, seed: int, revised: bool = False) -> Tuple[Pipeline, str]:
+    """(pipeline, method) with X_new/y_new absorbed. `pipe` (served) is never mutated;
+    `fresh` is an unfitted copy from _models() used for refits. `revised`: X_new replaces rows
+    `pipe` already absorbed, so running statistics must be rebuilt rather than extended."""
+    if X_new.empty:
+        return pipe, "unchanged"
+    clf = pipe.steps[-1][1]
+    if not set(y_new.unique()) <= {str(c) for c in clf.classes_}:
+        return fresh.fit(X_all, y_all), "refit"
+    if isinstance(clf, GaussianNB) and len(pipe.steps) == 1:
+        if revised:
+            return fresh.fit(X_all, y_all), "refit"
+        out = copy.deepcopy(pipe)
+        out.steps[-1][1].partial_fit(X_new, y_new)
+        return out, "partial_fit"
+    if isinstance(clf, LogisticRegression):
+        out = copy.deepcopy(pipe)
+        *pre, (_, lr) = out.steps
+        X = X_all
+        for _, step in pre:
+            # StandardScaler merges the new rows into its running mean/variance
+            if revised:
+                step.fit(X)
+            else:
+                step.partial_fit(X_new)
+            X = step.transform(X)
+        lr.set_params(warm_start=True)
+        lr.fit(X, y_all)
+        lr.set_params(warm_start=False)
+        return out, "warm_start"
+    if isinstance(clf, RandomForestClassifier) and len(pipe.steps) == 1:
+        out = copy.deepcopy(pipe)
+        rf = out.steps[-1][1]
+        # a new random_state per update, or the added trees would repeat the last update's seeds
+        rf.set_params(warm_start=True, n_estimators=len(rf.estimators_) + INCREMENTAL_TREES, random_state=seed)
+        rf.fit(X_all, y_all)
+        if len(rf.estimators_) > INCREMENTAL_MAX_TREES:
+            rf.estimators_ = rf.estimators_[-INCREMENTAL_MAX_TREES:]
+        rf.set_params(warm_start=False, n_estimators=len(rf.estimators_))
+        return out, "warm_start"
+    return fresh.fit(X_all, y_all), "refit"
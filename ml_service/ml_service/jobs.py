@@ -0,0 +1,147 @@
+"""Background training jobs for `POST /train`.
+
+Jobs run one at a time on a dedicated thread. The fits run in a spawned process pool
+at a lower CPU priority, so the serving process keeps its cores and its GIL. Each job
+ends with ModelRegistry.retrain swapping the new snapshot in atomically. Incremental
+updates (ModelRegistry.update) go through the same queue, so they never race a retrain,
+and their per-pipeline updates run in the same kind of pool.
+
+With `serve --workers N` a job runs in whichever worker received it. Only that worker
+swaps, and the others keep serving their snapshot until they restart. A full retrain
+is persisted to the artifact store, so restarted workers pick it up."""
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .training import MISSIONS, Mission, ModelRegistry, _models
+
+TRAIN_JOB_WORKERS = int(os.getenv("TRAIN_JOB_WORKERS", "1"))
+TRAIN_JOB_CPU_BUDGET = int(os.getenv("TRAIN_JOB_CPU_BUDGET", "0")) or None
+# niceness of the training processes (0 = same priority as serving)
+TRAIN_JOB_NICE = int(os.getenv("TRAIN_JOB_NICE", "10"))
+# finished jobs kept for polling
+TRAIN_JOB_HISTORY = int(os.getenv("TRAIN_JOB_HISTORY", "50"))
+
+
+@dataclass
+class TrainJob:
+    id: str
+    missions: List[str]
+    models: List[str]
+    seed: Optional[int]
+    kind: str = "retrain"  # retrain | incremental
+    status: str = "queued"  # queued | running | succeeded | failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    version: Optional[str] = None
+    generation: Optional[int] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    # incremental: ModelRegistry.update's report (methods, timings, metrics before/after)
+    report: Optional[Dict[str, Any]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        if self.started_at is not None:
+            out["seconds"] = (self.finished_at or time.time()) - self.started_at
+        return out
+
+
+class TrainingJobs:
+    def __init__(self, registry: ModelRegistry, store=None):
+        self.registry = registry
+        self.store = store
+        self._jobs: "OrderedDict[str, TrainJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="train-job")
+
+    def submit(self, missions: Optional[List[str]] = None, models: Optional[List[str]] = None,
+               seed: Optional[int] = None) -> TrainJob:
+        missions = [m for m in MISSIONS if m in set(missions)] if missions else list(MISSIONS)
+        names = list(_models())
+        unknown = [m for m in (models or []) if m not in names]
+        if unknown:
+            raise ValueError(f"unknown model(s): {', '.join(unknown)} (available: {', '.join(names)})")
+        models = [m for m in names if m in set(models)] if models else names
+        full = len(missions) == len(MISSIONS) and len(models) == len(names)
+        if not full and seed is not None and seed != self.registry.seed:
+            raise ValueError("a different seed needs a full retrain (every mission and model)")
+        job = TrainJob(id=uuid.uuid4().hex[:12], missions=missions, models=models, seed=seed)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job)
+        return job
+
+    def submit_update(self, mission: Mission, rows: pd.DataFrame, compare_full: bool = False) -> TrainJob:
+        """Queue ModelRegistry.update for newly labeled rows of one mission."""
+        job = TrainJob(id=uuid.uuid4().hex[:12], missions=[mission], models=list(_models()), seed=None,
+                       kind="incremental")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run_update, job, rows, compare_full)
+        return job
+
+    def _run_update(self, job: TrainJob, rows: pd.DataFrame, compare_full: bool) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.report = self.registry.update(
+                job.missions[0], rows, compare_full=compare_full, tag=f"job-{job.id}",
+                workers=TRAIN_JOB_WORKERS, cpu_budget=TRAIN_JOB_CPU_BUDGET, nice=TRAIN_JOB_NICE, pool=True,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            job.version, job.generation = job.report["version"], job.report["generation"]
+            job.timings = {k: round(e["seconds"], 3) for k, e in job.report["models"].items()}
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+
+    def _run(self, job: TrainJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            snap = self.registry.retrain(
+                missions=job.missions, models=job.models, seeds=job.seed,
+                workers=TRAIN_JOB_WORKERS, cpu_budget=TRAIN_JOB_CPU_BUDGET, nice=TRAIN_JOB_NICE,
+                store=self.store, tag=f"job-{job.id}",
+                # never fork the serving process (threads, sockets): start clean interpreters
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            job.version, job.generation = snap.version, snap.generation
+            job.timings = {f"{m}/{n}/{'bal' if b else 'raw'}": round(s, 3)
+                           for (m, n, b), s in self.registry.timings.items()}
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+
+    def _trim(self) -> None:
+        done = [k for k, j in self._jobs.items() if j.status in ("succeeded", "failed")]
+        for k in done[:max(0, len(done) - TRAIN_JOB_HISTORY)]:
+            del self._jobs[k]
+
+    def get(self, job_id: str) -> Optional[TrainJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[TrainJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
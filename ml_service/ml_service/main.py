@@ -1,27 +1,140 @@
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import io
+import os
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
 from typing import Dict, Any, Literal, Optional, List
+import numpy as np
+import pandas as pd
 import uvicorn
 import orjson
 
-from .training import ModelRegistry, METRICS
+from .training import ModelRegistry, METRICS, FEATURES, feature_matrix
+from .store import ModelStore, TRAIN_WORKERS, TRAIN_CPU_BUDGET
+from .cache import PredictionCache
+from .ensemble import Strategy
+from .jobs import TrainingJobs
+from .crossval import CV_ON_STARTUP, EVALUATION_MODE
 
 Mission = Literal["kepler","k2","tess"]
+Label = Literal["planet","non_planet","candidate"]
+Evaluation = Literal["holdout","cv"]
 
 app = FastAPI(title="ExoSeeker ML Service")
 
 REGISTRY = ModelRegistry()
-REGISTRY.fit_all()
+PREDICT_CACHE = PredictionCache()
+# keys already carry the model generation; clearing just frees the stale entries early
+REGISTRY.on_reload(lambda reg: PREDICT_CACHE.clear())
+STORE = ModelStore()
+JOBS = TrainingJobs(REGISTRY, STORE)
 
-class PredictIn(BaseModel):
+def load_models() -> None:
+    """Load the registry once, in the serving process: at app startup, or in serve.py's parent
+    before it forks. Not done at import, since spawned training workers re-import this module
+    (as __mp_main__ under `python -m ml_service.main`)."""
+    if REGISTRY.fitted:
+        return
+    # loads prebuilt artifacts when the data/hyperparameter key matches; retrains (and saves) otherwise
+    REGISTRY.load_or_fit(STORE, workers=TRAIN_WORKERS, cpu_budget=TRAIN_CPU_BUDGET)
+    # k-fold evaluation for evaluation=cv: read from the store, computed here only when asked to
+    if CV_ON_STARTUP:
+        REGISTRY.cross_validate(STORE, workers=TRAIN_WORKERS, cpu_budget=TRAIN_CPU_BUDGET)
+    else:
+        REGISTRY.load_cv(STORE)
+
+@app.on_event("startup")
+def startup() -> None:
+    load_models()
+
+class EnsembleOptions(BaseModel):
+    # None = per-mission default (ENSEMBLE_STRATEGY)
+    strategy: Optional[Strategy] = None
+    # subset of ensemble members, e.g. ["log_reg", "random_forest"] to skip knn
+    models: Optional[List[str]] = None
+    # stop evaluating members once the label can no longer change
+    early_exit: bool = False
+
+class PredictIn(EnsembleOptions):
     mission: Mission
     object_id: Optional[str] = None
     features: Dict[str, float]
 
+class PredictBatchIn(EnsembleOptions):
+    mission: Mission
+    object_ids: Optional[List[Optional[str]]] = None
+    # row-major: rows[i][j] is the value of columns[j] (defaults to the training feature order)
+    columns: Optional[List[str]] = None
+    rows: Optional[List[List[Optional[float]]]] = None
+    # column-major alternative: {"planet_radius": [..], ...}
+    features: Optional[Dict[str, List[Optional[float]]]] = None
+
+MAX_BATCH_ROWS = 100_000
+NPY_TYPES = {"application/x-npy", "application/npy"}
+ARROW_TYPES = {"application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file"}
+
+def _batch_from_json(raw: bytes, mission: Optional[str]):
+    try:
+        body = PredictBatchIn.model_validate({"mission": mission, **orjson.loads(raw)} if mission else orjson.loads(raw))
+    except (orjson.JSONDecodeError, ValidationError) as e:
+        raise HTTPException(422, f"invalid batch body: {e}")
+    if body.rows is not None:
+        columns = body.columns or FEATURES
+        # rows: [] -> empty batch, like an empty columnar body (reshape(0, -1) is ambiguous)
+        arr = (np.array(body.rows, dtype=np.float64).reshape(len(body.rows), -1) if body.rows
+               else np.empty((0, len(columns)), dtype=np.float64))
+        if arr.shape[1] != len(columns):
+            raise HTTPException(422, f"rows have {arr.shape[1]} values, expected {len(columns)} columns")
+        cols = {c: arr[:, j] for j, c in enumerate(columns)}
+        n = arr.shape[0]
+    elif body.features is not None:
+        cols = {c: np.array(v, dtype=np.float64) for c, v in body.features.items()}
+        n = len(next(iter(body.features.values()), []))
+    else:
+        raise HTTPException(422, "either 'rows' or 'features' is required")
+    return body.mission, feature_matrix(cols, n), body.object_ids, body
+
+def _batch_from_npy(raw: bytes):
+    X = np.load(io.BytesIO(raw), allow_pickle=False)
+    if X.ndim != 2 or X.shape[1] != len(FEATURES):
+        raise ValueError(f"expected a 2-D array with {len(FEATURES)} columns ({', '.join(FEATURES)})")
+    return feature_matrix({c: X[:, j] for j, c in enumerate(FEATURES)}, X.shape[0])
+
+def _batch_from_arrow(raw: bytes, ctype: str):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(415, "Arrow bodies need pyarrow installed in ml_service")
+    if ctype.endswith(".file"):
+        table = pa.ipc.open_file(pa.BufferReader(raw)).read_all()
+    else:
+        table = pa.ipc.open_stream(pa.BufferReader(raw)).read_all()
+    cols = {c: table.column(c).to_numpy(zero_copy_only=False) for c in FEATURES if c in table.column_names}
+    ids = table.column("object_id").to_pylist() if "object_id" in table.column_names else None
+    return feature_matrix(cols, table.num_rows), ids
+
+def _memory() -> Dict[str, int]:
+    # Linux only: pss splits shared pages across the processes mapping them, so summing
+    # pss over the workers gives the real footprint of a multi-worker deployment
+    out: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    out[name.lower() + "_kb"] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "models": len(REGISTRY.models)}
+    return {"status": "ok", "models": len(REGISTRY.models), "version": REGISTRY.version,
+            "generation": REGISTRY.generation,
+            "appended": {m: len(df) for m, df in REGISTRY.snapshot.appended.items()}, "compiled": REGISTRY.compiled_inference, "predict_cache": PREDICT_CACHE.stats(),
+            "pid": os.getpid(), "memory": _memory()}
 
 @app.get("/datasets")
 def datasets():
@@ -31,9 +144,17 @@ def datasets():
 def metrics():
     return {"available": list(METRICS.keys())}
 
+def _results(evaluation: str, **filters):
+    try:
+        return REGISTRY.get_results(evaluation=evaluation, **filters)
+    except LookupError as e:
+        raise HTTPException(409, detail=str(e))
+
 @app.get("/tests")
-def tests(mission: Optional[Mission] = None, model: Optional[str] = None, balanced: Optional[bool] = None, metric: Optional[str] = None):
-    results = REGISTRY.get_results(mission=mission, model=model, balanced=balanced)
+def tests(mission: Optional[Mission] = None, model: Optional[str] = None, balanced: Optional[bool] = None, metric: Optional[str] = None,
+          evaluation: Evaluation = EVALUATION_MODE):
+    # evaluation=cv: metrics/report are fold means, `cv` carries std, ci95 and the per-fold metrics
+    results = _results(evaluation, mission=mission, model=model, balanced=balanced)
     payload = []
     for mr in results:
         row = {
@@ -45,45 +166,151 @@ def tests(mission: Optional[Mission] = None, model: Optional[str] = None, balanc
         }
         if metric:
             row["metric_selected"] = {metric: mr.metrics.get(metric)}
+        if mr.cv:
+            row["cv"] = mr.cv
         payload.append(row)
-    return {"count": len(payload), "results": payload}
+    return {"count": len(payload), "evaluation": evaluation, "results": payload}
 
 @app.get("/final")
-def final(metric: str = "f1_weighted", balanced: bool = True, mission: Optional[Mission] = None, model: Optional[str] = None):
+def final(metric: str = "f1_weighted", balanced: bool = True, mission: Optional[Mission] = None, model: Optional[str] = None,
+          evaluation: Evaluation = EVALUATION_MODE):
     # final = best by metric per mission OR filter by model/mission
+    def ci(r):
+        return {"ci95": r.cv["ci95"]} if r.cv else {}
     if model or mission is not None:
         # return a filtered subset
-        results = REGISTRY.get_results(mission=mission, model=model, balanced=balanced)
-        return {"mode": "filtered", "metric": metric, "balanced": balanced,
+        results = _results(evaluation, mission=mission, model=model, balanced=balanced)
+        return {"mode": "filtered", "metric": metric, "balanced": balanced, "evaluation": evaluation,
                 "results": [{
-                    "mission": r.mission, "model": r.model_name, "balanced": r.balanced, "metrics": r.metrics
+                    "mission": r.mission, "model": r.model_name, "balanced": r.balanced, "metrics": r.metrics, **ci(r)
                 } for r in results]}
-    best = REGISTRY.best_by(metric=metric, balanced=balanced)
-    return {"mode": "best_by_metric", "metric": metric, "balanced": balanced,
+    try:
+        best = REGISTRY.best_by(metric=metric, balanced=balanced, evaluation=evaluation)
+    except LookupError as e:
+        raise HTTPException(409, detail=str(e))
+    return {"mode": "best_by_metric", "metric": metric, "balanced": balanced, "evaluation": evaluation,
             "winners": [{
-                "mission": r.mission, "model": r.model_name, "metrics": r.metrics
+                "mission": r.mission, "model": r.model_name, "metrics": r.metrics, **ci(r)
             } for r in best]}
 
 @app.get("/compare")
-def compare(metric: str = "f1_weighted", balanced: bool = True):
-    # compare all models by metric across missions
-    results = REGISTRY.get_results(balanced=balanced)
+def compare(metric: str = "f1_weighted", balanced: bool = True, evaluation: Evaluation = EVALUATION_MODE):
+    # compare all models by metric across missions (cv: fold means, plus their 95% intervals)
+    results = _results(evaluation, balanced=balanced)
     table: Dict[str, Dict[str, float]] = {}
+    intervals: Dict[str, Dict[str, List[float]]] = {}
     for r in results:
         key = f"{r.mission}"
         table.setdefault(key, {})
         table[key][r.model_name] = r.metrics.get(metric, 0.0)
-    return {"metric": metric, "balanced": balanced, "table": table}
+        if r.cv and metric in r.cv["ci95"]:
+            intervals.setdefault(key, {})[r.model_name] = r.cv["ci95"][metric]
+    out = {"metric": metric, "balanced": balanced, "evaluation": evaluation, "table": table}
+    if evaluation == "cv":
+        out["ci95"] = intervals
+    return out
 
 @app.post("/predict")
 def predict(body: PredictIn):
     try:
-        res = REGISTRY.predict(body.mission, body.features)
+        spec = REGISTRY.ensemble_spec(body.mission, body.strategy, body.models, body.early_exit)
+        snap = REGISTRY.snapshot
+        key = PREDICT_CACHE.key(body.mission, (snap.version, snap.generation, spec), body.features)
+        res = PREDICT_CACHE.get_or_compute(key, lambda: REGISTRY.predict(body.mission, body.features, spec))
+    except Exception as e:
+        raise HTTPException(400, f"prediction error: {e}")
+    # the default majority rule only returns planet or non_planet (what the backend expects);
+    # hard/soft/weighted/stacking may also return candidate
+    return res
+
+@app.post("/predict/batch", response_class=ORJSONResponse)
+async def predict_batch(request: Request, mission: Optional[Mission] = None, strategy: Optional[Strategy] = None,
+                        models: Optional[str] = None, early_exit: bool = False):
+    """Batch scoring. JSON body (see PredictBatchIn), or a raw NPY / Arrow IPC body with
+    `?mission=`. Response is columnar: one list per model field, aligned with the input rows.
+    Ensemble options come from the query (`models` comma-separated) or, for JSON, the body."""
+    ctype = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    raw = await request.body()
+    ids = None
+    opts = EnsembleOptions(strategy=strategy, models=models.split(",") if models else None, early_exit=early_exit)
+    try:
+        if ctype in NPY_TYPES or ctype in ARROW_TYPES:
+            if mission is None:
+                raise HTTPException(422, "query parameter 'mission' is required for binary bodies")
+            if ctype in NPY_TYPES:
+                X = _batch_from_npy(raw)
+            else:
+                X, ids = _batch_from_arrow(raw, ctype)
+        else:
+            mission, X, ids, body = _batch_from_json(raw, mission)
+            opts = EnsembleOptions(strategy=body.strategy or opts.strategy, models=body.models or opts.models,
+                                   early_exit=body.early_exit or opts.early_exit)
+        if X.shape[0] > MAX_BATCH_ROWS:
+            raise HTTPException(413, f"batch too large (max {MAX_BATCH_ROWS} rows)")
+        if ids is not None and len(ids) != X.shape[0]:
+            raise HTTPException(422, "object_ids length does not match the number of rows")
+        spec = REGISTRY.ensemble_spec(mission, opts.strategy, opts.models, opts.early_exit)
+        res = await run_in_threadpool(REGISTRY.predict_batch, mission, X, spec)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(400, f"prediction error: {e}")
-    # Ensure labels precisely match backend expectation: planet or non_planet
-    # (candidate may appear only in per_model labels/probas)
+    if ids is not None:
+        res["object_ids"] = ids
     return res
 
+class TrainIn(BaseModel):
+    # None = all missions / all models
+    missions: Optional[List[Mission]] = None
+    models: Optional[List[str]] = None
+    # only for a full retrain (the other pipelines keep the current seed's splits)
+    seed: Optional[int] = None
+
+@app.post("/train", status_code=202)
+def train(body: TrainIn):
+    """Start a background retrain; poll GET /train/{id}. The registry is swapped atomically when
+    the job finishes, and requests keep using the snapshot they started with meanwhile."""
+    try:
+        job = JOBS.submit(body.missions, body.models, body.seed)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return job.as_dict()
+
+class IncrementalIn(BaseModel):
+    mission: Mission
+    # stable row ids (catalog object_id): an id sent again replaces its previous label/features
+    object_ids: List[str]
+    labels: List[Label]
+    # column-major features, like /predict/batch ({"planet_radius": [..], ...}; missing/null -> 0.0)
+    features: Dict[str, List[Optional[float]]]
+    # also time a from-scratch fit on the same data (slower; for the cost report)
+    compare_full: bool = False
+
+@app.post("/train/incremental", status_code=202)
+def train_incremental(body: IncrementalIn):
+    """Update the mission's pipelines with newly labeled rows instead of retraining them; poll
+    GET /train/{id} for the report (method and time per pipeline, metrics before/after)."""
+    n = len(body.object_ids)
+    if len(body.labels) != n:
+        raise HTTPException(422, "object_ids and labels must have the same length")
+    try:
+        X = feature_matrix({c: np.array(v, dtype=np.float64) for c, v in body.features.items()}, n)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+    rows = pd.DataFrame(X, columns=FEATURES, index=pd.Index(body.object_ids, name="object_id"))
+    rows["classification"] = body.labels
+    return JOBS.submit_update(body.mission, rows, body.compare_full).as_dict()
+
+@app.get("/train")
+def train_jobs():
+    return [j.as_dict() for j in JOBS.list()]
+
+@app.get("/train/{job_id}")
+def train_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, "unknown job")
+    return job.as_dict()
+
 if __name__ == "__main__":
     uvicorn.run("ml_service.main:app", host="0.0.0.0", port=8001, reload=False)
@@ -0,0 +1,109 @@
+"""Multi-worker serving with models shared read-only between workers.
+
+The parent loads the registry once (artifact store, every pipeline unpickled and the
+served ones compiled), freezes the GC so collections never write to those objects,
+binds the socket and forks the workers. Each worker runs uvicorn on the inherited
+socket and shares the model pages copy-on-write with the parent, so RAM stays about
+flat as ML_WORKERS grows. Dead workers are re-forked from the same parent.
+
+    ML_WORKERS=4 python -m ml_service.serve
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+ML_WORKERS = int(os.getenv("ML_WORKERS", "1"))
+ML_HOST = os.getenv("ML_HOST", "0.0.0.0")
+ML_PORT = int(os.getenv("ML_PORT", "8001"))
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket) -> None:
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    config = uvicorn.Config(app, lifespan="off", log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Serve ml_service with N forked workers sharing one model load.")
+    ap.add_argument("--workers", type=int, default=ML_WORKERS)
+    ap.add_argument("--host", default=ML_HOST)
+    ap.add_argument("--port", type=int, default=ML_PORT)
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    from .main import REGISTRY, app, load_models
+    load_models()  # the workers run with lifespan off: the registry is loaded here, once, before the fork
+    n = REGISTRY.warm()
+    gc.collect()
+    gc.freeze()  # parent objects move to the permanent generation: no GC writes, no COW copies
+    print(f"[serve] {n} models loaded in {time.perf_counter() - started:.1f}s (version {REGISTRY.version})", flush=True)
+
+    sock = _bind(args.host, args.port)
+    if args.workers <= 1:
+        _run_worker(app, sock)
+        return 0
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = slot
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(args.workers):
+        spawn(slot)
+    print(f"[serve] {args.workers} workers on {args.host}:{args.port}: {sorted(children)}", flush=True)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"[serve] worker {pid} exited ({status}); restarting", file=sys.stderr, flush=True)
+            time.sleep(0.5)
+            spawn(slot)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import os
+import shutil
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+import joblib
+import orjson
+import sklearn
+from sklearn.pipeline import Pipeline
+
+from .crossval import CV_FOLDS, CrossValidation
+from .features import FEATURE_STORE
+from .training import MISSIONS, Mission, ModelResult, ModelRegistry, _models, dataset_path
+
+Key = Tuple[Mission, str, bool]
+
+STORE_DIR = Path(os.getenv("MODEL_STORE_DIR", str(Path(__file__).parent / "artifacts")))
+# bump when the on-disk layout changes
+STORE_FORMAT = 1
+
+TRAIN_WORKERS = int(os.getenv("TRAIN_WORKERS", "1"))
+TRAIN_CPU_BUDGET = int(os.getenv("TRAIN_CPU_BUDGET", "0")) or None
+
+
+def _model_file(key: Key) -> str:
+    mission, name, balanced = key
+    return f"{mission}__{name}__{'bal' if balanced else 'raw'}.joblib"
+
+
+def _params_fingerprint() -> str:
+    # hyperparameters of every pipeline in _models(); nested estimators are covered by their own params.
+    # n_jobs is left out: it only changes how many cores a fit uses, never the fitted model
+    out = []
+    for name, pipe in sorted(_models().items()):
+        params = pipe.get_params(deep=True)
+        flat = sorted((k, repr(v)) for k, v in params.items()
+                      if not hasattr(v, "get_params") and k != "steps" and not k.endswith("n_jobs"))
+        steps = [(step, type(est).__name__) for step, est in pipe.steps]
+        out.append((name, steps, flat))
+    return repr(out)
+
+
+class LazyModels(Mapping[Key, Pipeline]):
+    """Read-only mapping of registry keys to pipelines, unpickled on first access."""
+
+    def __init__(self, root: Path, keys):
+        self._root = root
+        self._keys = list(keys)
+        self._known = set(self._keys)
+        self._loaded: Dict[Key, Pipeline] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Key) -> Pipeline:
+        model = self._loaded.get(key)
+        if model is not None:
+            return model
+        if key not in self._known:
+            raise KeyError(key)
+        with self._lock:
+            if key not in self._loaded:
+                self._loaded[key] = joblib.load(self._root / _model_file(key))
+            return self._loaded[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._known
+
+    def __iter__(self) -> Iterator[Key]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def loaded(self) -> int:
+        return len(self._loaded)
+
+
+class ModelStore:
+    """On-disk artifact store for fitted pipelines and their ModelResult metrics.
+
+    Entries live in `<root>/<key>/` where key hashes the treated datasets, the
+    `_models()` hyperparameters, the seed and the sklearn version."""
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+
+    def key(self, seeds: int = 42) -> str:
+        h = hashlib.sha256()
+        h.update(f"format={STORE_FORMAT};sklearn={sklearn.__version__};seed={seeds}".encode())
+        for mission in MISSIONS:
+            with open(dataset_path(mission), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        h.update(_params_fingerprint().encode())
+        return h.hexdigest()[:16]
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def has(self, key: str) -> bool:
+        return (self.path(key) / "manifest.json").exists()
+
+    def save(self, key: str, models, results: Dict[Key, ModelResult]) -> Path:
+        final = self.path(key)
+        tmp = self.root / f".{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        (tmp / "models").mkdir(parents=True)
+        for k, pipe in models.items():
+            joblib.dump(pipe, tmp / "models" / _model_file(k))
+        (tmp / "results.json").write_bytes(orjson.dumps([asdict(r) for r in results.values()]))
+        manifest = {"key": key, "format": STORE_FORMAT, "sklearn": sklearn.__version__,
+                    "models": [list(k) for k in models.keys()]}
+        # manifest is written last: its presence marks a complete entry
+        (tmp / "manifest.json").write_bytes(orjson.dumps(manifest))
+        # same key = same data, hyperparameters and seed: the cross-validation stays valid
+        for cv in final.glob("cv-*.json") if final.exists() else []:
+            shutil.copy2(cv, tmp / cv.name)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return final
+
+    def load(self, key: str) -> Tuple[LazyModels, Dict[Key, ModelResult]]:
+        base = self.path(key)
+        manifest = orjson.loads((base / "manifest.json").read_bytes())
+        keys = [(m, n, bool(b)) for m, n, b in manifest["models"]]
+        results = {}
+        for r in orjson.loads((base / "results.json").read_bytes()):
+            mr = ModelResult(**r)
+            results[(mr.mission, mr.model_name, mr.balanced)] = mr
+        return LazyModels(base / "models", keys), results
+
+    def save_cv(self, key: str, cv: CrossValidation) -> Path:
+        base = self.path(key)
+        base.mkdir(parents=True, exist_ok=True)
+        final = base / f"cv-{cv.folds}.json"
+        tmp = base / f".cv-{cv.folds}.tmp-{os.getpid()}"
+        tmp.write_bytes(orjson.dumps(cv.to_json()))
+        os.replace(tmp, final)
+        return final
+
+    def load_cv(self, key: str, folds: int = CV_FOLDS) -> Optional[CrossValidation]:
+        path = self.path(key) / f"cv-{folds}.json"
+        if not path.exists():
+            return None
+        return CrossValidation.from_json(orjson.loads(path.read_bytes()))
+
+    def prune(self, keep: str) -> None:
+        # drop stale entries so old versions don't pile up in the image
+        if not self.root.exists():
+            return
+        for p in self.root.iterdir():
+            if p.is_dir() and p.name != keep:
+                shutil.rmtree(p, ignore_errors=True)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Prebuild the ml_service model artifact store.")
+    ap.add_argument("--dir", default=str(STORE_DIR), help="artifact store directory")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--force", action="store_true", help="retrain even if the key is already built")
+    ap.add_argument("--prune", action="store_true", help="remove entries for other keys")
+    ap.add_argument("--workers", type=int, default=TRAIN_WORKERS, help="training processes (1 = serial)")
+    ap.add_argument("--cpu-budget", type=int, default=TRAIN_CPU_BUDGET, help="total cores training may use")
+    ap.add_argument("--cv", action="store_true", help="also run the k-fold evaluation (evaluation=cv)")
+    ap.add_argument("--folds", type=int, default=CV_FOLDS, help="folds for --cv")
+    args = ap.parse_args()
+
+    # columnar copies of the mission datasets (no-op when already converted)
+    for mission in MISSIONS:
+        FEATURE_STORE.get(mission)
+    store = ModelStore(Path(args.dir))
+    reg = ModelRegistry()
+    trained = reg.load_or_fit(store, seeds=args.seed, force=args.force,
+                              workers=args.workers, cpu_budget=args.cpu_budget)
+    for (mission, name, balanced), seconds in sorted(reg.timings.items(), key=lambda kv: -kv[1]):
+        print(f"[store] fit {mission}/{name}/{'bal' if balanced else 'raw'}: {seconds:.2f}s")
+    if args.cv:
+        cv = reg.cross_validate(store, folds=args.folds, force=args.force,
+                                workers=args.workers, cpu_budget=args.cpu_budget)
+        print(f"[store] cross-validation: {cv.folds} folds x {len(cv.per_fold)} pipelines "
+              f"(run took {cv.seconds:.1f}s): {store.path(reg.version) / f'cv-{cv.folds}.json'}")
+    if args.prune:
+        store.prune(keep=reg.version)
+    print(f"[store] {'built' if trained else 'up to date'}: {store.path(reg.version)} ({len(reg.models)} models)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
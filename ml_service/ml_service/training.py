@@ -1,10 +1,14 @@
 
 import os
-from pathlib import Path
-from typing import Dict, Tuple, List, Literal, Any
+import threading
+import time
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+from collections import ChainMap
+from typing import Dict, Tuple, List, Literal, Any, Callable, Mapping, Optional
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.naive_bayes import GaussianNB
@@ -14,10 +18,22 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, classification_report
+from threadpoolctl import threadpool_limits
+
+from .features import FEATURE_STORE, dataset_path
+from .compiled import COMPILED_INFERENCE, CompiledModel, compile_pipeline
+from .ensemble import ENSEMBLE_WEIGHT_METRIC, RULES, EnsembleSpec, Vote, align, resolve_spec
+from .incremental import holdout_mask, merge_rows, update_pipeline
+from .crossval import CV_FOLDS, CrossValidation, fold_assignment, mean_report
 
 Mission = Literal["kepler","k2","tess"]
 Label = Literal["planet","non_planet","candidate"]
 
+MISSIONS: Tuple[Mission, ...] = ("kepler", "k2", "tess")
+# model input columns, in training order
+FEATURES: List[str] = ["longitude","latitude","stellar_temperature","stellar_radius","planet_radius","eq_temperature","distance","stellar_sur_gravity"]
+ENSEMBLE_MODELS: List[str] = ["gaussian_nb","knn","decision_tree","random_forest","log_reg"]
+
 METRICS = {
     "accuracy": lambda y_true, y_pred: accuracy_score(y_true, y_pred),
     "f1_weighted": lambda y_true, y_pred: f1_score(y_true, y_pred, average="weighted", zero_division=0.0),
@@ -26,29 +42,9 @@ METRICS = {
     "recall_weighted": lambda y_true, y_pred: recall_score(y_true, y_pred, average="weighted", zero_division=0.0),
 }
 
-def _map_labels(series: pd.Series) -> pd.Series:
-    # Normalize labels found in the provided datasets
-    mapping = {
-        "not planet": "non_planet",
-        "NOT PLANET": "non_planet",
-        "non_planet": "non_planet",
-        "planet": "planet",
-        "candidate": "candidate",
-        "CANDIDATE": "candidate",
-        "CONFIRMED": "planet",
-        "FALSE POSITIVE": "non_planet",
-        "REFUTED": "non_planet",
-    }
-    return series.map(lambda v: mapping.get(str(v).strip(), "candidate"))
-
 def load_dataset(mission: Mission) -> pd.DataFrame:
-    here = Path(__file__).parent / "data" / mission / f"{mission}_data_treated.pkl"
-    df = pd.read_pickle(here)
-    df = df.copy()
-    df["classification"] = _map_labels(df["classification"])
-    # Keep only known classes
-    df = df[df["classification"].isin(["planet","non_planet","candidate"])]
-    return df
+    # labels already normalized by the feature store; columns are memory-mapped, the frame is a fresh copy
+    return FEATURE_STORE.get(mission).frame()
 
 def _balance_df(df: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
     # simple random undersampling to the size of the smallest class
@@ -58,10 +54,25 @@ def _balance_df(df: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
     return pd.concat(parts).sample(frac=1.0, random_state=seed).reset_index(drop=True)
 
 def _split(df: pd.DataFrame, seed: int = 42):
-    X = df[["longitude","latitude","stellar_temperature","stellar_radius","planet_radius","eq_temperature","distance","stellar_sur_gravity"]]
+    X = df[FEATURES]
     y = df["classification"]
     return train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
 
+def feature_matrix(columns: Dict[str, Any], n: int) -> np.ndarray:
+    """Build an (n, len(FEATURES)) float matrix from column arrays; missing columns/NaN -> 0.0
+    (same default as single-row predict)."""
+    X = np.zeros((n, len(FEATURES)), dtype=np.float64)
+    for j, name in enumerate(FEATURES):
+        col = columns.get(name)
+        if col is None:
+            continue
+        arr = np.asarray(col, dtype=np.float64).reshape(-1)
+        if arr.shape[0] != n:
+            raise ValueError(f"column '{name}' has {arr.shape[0]} values, expected {n}")
+        X[:, j] = arr
+    np.nan_to_num(X, copy=False, nan=0.0)
+    return X
+
 def _models() -> Dict[str, Pipeline]:
     return {
         "gaussian_nb":   Pipeline([("clf", GaussianNB())]),
@@ -78,95 +89,570 @@ class ModelResult:
     balanced: bool
     metrics: Dict[str, float]
     report: Dict[str, Any]
+    # wall time of a full fit (kept across incremental updates as the baseline to compare against)
+    fit_seconds: Optional[float] = None
+    # evaluation=cv only: folds, std, ci95 and per-fold metrics (metrics/report are then fold means)
+    cv: Optional[Dict[str, Any]] = None
+
+# --- training jobs -------------------------------------------------------------------------
+
+Split = Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]
+
+# splits shared with pool workers (set once per worker by the initializer, not per job)
+_SHARED_SPLITS: Dict[Tuple[Mission, bool], Split] = {}
+_THREAD_LIMITS = None
+
+def _extend(split: Split, rows: Optional[pd.DataFrame]) -> Split:
+    # rows labeled after the datasets were built (incremental updates): most go to training,
+    # a stable hash-picked share joins the held-out set
+    if rows is None or rows.empty:
+        return split
+    X_train, X_test, y_train, y_test = split
+    hold = holdout_mask(rows.index)
+    return (pd.concat([X_train, rows.loc[~hold, FEATURES]]), pd.concat([X_test, rows.loc[hold, FEATURES]]),
+            pd.concat([y_train, rows.loc[~hold, "classification"]]), pd.concat([y_test, rows.loc[hold, "classification"]]))
+
+def _prepare_splits(seeds: int, missions=MISSIONS,
+                    appended: Optional[Mapping[Mission, pd.DataFrame]] = None) -> Dict[Tuple[Mission, bool], Split]:
+    splits = {}
+    for mission in missions:
+        df = load_dataset(mission)  # unbalanced
+        df_bal = _balance_df(df)    # balanced
+        for balanced, data in [(False, df), (True, df_bal)]:
+            splits[(mission, balanced)] = _extend(_split(data, seed=seeds), (appended or {}).get(mission))
+    return splits
+
+def _train_plan(n_jobs: int, workers: Optional[int], cpu_budget: Optional[int]) -> Tuple[int, Optional[int]]:
+    budget = cpu_budget or os.cpu_count() or 1
+    workers = max(1, min(workers or 1, n_jobs, budget))
+    threads = max(1, budget // workers) if (cpu_budget or workers > 1) else None
+    return workers, threads
+
+def _fit_job(split: Split, mission: Mission, name: str, balanced: bool, threads: Optional[int] = None):
+    t0 = time.perf_counter()
+    X_train, X_test, y_train, y_test = split
+    pipe = _models()[name]
+    n_jobs_params = [k for k in pipe.get_params() if k.endswith("__n_jobs")]
+    if threads:
+        # n_jobs never changes fitted values, only how many cores are used
+        pipe.set_params(**{k: threads for k in n_jobs_params})
+    model = pipe.fit(X_train, y_train)
+    seconds = time.perf_counter() - t0
+    if threads:
+        model.set_params(**{k: None for k in n_jobs_params})
+    result = _score(model, X_test, y_test, mission, name, balanced, fit_seconds=seconds)
+    return (mission, name, balanced), model, result, time.perf_counter() - t0
+
+def _score(model: Pipeline, X_test: pd.DataFrame, y_test: pd.Series, mission: Mission, name: str, balanced: bool,
+           fit_seconds: Optional[float] = None) -> ModelResult:
+    y_pred = model.predict(X_test)
+    # compute metrics
+    mvals = {k: float(fn(y_test, y_pred)) for k, fn in METRICS.items()}
+    report = classification_report(y_test, y_pred, output_dict=True, zero_division=0.0)
+    return ModelResult(mission=mission, model_name=name, balanced=balanced, metrics=mvals, report=report,
+                       fit_seconds=fit_seconds)
+
+def _init_worker(splits: Dict[Tuple[Mission, bool], Split], threads: Optional[int], nice: int = 0):
+    global _SHARED_SPLITS, _THREAD_LIMITS
+    _SHARED_SPLITS = splits
+    if nice:
+        # background retraining yields the CPU to the serving process
+        os.nice(nice)
+    if threads:
+        _THREAD_LIMITS = threadpool_limits(limits=threads)
+
+def _pool_job(mission: Mission, name: str, balanced: bool, threads: Optional[int]):
+    return _fit_job(_SHARED_SPLITS[(mission, balanced)], mission, name, balanced, threads)
+
+def _cv_job(mission: Mission, name: str, balanced: bool, fold: int, threads: Optional[int],
+            splits: Optional[Dict] = None):
+    # only the scores travel back to the parent, never the fitted fold model
+    _, _, result, _ = _fit_job((splits or _SHARED_SPLITS)[(mission, balanced, fold)], mission, name, balanced, threads)
+    return (mission, name, balanced), fold, result
+
+def _update_job(mission: Mission, name: str, balanced: bool, pipe: Pipeline, X_new: pd.DataFrame, y_new: pd.Series,
+                seed: int, revised: bool, compare_full: bool, threads: Optional[int], splits: Optional[Dict] = None):
+    # one pipeline of ModelRegistry.update: absorb the rows, score before/after on the extended split
+    X_train, X_test, y_train, y_test = (splits or _SHARED_SPLITS)[(mission, balanced)]
+    t0 = time.perf_counter()
+    out, method = update_pipeline(pipe, _models()[name], X_train, y_train, X_new, y_new, seed=seed, revised=revised)
+    entry: Dict[str, Any] = {"method": method, "seconds": time.perf_counter() - t0,
+                             "before": _score(pipe, X_test, y_test, mission, name, balanced).metrics}
+    if compare_full:
+        t0 = time.perf_counter()
+        full = _models()[name].fit(X_train, y_train)
+        entry["full_fit_seconds"] = time.perf_counter() - t0
+        entry["full_fit"] = _score(full, X_test, y_test, mission, name, balanced).metrics
+    result = _score(out, X_test, y_test, mission, name, balanced)
+    # an unchanged pipeline doesn't travel back: the parent keeps serving its own copy
+    return (mission, name, balanced), (None if method == "unchanged" else out), entry, result
+
+def _fit_stackers(members: Dict[str, Pipeline], split: Split) -> Dict[Tuple[str, ...], LogisticRegression]:
+    # stacking meta-models of one mission, one per member subset (in member order, as resolve_spec
+    # emits them), fit on the balanced held-out split: rows none of the members were trained on
+    _, X_test, _, y_test = split
+    P = {m: align(pipe.classes_, pipe.predict_proba(X_test)) for m, pipe in members.items()}
+    y = y_test.to_numpy()
+    return {sub: LogisticRegression(max_iter=1000).fit(np.hstack([P[m] for m in sub]), y)
+            for r in range(1, len(members) + 1) for sub in combinations(members, r)}
+
+def _stack_job(mission: Mission, members: Dict[str, Pipeline], threads: Optional[int], splits: Optional[Dict] = None):
+    return mission, _fit_stackers(members, (splits or _SHARED_SPLITS)[(mission, True)])
+
+def _fit_parallel(splits, jobs, workers: int, threads: Optional[int], nice: int = 0, mp_context=None,
+                  fn: Callable = _pool_job):
+    # submit the slow forests first so they don't end up as the tail of the schedule
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i][1] != "random_forest")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(splits, threads, nice),
+                             mp_context=mp_context) as ex:
+        futures = {i: ex.submit(fn, *jobs[i], threads) for i in order}
+        return [futures[i].result() for i in range(len(jobs))]
+
+Key = Tuple[Mission, str, bool]
+
+def _overlay(models: Mapping[Key, Pipeline], changed: Dict[Key, Pipeline]) -> Mapping[Key, Pipeline]:
+    # untouched (possibly still lazy) pipelines are not loaded by the merge; one flat overlay dict
+    # over the base load, so repeated partial swaps don't nest ChainMaps or pin replaced pipelines
+    if isinstance(models, ChainMap):
+        return ChainMap({**models.maps[0], **changed}, *models.maps[1:])
+    return ChainMap(changed, models)
+
+@dataclass
+class RegistrySnapshot:
+    """Everything a request reads. Swapped as one object, so a request that grabbed a
+    snapshot never mixes models, results or compiled twins from two trainings."""
+    models: Mapping[Key, Pipeline]
+    results: Dict[Key, ModelResult]
+    # key of the artifact store entry the models came from (None = trained in-process only)
+    version: Optional[str]
+    # bumped every time the served models change (fit, load, reload)
+    generation: int
+    # numpy twins of the pipelines (compiled.py), built on first use of each model
+    compiled: Dict[Key, Optional[CompiledModel]] = field(default_factory=dict)
+    # stacking meta-models per (mission, member subset), built with the snapshot (never in a request)
+    stackers: Dict[Tuple[Mission, Tuple[str, ...]], LogisticRegression] = field(default_factory=dict)
+    # labeled rows absorbed by update() on top of the datasets, per mission (index = object id)
+    appended: Dict[Mission, pd.DataFrame] = field(default_factory=dict)
 
 class ModelRegistry:
-    def __init__(self):
-        self.models: Dict[Tuple[Mission, str, bool], Pipeline] = {}
-        self.results: Dict[Tuple[Mission, str, bool], ModelResult] = {}
-        self.fitted: bool = False
-
-    def fit_all(self, seeds: int = 42):
-        for mission in ["kepler","k2","tess"]:
-            df = load_dataset(mission)  # unbalanced
-            df_bal = _balance_df(df)    # balanced
-
-            for balanced, data in [(False, df), (True, df_bal)]:
-                X_train, X_test, y_train, y_test = _split(data, seed=seeds)
-                for name, pipe in _models().items():
-                    model = pipe.fit(X_train, y_train)
-                    key = (mission, name, balanced)
-                    self.models[key] = model
-                    y_pred = model.predict(X_test)
-                    # compute metrics
-                    mvals = {k: float(fn(y_test, y_pred)) for k, fn in METRICS.items()}
-                    report = classification_report(y_test, y_pred, output_dict=True, zero_division=0.0)
-                    self.results[key] = ModelResult(mission=mission, model_name=name, balanced=balanced, metrics=mvals, report=report)
-        self.fitted = True
-
-    def predict(self, mission: Mission, features: Dict[str, float]) -> Dict[str, Any]:
-        assert self.fitted, "Models not fitted."
-        X = np.array([[
-            features.get("longitude", 0.0),
-            features.get("latitude", 0.0),
-            features.get("stellar_temperature", 0.0),
-            features.get("stellar_radius", 0.0),
-            features.get("planet_radius", 0.0),
-            features.get("eq_temperature", 0.0),
-            features.get("distance", 0.0),
-            features.get("stellar_sur_gravity", 0.0),
-        ]])
+    def __init__(self, compiled: bool = COMPILED_INFERENCE):
+        self.snapshot = RegistrySnapshot(models={}, results={}, version=None, generation=0)
+        # wall time (s) of each fit job from the last fit_all
+        self.timings: Dict[Key, float] = {}
+        self._reload_hooks: List[Callable[["ModelRegistry"], None]] = []
+        self.compiled_inference = compiled
+        self._compile_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        # split seed the models were trained with
+        self.seed: int = 42
+        # k-fold evaluation (cross_validate / load_cv) and the fold assignments it used
+        self.cv: Optional[CrossValidation] = None
+        self._folds: Dict[Tuple[Mission, bool, int, int], np.ndarray] = {}
+
+    # current snapshot's fields (read-only; use self.snapshot once per request for consistency)
+    models = property(lambda self: self.snapshot.models)
+    results = property(lambda self: self.snapshot.results)
+    version = property(lambda self: self.snapshot.version)
+    generation = property(lambda self: self.snapshot.generation)
+    fitted = property(lambda self: self.snapshot.generation > 0)
+
+    def on_reload(self, hook: Callable[["ModelRegistry"], None]) -> None:
+        """Register a callback run after the models change (e.g. to drop prediction caches)."""
+        self._reload_hooks.append(hook)
+
+    def _install(self, models, results, version: Optional[str], compiled: Optional[Dict] = None,
+                 appended: Optional[Dict[Mission, pd.DataFrame]] = None, stackers: Optional[Dict] = None) -> None:
+        with self._swap_lock:
+            # a single reference assignment: in-flight requests keep the snapshot they started with
+            self.snapshot = RegistrySnapshot(models=models, results=results, version=version,
+                                             generation=self.snapshot.generation + 1, compiled=compiled or {},
+                                             stackers=stackers or {}, appended=appended or {})
+        for hook in self._reload_hooks:
+            hook(self)
+
+    def _stackers(self, models: Mapping[Key, Pipeline], seeds: int, missions=MISSIONS,
+                  appended: Optional[Mapping[Mission, pd.DataFrame]] = None, carried: Optional[Dict] = None,
+                  workers: Optional[int] = None, cpu_budget: Optional[int] = None, pool: bool = False,
+                  nice: int = 0, mp_context=None) -> Dict[Tuple[Mission, Tuple[str, ...]], LogisticRegression]:
+        """Stacking meta-models of `missions` for a new snapshot (the held-out split includes the
+        appended rows); the other missions' are taken from `carried`. Runs like _fit."""
+        out = {k: v for k, v in (carried or {}).items() if k[0] not in missions}
+        splits = _prepare_splits(seeds, missions, appended)
+        jobs = [(m, {n: models[(m, n, True)] for n in ENSEMBLE_MODELS}) for m in missions]
+        workers, threads = _train_plan(len(jobs), workers, cpu_budget)
+        if workers <= 1 and not pool:
+            done = [_stack_job(*job, threads, splits=splits) for job in jobs]
+        else:
+            done = _fit_parallel(splits, jobs, workers, threads, nice=nice, mp_context=mp_context, fn=_stack_job)
+        for mission, stackers in done:
+            out.update({(mission, sub): meta for sub, meta in stackers.items()})
+        return out
+
+    def load_or_fit(self, store, seeds: int = 42, force: bool = False,
+                    workers: Optional[int] = None, cpu_budget: Optional[int] = None) -> bool:
+        """Load models from `store` when its key matches, otherwise retrain and persist.
+        Returns True when a retrain happened."""
+        key = store.key(seeds=seeds)
+        self.seed = seeds
+        trained = force or not store.has(key)
+        if trained:
+            models, results, self.timings = self._fit(seeds, workers=workers, cpu_budget=cpu_budget)
+            store.save(key, models, results)
+        else:
+            models, results = store.load(key)
+        self._install(models, results, version=key, stackers=self._stackers(models, seeds))
+        return trained
+
+    def _fit(self, seeds: int, jobs: Optional[List[Key]] = None, workers: Optional[int] = None,
+             cpu_budget: Optional[int] = None, pool: bool = False, nice: int = 0, mp_context=None,
+             appended: Optional[Mapping[Mission, pd.DataFrame]] = None):
+        """Train `jobs` (default: every pipeline); returns (models, results, timings) without installing."""
+        if jobs is None:
+            jobs = [(mission, name, balanced) for mission in MISSIONS for balanced in (False, True) for name in _models()]
+        splits = _prepare_splits(seeds, sorted({m for m, _, _ in jobs}, key=MISSIONS.index), appended)
+        workers, threads = _train_plan(len(jobs), workers, cpu_budget)
+        if workers <= 1 and not pool:
+            done = [_fit_job(splits[(m, b)], m, n, b, threads) for m, n, b in jobs]
+        else:
+            done = _fit_parallel(splits, jobs, workers, threads, nice=nice, mp_context=mp_context)
+
+        models: Dict[Key, Pipeline] = {}
+        results: Dict[Key, ModelResult] = {}
+        timings: Dict[Key, float] = {}
+        for key, model, result, seconds in done:
+            models[key] = model
+            results[key] = result
+            timings[key] = seconds
+        return models, results, timings
+
+    def fit_all(self, seeds: int = 42, workers: Optional[int] = None, cpu_budget: Optional[int] = None):
+        """Train every (mission, model, balanced) pipeline.
+
+        workers > 1 spreads the jobs over a process pool; cpu_budget caps the total cores used
+        (each worker gets cpu_budget // workers threads for n_jobs/BLAS). Splits are computed once
+        per mission in the parent, so results are identical to the serial path."""
+        models, results, self.timings = self._fit(seeds, workers=workers, cpu_budget=cpu_budget)
+        self.seed = seeds
+        self._install(models, results, version=None, stackers=self._stackers(models, seeds))
+
+    def retrain(self, missions=MISSIONS, models: Optional[List[str]] = None, seeds: Optional[int] = None,
+                workers: Optional[int] = None, cpu_budget: Optional[int] = None, nice: int = 0,
+                store=None, tag: str = "retrain", mp_context=None) -> RegistrySnapshot:
+        """Retrain a subset (missions x models, both balanced variants) in a process pool and swap
+        the result in atomically; untouched pipelines are carried over from the current snapshot.
+        A full retrain is persisted to `store` (when given) under its regular key, unless rows
+        from update() are part of the training data (the key only covers the datasets)."""
+        names = list(models or _models())
+        unknown = [n for n in names if n not in _models()]
+        if unknown:
+            raise ValueError(f"unknown model(s): {', '.join(unknown)}")
+        full = set(missions) == set(MISSIONS) and set(names) == set(_models())
+        seeds = self.seed if seeds is None else seeds
+        if not full and seeds != self.seed:
+            raise ValueError("a different seed needs a full retrain (every mission and model)")
+        jobs = [(m, n, b) for m in missions for b in (False, True) for n in names]
+        base = self.snapshot
+        trained, results, timings = self._fit(seeds, jobs, workers=workers, cpu_budget=cpu_budget,
+                                              pool=True, nice=nice, mp_context=mp_context, appended=base.appended)
+        if full:
+            new_models: Mapping[Key, Pipeline] = trained
+            new_results = results
+            compiled: Dict[Key, Optional[CompiledModel]] = {}
+            if store is not None and not base.appended:
+                version = store.key(seeds=seeds)
+                store.save(version, trained, results)
+            else:
+                version = f"{base.version or 'mem'}+{tag}"
+        else:
+            new_models = _overlay(base.models, trained)
+            new_results = {**base.results, **results}
+            compiled = {k: v for k, v in base.compiled.items() if k not in trained}
+            version = f"{base.version or 'mem'}+{tag}"
+        if self.compiled_inference:
+            # compile before the swap so the first requests afterwards don't pay for it
+            for key, pipe in trained.items():
+                if key[2]:
+                    compiled[key] = compile_pipeline(pipe)
+        stackers = self._stackers(new_models, seeds, missions, base.appended, carried=None if full else base.stackers,
+                                  workers=workers, cpu_budget=cpu_budget, pool=True, nice=nice, mp_context=mp_context)
+        self.timings = timings
+        self.seed = seeds
+        self._install(new_models, new_results, version, compiled, base.appended, stackers)
+        return self.snapshot
+
+    def update(self, mission: Mission, rows: pd.DataFrame, compare_full: bool = False, tag: str = "update",
+               workers: Optional[int] = None, cpu_budget: Optional[int] = None, pool: bool = False, nice: int = 0,
+               mp_context=None) -> Dict[str, Any]:
+        """Absorb newly labeled rows (FEATURES + classification, indexed by object id) into every
+        pipeline of `mission` without a full retrain (see incremental.py), re-score all of them on
+        the held-out split plus the held-out share of the new rows, and swap the result in.
+
+        The per-pipeline updates (and the compare_full fits) run like _fit: serially, or in a
+        process pool with `pool`/workers > 1; only the swap happens in this process.
+
+        Returns a report with, per pipeline, the update method and wall time, the metrics before
+        and after on the same held-out rows, and the wall time of a full fit for comparison
+        (measured on the same data when compare_full, otherwise the last recorded full fit)."""
+        base = self.snapshot
+        assert base.generation > 0, "Models not fitted."
+        t_start = time.perf_counter()
+        appended, delta = merge_rows(base.appended.get(mission), rows[FEATURES + ["classification"]])
+        report: Dict[str, Any] = {"mission": mission, "received": len(rows), "new_or_changed": len(delta),
+                                  "rows": len(appended), "holdout": int(holdout_mask(appended.index).sum())}
+        if delta.empty:
+            report.update(version=base.version, generation=base.generation, models={})
+            return report
+        new_train = delta[~holdout_mask(delta.index)]
+        # ids an earlier update already trained on: running statistics would count them twice
+        prev = base.appended.get(mission)
+        revised = prev is not None and bool(new_train.index.isin(prev.index).any())
+        splits = _prepare_splits(self.seed, [mission], {mission: appended})
+        X_new, y_new = new_train[FEATURES], new_train["classification"]
+        seed = self.seed + base.generation
+        jobs = [(mission, name, balanced, base.models[(mission, name, balanced)], X_new, y_new, seed, revised, compare_full)
+                for balanced in (False, True) for name in _models()]
+        workers, threads = _train_plan(len(jobs), workers, cpu_budget)
+        if workers <= 1 and not pool:
+            done = [_update_job(*job, threads, splits=splits) for job in jobs]
+        else:
+            done = _fit_parallel(splits, jobs, workers, threads, nice=nice, mp_context=mp_context, fn=_update_job)
+
+        updated: Dict[Key, Pipeline] = {}
+        results: Dict[Key, ModelResult] = {}
+        per_model: Dict[str, Any] = {}
+        for key, pipe, entry, result in done:
+            prev_result = base.results.get(key)
+            full_seconds = entry.pop("full_fit_seconds", prev_result.fit_seconds if prev_result else None)
+            result.fit_seconds = full_seconds
+            if pipe is not None:
+                updated[key] = pipe
+            results[key] = result
+            entry["after"] = result.metrics
+            entry["full_fit_seconds"] = full_seconds
+            per_model[f"{key[1]}/{'bal' if key[2] else 'raw'}"] = entry
+
+        compiled = {k: v for k, v in base.compiled.items() if k not in updated}
+        if self.compiled_inference:
+            for key, pipe in updated.items():
+                if key[2]:
+                    compiled[key] = compile_pipeline(pipe)
+        version = f"{base.version or 'mem'}+{tag}"
+        models = _overlay(base.models, updated)
+        all_appended = {**base.appended, mission: appended}
+        stackers = self._stackers(models, self.seed, [mission], all_appended, carried=base.stackers,
+                                  workers=workers, cpu_budget=cpu_budget, pool=pool, nice=nice, mp_context=mp_context)
+        self._install(models, {**base.results, **results}, version, compiled, all_appended, stackers)
+        spent = sum(e["seconds"] for e in per_model.values())
+        full = [e["full_fit_seconds"] for e in per_model.values()]
+        report.update(version=version, generation=self.snapshot.generation, models=per_model,
+                      seconds=time.perf_counter() - t_start, update_seconds=spent)
+        if all(s is not None for s in full):
+            report["full_fit_seconds"] = sum(full)
+            report["speedup"] = sum(full) / spent if spent > 0 else None
+        return report
+
+    def warm(self, compile: bool = True) -> int:
+        """Materialize every pipeline (LazyModels unpickles on access) and the compiled twins of
+        the served (balanced) ones. Called in the serving parent before workers are forked."""
+        snap = self.snapshot
+        for key in snap.models:
+            snap.models[key]
+        if compile:
+            for key in snap.models:
+                if key[2]:
+                    self.compiled_model(key, snap)
+        return len(snap.models)
+
+    def compiled_model(self, key: Key, snap: Optional[RegistrySnapshot] = None) -> Optional[CompiledModel]:
+        """Compiled twin of snap.models[key] (None if unsupported or compiled inference is off)."""
+        if not self.compiled_inference:
+            return None
+        snap = snap or self.snapshot
+        compiled = snap.compiled
+        if key not in compiled:
+            with self._compile_lock:
+                if key not in compiled:
+                    compiled[key] = compile_pipeline(snap.models[key])
+        return compiled[key]
+
+    def predict_proba(self, key: Key, X: np.ndarray,
+                      snap: Optional[RegistrySnapshot] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(classes, proba) for one model; compiled numpy path when available, sklearn otherwise."""
+        snap = snap or self.snapshot
+        compiled = self.compiled_model(key, snap)
+        if compiled is not None and (compiled.max_rows is None or X.shape[0] <= compiled.max_rows):
+            return compiled.classes_, compiled.predict_proba(X)
+        model = snap.models[key]
+        return np.asarray(model.classes_), model.predict_proba(X)
+
+    def ensemble_spec(self, mission: Mission, strategy: Optional[str] = None,
+                      models: Optional[List[str]] = None, early_exit: bool = False) -> EnsembleSpec:
+        return resolve_spec(mission, ENSEMBLE_MODELS, strategy, models, early_exit)
+
+    def _stacker(self, mission: Mission, models: Tuple[str, ...], snap: RegistrySnapshot) -> LogisticRegression:
+        """Meta-model over the members' aligned probabilities; every (mission, subset) is built
+        with the snapshot (_stackers), so a request never fits one."""
+        return snap.stackers[(mission, models)]
+
+    def evaluate(self, mission: Mission, X: np.ndarray, spec: Optional[EnsembleSpec] = None):
+        """Single pass over the ensemble: each member's probabilities are computed once and
+        both its label and the vote come from them. Returns (members, labels, confidence),
+        members = {name: (classes, proba)} for the members actually evaluated."""
+        snap = self.snapshot
+        assert snap.generation > 0, "Models not fitted."
+        spec = spec or self.ensemble_spec(mission)
+        members: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if spec.strategy == "stacking":
+            for name in spec.order:
+                members[name] = self.predict_proba((mission, name, True), X, snap)
+            meta = self._stacker(mission, spec.models, snap)
+            P = meta.predict_proba(np.hstack([align(*members[m]) for m in spec.models]))
+            return members, np.asarray(meta.classes_)[P.argmax(axis=1)], P.max(axis=1)
+        weights = None
+        if spec.strategy == "weighted":
+            weights = {m: snap.results[(mission, m, True)].metrics.get(ENSEMBLE_WEIGHT_METRIC, 0.0) for m in spec.models}
+        vote = Vote(spec, X.shape[0], weights)
+        for name in spec.order:
+            members[name] = self.predict_proba((mission, name, True), X, snap)
+            vote.add(name, align(*members[name]))
+            if spec.early_exit and vote.decided():
+                break
+        labels, confidence = vote.result()
+        return members, labels, confidence
+
+    def predict(self, mission: Mission, features: Dict[str, float], spec: Optional[EnsembleSpec] = None) -> Dict[str, Any]:
+        X = np.array([[features.get(name, 0.0) for name in FEATURES]], dtype=np.float64)
+        spec = spec or self.ensemble_spec(mission)
+        members, labels, confidence = self.evaluate(mission, X, spec)
         per_model = {}
-        for model_name in ["gaussian_nb","knn","decision_tree","random_forest","log_reg"]:
-            # prefer balanced models
-            model = self.models[(mission, model_name, True)]
-            proba = None
-            if hasattr(model, "predict_proba"):
-                try:
-                    proba_arr = model.predict_proba(X)[0]
-                    labels = list(model.classes_)
-                    proba = {labels[i]: float(round(proba_arr[i], 6)) for i in range(len(labels))}
-                except Exception:
-                    proba = None
-            label = str(model.predict(X)[0])
+        for model_name in ENSEMBLE_MODELS:
+            if model_name not in members:
+                continue
+            classes, proba_arr = members[model_name]
             per_model[model_name] = {
-                "label": label,
-                "proba": proba or {},
+                # argmax over predict_proba is what predict() does for these classifiers
+                "label": str(classes[np.argmax(proba_arr[0])]),
+                "proba": {str(c): float(round(proba_arr[0, i], 6)) for i, c in enumerate(classes)},
             }
-        # ensemble: majority vote (planet vs non_planet; treat candidate as non_planet for the vote)
-        votes = 0
-        for m in per_model.values():
-            l = m["label"]
-            if l == "planet":
-                votes += 1
-            elif l == "non_planet":
-                votes -= 1
-            else:
-                votes += 0  # candidate neutral
-        label = "planet" if votes >= 1 else "non_planet"
-        confidence = float(np.mean([max(v["proba"].get("planet", 0.0), v["proba"].get("non_planet", 0.0), v["proba"].get("candidate", 0.0)) or 0.0 for v in per_model.values()]))
         return {
             "per_model": per_model,
-            "ensemble": {"rule": "majority_vote_candidate_neutral", "label": label, "confidence": confidence}
+            "ensemble": {"rule": RULES[spec.strategy], "label": str(labels[0]), "confidence": float(confidence[0]),
+                         "models": [m for m in spec.order if m in members]},
         }
 
-    def list_datasets(self) -> Dict[str, Any]:
-        out = {}
-        for mission in ["kepler","k2","tess"]:
-            df = load_dataset(mission)
-            counts = df["classification"].value_counts().to_dict()
-            out[mission] = {"rows": int(len(df)), "by_class": counts}
+    def predict_batch(self, mission: Mission, X: np.ndarray, spec: Optional[EnsembleSpec] = None) -> Dict[str, Any]:
+        """Columnar predictions for an (n, len(FEATURES)) matrix: one predict_proba call per member."""
+        spec = spec or self.ensemble_spec(mission)
+        members, labels, confidence = self.evaluate(mission, X, spec)
+        per_model = {}
+        for model_name in ENSEMBLE_MODELS:
+            if model_name not in members:
+                continue
+            classes, proba_arr = members[model_name]
+            per_model[model_name] = {
+                "label": classes[np.argmax(proba_arr, axis=1)].tolist(),
+                "proba": {str(c): np.round(proba_arr[:, j], 6).tolist() for j, c in enumerate(classes)},
+            }
+        return {
+            "mission": mission,
+            "n": X.shape[0],
+            "per_model": per_model,
+            "ensemble": {
+                "rule": RULES[spec.strategy],
+                "label": labels.tolist(),
+                "confidence": confidence.tolist(),
+                "models": [m for m in spec.order if m in members],
+            },
+        }
+
+    def folds(self, mission: Mission, balanced: bool, y: pd.Series, folds: int, seed: int) -> np.ndarray:
+        """Cached stratified fold assignment of a (mission, balanced) dataset, shared by every model."""
+        key = (mission, balanced, folds, seed)
+        out = self._folds.get(key)
+        if out is None or len(out) != len(y):
+            out = self._folds[key] = fold_assignment(y, folds, seed)
         return out
 
-    def get_results(self, mission: Mission = None, model: str = None, balanced: bool = None) -> List[ModelResult]:
-        items = list(self.results.values())
+    def load_cv(self, store, folds: int = CV_FOLDS) -> Optional[CrossValidation]:
+        """Install the persisted per-fold metrics for the current data/hyperparameters/seed, if any."""
+        cv = store.load_cv(store.key(seeds=self.seed), folds)
+        if cv is not None:
+            self.cv = cv
+        return cv
+
+    def cross_validate(self, store=None, folds: int = CV_FOLDS, force: bool = False, workers: Optional[int] = None,
+                       cpu_budget: Optional[int] = None, nice: int = 0, mp_context=None) -> CrossValidation:
+        """k-fold evaluation of every (mission, model, balanced) pipeline; see crossval.py.
+
+        Reuses the per-fold metrics persisted in `store` for the current key unless `force`.
+        The folds x pipelines fits run like fit_all (workers/cpu_budget), each fold split is
+        built once in the parent from the cached fold assignment."""
+        version = store.key(seeds=self.seed) if store is not None else None
+        if store is not None and not force:
+            cv = store.load_cv(version, folds)
+            if cv is not None:
+                self.cv = cv
+                return cv
+        t0 = time.perf_counter()
+        seed = self.seed
+        splits: Dict[Tuple[Mission, bool, int], Split] = {}
+        for mission in MISSIONS:
+            df = load_dataset(mission)
+            for balanced, data in [(False, df), (True, _balance_df(df))]:
+                X, y = data[FEATURES], data["classification"]
+                assign = self.folds(mission, balanced, y, folds, seed)
+                for f in range(folds):
+                    test = assign == f
+                    splits[(mission, balanced, f)] = (X[~test], X[test], y[~test], y[test])
+        jobs = [(m, n, b, f) for m in MISSIONS for b in (False, True) for n in _models() for f in range(folds)]
+        workers, threads = _train_plan(len(jobs), workers, cpu_budget)
+        if workers <= 1:
+            done = [_cv_job(*job, threads, splits=splits) for job in jobs]
+        else:
+            done = _fit_parallel(splits, jobs, workers, threads, nice=nice, mp_context=mp_context, fn=_cv_job)
+
+        by_key: Dict[Key, List[Tuple[int, ModelResult]]] = {}
+        for key, fold, result in done:
+            by_key.setdefault(key, []).append((fold, result))
+        per_fold, reports, fit_seconds = {}, {}, {}
+        for key, items in by_key.items():
+            items.sort(key=lambda it: it[0])
+            per_fold[key] = [r.metrics for _, r in items]
+            reports[key] = mean_report([r.report for _, r in items])
+            fit_seconds[key] = float(np.mean([r.fit_seconds for _, r in items]))
+        cv = CrossValidation(folds=folds, seed=seed, version=version, per_fold=per_fold, reports=reports,
+                             fit_seconds=fit_seconds, seconds=time.perf_counter() - t0)
+        if store is not None:
+            store.save_cv(version, cv)
+        self.cv = cv
+        return cv
+
+    def cv_results(self) -> Dict[Key, ModelResult]:
+        """Fold-mean ModelResults of the last cross-validation run on the current seed."""
+        cv = self.cv
+        if cv is None or cv.seed != self.seed:
+            raise LookupError("cross-validation has not been computed for the current models "
+                              "(CV_ON_STARTUP=1, or python -m ml_service.store --cv)")
+        return {key: ModelResult(mission=key[0], model_name=key[1], balanced=key[2],
+                                 metrics={m: v["mean"] for m, v in cv.summary[key].items()},
+                                 report=cv.reports[key], fit_seconds=cv.fit_seconds[key], cv=cv.block(key))
+                for key in cv.per_fold}
+
+    def list_datasets(self) -> Dict[str, Any]:
+        # metadata lookup: row/class counts and column stats are cached by the feature store
+        return FEATURE_STORE.summary(MISSIONS)
+
+    def get_results(self, mission: Mission = None, model: str = None, balanced: bool = None,
+                    evaluation: str = "holdout") -> List[ModelResult]:
+        items = list((self.cv_results() if evaluation == "cv" else self.results).values())
         def ok(mr: ModelResult) -> bool:
             return ((mission is None or mr.mission == mission) and
                     (model is None or mr.model_name == model) and
                     (balanced is None or mr.balanced == balanced))
         return [mr for mr in items if ok(mr)]
 
-    def best_by(self, metric: str, balanced: bool = True) -> List[ModelResult]:
-        sel = [mr for mr in self.results.values() if mr.balanced == balanced]
+    def best_by(self, metric: str, balanced: bool = True, evaluation: str = "holdout") -> List[ModelResult]:
+        sel = self.get_results(balanced=balanced, evaluation=evaluation)
         by_mission: Dict[str, List[ModelResult]] = {"kepler": [], "k2": [], "tess": []}
         for mr in sel:
             by_mission[mr.mission].append(mr)